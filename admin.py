@@ -0,0 +1,113 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Async event loop
+import json  # JSON responses
+import logging  # Log levels
+from urllib.parse import urlsplit, parse_qs  # Request path and query
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("admin")
+
+MAX_REQUEST_HEAD = 8192  # Longest request line plus headers accepted
+REQUEST_TIMEOUT_SECONDS = 5  # Time a client gets to send its request
+MAX_PAGE_SIZE = 1000  # Most entries one page may hold
+DEFAULT_PAGE_SIZE = 100
+SNAPSHOT_CHUNK = 200  # Entries described before yielding to the event loop
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found"}
+
+
+# =========================================
+#         PAGED SNAPSHOTS
+# =========================================
+def page_params(query):
+    # (cursor, limit) from a query; the cursor is the last key of the previous page
+    cursor = query.get("cursor", [None])[0]
+    try:
+        limit = int(query.get("limit", [DEFAULT_PAGE_SIZE])[0])
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return cursor, min(max(1, limit), MAX_PAGE_SIZE)
+
+
+async def snapshot_page(keys, limit, describe):
+    """
+    Describe one page of keys (already seeked past the cursor).
+    Yields to the event loop every SNAPSHOT_CHUNK entries, so a page never blocks it
+    for long; entries that disappear in between are skipped (describe returns None).
+    """
+    items = []
+    for i, key in enumerate(keys[:limit]):
+        if i and i % SNAPSHOT_CHUNK == 0:
+            await asyncio.sleep(0)
+        item = describe(key)
+        if item is not None:
+            items.append(item)
+    next_cursor = keys[limit - 1] if len(keys) >= limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# =========================================
+#         LOCAL HTTP SERVER
+# =========================================
+async def write_response(writer, status, body):
+    payload = json.dumps(body, default=str).encode()
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        + payload
+    )
+    await writer.drain()
+
+
+async def handle_request(reader, writer, routes):
+    try:
+        peer = writer.get_extra_info("peername")
+        if peer and peer[0] not in ("127.0.0.1", "::1"):
+            await write_response(writer, 403, {"error": "admin endpoint is local-only"})
+            return
+        head = await asyncio.wait_for(
+            reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT_SECONDS
+        )
+        if len(head) > MAX_REQUEST_HEAD:
+            await write_response(writer, 400, {"error": "request too large"})
+            return
+        parts = head.split(b"\r\n", 1)[0].decode("latin-1").split()
+        if len(parts) != 3 or parts[0] != "GET":
+            await write_response(writer, 400, {"error": "only GET is supported"})
+            return
+        url = urlsplit(parts[1])
+        route = routes.get(url.path.rstrip("/") or "/")
+        if route is None:
+            await write_response(
+                writer, 404, {"error": "unknown path", "paths": sorted(routes)}
+            )
+            return
+        await write_response(writer, 200, await route(parse_qs(url.query)))
+    except (
+        asyncio.TimeoutError,
+        asyncio.IncompleteReadError,
+        asyncio.LimitOverrunError,
+    ):
+        pass  # Slow, truncated or oversized request: just close it
+    except Exception:
+        log.exception("admin_request_failed")
+    finally:
+        writer.close()
+
+
+async def serve_admin(host, port, routes):
+    """
+    Start the admin HTTP/JSON endpoint.
+    routes maps a path to a coroutine taking the parsed query and returning a dict.
+    """
+    server = await asyncio.start_server(
+        lambda r, w: handle_request(r, w, routes), host, port, limit=MAX_REQUEST_HEAD
+    )
+    log_event(log, logging.INFO, "admin_listening", host=host, port=port)
+    return server
@@ -0,0 +1,207 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Async event loop
+import json  # JSON encoding/decoding
+import logging  # Log levels
+import sys  # Command-line arguments for the broker
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("backplane")
+
+
+# =========================================
+#         BACKPLANE INTERFACE
+# =========================================
+class Backplane:
+    """
+    Pub/sub link between game server nodes.
+    Events are queued with publish() and sent as one batch per flush interval:
+    { "node": sender_id, "events": [event, ...] }.
+    An event with a "to" key is only handled by that node; others are broadcast.
+    Subclasses implement _connect(), _send(frame) and _disconnect().
+    """
+
+    def __init__(self, node_id, flush_interval=0.005):
+        self.node_id = node_id
+        self.flush_interval = flush_interval
+        self.outbox = []  # Events waiting for the next flush
+        self.on_batch = None  # Coroutine called with (sender node, events)
+        self._flush_handle = None
+
+    async def start(self, on_batch):
+        self.on_batch = on_batch
+        await self._connect()
+
+    def publish(self, event, to=None):
+        # Queue an event; everything published within one interval goes out together
+        if to is not None:
+            event["to"] = to
+        self.outbox.append(event)
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        if not self.outbox:
+            return
+        events, self.outbox = self.outbox, []
+        self._send({"node": self.node_id, "events": events})
+
+    async def receive(self, frame):
+        # Hand the events meant for this node to the server, in order
+        sender = frame.get("node")
+        if sender == self.node_id or self.on_batch is None:
+            return
+        events = [
+            event
+            for event in frame.get("events", [])
+            if event.get("to") in (None, self.node_id)
+        ]
+        if events:
+            await self.on_batch(sender, events)
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.outbox:
+            events, self.outbox = self.outbox, []
+            self._send({"node": self.node_id, "events": events})
+        await self._disconnect()
+
+    async def _connect(self):
+        raise NotImplementedError
+
+    def _send(self, frame):
+        raise NotImplementedError
+
+    async def _disconnect(self):
+        raise NotImplementedError
+
+
+# =========================================
+#         IN-PROCESS BACKPLANE
+# =========================================
+class InProcessHub:
+    # Shared bus for several nodes running in the same process
+    def __init__(self):
+        self.members = []
+
+
+class InProcessBackplane(Backplane):
+    def __init__(self, node_id, hub, flush_interval=0.005):
+        super().__init__(node_id, flush_interval)
+        self.hub = hub
+        self.inbox = asyncio.Queue()  # Batches from other nodes, handled in order
+        self._reader = None
+
+    async def _connect(self):
+        self.hub.members.append(self)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    def _send(self, frame):
+        for member in self.hub.members:
+            if member is not self:
+                member.inbox.put_nowait(frame)
+
+    async def _read_loop(self):
+        while True:
+            frame = await self.inbox.get()
+            try:
+                await self.receive(frame)
+            except Exception:
+                log.exception("backplane_batch_failed")
+
+    async def _disconnect(self):
+        if self in self.hub.members:
+            self.hub.members.remove(self)
+        if self._reader:
+            self._reader.cancel()
+
+
+# =========================================
+#         TCP BROKER BACKPLANE
+# =========================================
+class TcpBackplane(Backplane):
+    # Talks to a local broker (see run_broker) using newline-delimited JSON batches
+    def __init__(self, node_id, host="127.0.0.1", port=8766, flush_interval=0.005):
+        super().__init__(node_id, flush_interval)
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self._reader_task = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    def _send(self, frame):
+        if self.writer is not None and not self.writer.is_closing():
+            self.writer.write(json.dumps(frame).encode() + b"\n")
+
+    async def _read_loop(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                log_event(log, logging.WARNING, "broker_connection_closed")
+                return
+            try:
+                await self.receive(json.loads(line))
+            except Exception:
+                log.exception("backplane_batch_failed")
+
+    async def _disconnect(self):
+        if self.writer is not None:
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+            self.writer.close()
+        if self._reader_task:
+            self._reader_task.cancel()
+
+
+async def run_broker(host="127.0.0.1", port=8766):
+    """
+    Minimal relay standing in for a real message broker in local setups and tests.
+    Every line a node sends is copied to every other connected node.
+    """
+    writers = set()
+
+    async def relay(reader, writer):
+        writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for other in list(writers):
+                    if other is not writer and not other.is_closing():
+                        other.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            writers.discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(relay, host, port)
+    print(f"Backplane broker listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def create_backplane(url, node_id):
+    # Build a backplane from a URL such as "tcp://127.0.0.1:8766"
+    if not url:
+        return None
+    if url.startswith("tcp://"):
+        host, _, port = url[len("tcp://") :].rpartition(":")
+        return TcpBackplane(node_id, host or "127.0.0.1", int(port))
+    raise ValueError(f"Unsupported backplane URL: {url}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_broker(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8766))
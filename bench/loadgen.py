@@ -0,0 +1,287 @@
+"""
+Headless load generator: many real client connections against a game server.
+
+Each simulated player is a plain websocket client (network.connect_to_server,
+no Qt) that goes through the same flow as the desktop client: name handshake,
+invite / accept, enter_room, rounds of submit with some chat, a reset and a
+rematch, then leave_room. The load is ramped in levels of concurrent rooms;
+for each level it reports connect time, time-to-match and per-round
+round-trip latency percentiles, plus rounds and frames per second, and at the
+end the largest level whose round-trip p99 met the target.
+
+    python bench/loadgen.py                                # starts a local server
+    python bench/loadgen.py --levels 100,500,1000,2000 --p99-target 50
+    python bench/loadgen.py --uri ws://127.0.0.1:8765      # an already running one
+
+Thousands of connections need a high open-file limit (ulimit -n) on both ends.
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import argparse  # Command line options
+import asyncio  # Async event loop
+import collections  # Per-type frame queues
+import json  # Frames
+import os  # Project path
+import random  # Player moves
+import sys  # Project path
+import tempfile  # Scratch profile database
+import time  # Timings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from network import connect_to_server  # Same connect + name handshake as the client
+from startup import free_port, start_server  # Local server for the run
+
+EXPECT_TIMEOUT_SECONDS = 30  # A reply slower than this counts as a failed match
+MAX_ROUNDS_PER_GAME = 40  # Random play can stall (both blocking); give up after this
+# Frames a player waits for; anything else (lobby traffic...) is only counted
+EXPECTED_TYPES = (
+    "invite_received",
+    "invite_result",
+    "room_joined",
+    "update",
+    "round_result",
+    "chat",
+    "room_left",
+)
+
+
+class PlayerError(Exception):
+    pass
+
+
+# =========================================
+#         SIMULATED PLAYER
+# =========================================
+class Player:
+    def __init__(self, name):
+        self.name = name
+        self.ws = None
+        self.queues = collections.defaultdict(asyncio.Queue)
+        self.frames = 0
+        self.refused = None  # Reason, if the server asked us to reconnect
+        self.reader = None
+        self.joined = asyncio.Event()
+        self.closed = False
+
+    async def connect(self, uri):
+        started = time.perf_counter()
+        self.ws = await connect_to_server(uri, self.name)
+        if self.ws is None:
+            raise PlayerError("connect failed")
+        self.reader = asyncio.create_task(self.read())
+        # The first lobby snapshot means the name was accepted: we can be invited
+        await asyncio.wait_for(self.joined.wait(), EXPECT_TIMEOUT_SECONDS)
+        if self.closed:
+            raise PlayerError(f"connection closed ({self.refused or 'no reason'})")
+        return (time.perf_counter() - started) * 1000
+
+    async def read(self):
+        try:
+            async for raw in self.ws:
+                received = time.perf_counter()
+                self.frames += 1
+                data = json.loads(raw)
+                msg_type = data.get("type")
+                if msg_type == "lobby_update":
+                    self.joined.set()
+                elif msg_type == "reconnect":
+                    self.refused = data.get("reason")
+                elif msg_type in EXPECTED_TYPES:
+                    self.queues[msg_type].put_nowait((received, data))
+        except Exception:
+            pass
+        finally:
+            # Wake anything still waiting: the connection is gone
+            self.closed = True
+            self.joined.set()
+            for msg_type in EXPECTED_TYPES:
+                self.queues[msg_type].put_nowait(None)
+
+    async def expect(self, msg_type):
+        # (receive time, frame) of the next frame of msg_type
+        item = await asyncio.wait_for(
+            self.queues[msg_type].get(), EXPECT_TIMEOUT_SECONDS
+        )
+        if item is None:
+            raise PlayerError(f"connection closed ({self.refused or 'no reason'})")
+        return item
+
+    async def send(self, **payload):
+        await self.ws.send(json.dumps(payload))
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.reader is not None:
+            await self.reader
+
+
+async def play_game(a, b, stats, chat_every):
+    # Random moves until someone wins (or the round cap); records round trips
+    for round_number in range(MAX_ROUNDS_PER_GAME):
+        if chat_every and round_number % chat_every == 0:
+            sent = time.perf_counter()
+            await a.send(type="chat", message=f"round {round_number}, good luck")
+            received, _ = await b.expect("chat")
+            stats["chat_ms"].append((received - sent) * 1000)
+        sent = time.perf_counter()
+        await a.send(type="submit", action=random.choice(("attack", "block", "load")))
+        await b.send(type="submit", action=random.choice(("attack", "block", "load")))
+        a_received, result = await a.expect("round_result")
+        b_received, _ = await b.expect("round_result")
+        stats["round_ms"].append((a_received - sent) * 1000)
+        stats["round_ms"].append((b_received - sent) * 1000)
+        stats["rounds"] += 1
+        if "winner" in result:
+            return
+
+
+async def play_match(a, b, stats, games, chat_every):
+    started = time.perf_counter()
+    await a.send(type="invite", to=b.name)
+    await b.expect("invite_received")
+    await b.send(type="invite_response", **{"from": a.name, "accepted": True})
+    await a.expect("invite_result")
+    await a.expect("room_joined")
+    await b.expect("room_joined")
+    # Like the desktop client: no lobby traffic during a match
+    await a.send(type="lobby_unsubscribe")
+    await b.send(type="lobby_unsubscribe")
+    await a.send(type="enter_room")
+    await a.expect("update")
+    received, _ = await b.expect("update")
+    stats["match_ms"].append((received - started) * 1000)
+    for game in range(games):
+        if game:
+            await a.send(type="reset")
+            await b.send(type="reset")
+            await a.expect("update")
+            await b.expect("update")
+        await play_game(a, b, stats, chat_every)
+    await a.send(type="leave_room")
+    await b.expect("room_left")
+    await a.expect("room_left")
+    await a.send(type="lobby_subscribe")
+    await b.send(type="lobby_subscribe")
+    stats["matches"] += 1
+
+
+# =========================================
+#         LOAD LEVELS
+# =========================================
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def connect_all(players, uri, batch, stats):
+    # In batches, so the server's handshake limit is not what gets measured
+    for start in range(0, len(players), batch):
+        results = await asyncio.gather(
+            *(p.connect(uri) for p in players[start : start + batch]),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                stats["failures"] += 1
+            else:
+                stats["connect_ms"].append(result)
+
+
+async def run_level(uri, level, rooms, args):
+    stats = collections.defaultdict(list)
+    for key in ("rounds", "matches", "failures"):
+        stats[key] = 0
+    players = [Player(f"load{level}_{i}") for i in range(2 * rooms)]
+    await connect_all(players, uri, args.connect_batch, stats)
+    started = time.perf_counter()
+    pairs = [(players[i], players[i + 1]) for i in range(0, len(players), 2)]
+    results = await asyncio.gather(
+        *(
+            play_match(a, b, stats, args.games, args.chat_every)
+            for a, b in pairs
+            if a.ws is not None and b.ws is not None
+        ),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    stats["failures"] += sum(1 for r in results if isinstance(r, Exception))
+    frames = sum(p.frames for p in players)
+    refused = sum(1 for p in players if p.refused)
+    await asyncio.gather(*(p.close() for p in players), return_exceptions=True)
+    return stats, elapsed, frames, refused
+
+
+def report(rooms, stats, elapsed, frames, refused):
+    print(
+        f"{rooms:>6} rooms  "
+        f"connect p50/p99 {percentile(stats['connect_ms'], 50):6.1f}/"
+        f"{percentile(stats['connect_ms'], 99):6.1f} ms  "
+        f"match p50/p99 {percentile(stats['match_ms'], 50):6.1f}/"
+        f"{percentile(stats['match_ms'], 99):6.1f} ms  "
+        f"round p50/p95/p99 {percentile(stats['round_ms'], 50):6.1f}/"
+        f"{percentile(stats['round_ms'], 95):6.1f}/"
+        f"{percentile(stats['round_ms'], 99):6.1f} ms  "
+        f"chat p99 {percentile(stats['chat_ms'], 99):6.1f} ms  "
+        f"{stats['rounds'] / elapsed:8.0f} rounds/s  "
+        f"{frames / elapsed:8.0f} frames/s  "
+        f"{stats['failures']} failed  {refused} refused"
+    )
+
+
+async def ramp(uri, args):
+    best = None
+    for level, rooms in enumerate(args.levels):
+        stats, elapsed, frames, refused = await run_level(uri, level, rooms, args)
+        report(rooms, stats, elapsed, frames, refused)
+        p99 = percentile(stats["round_ms"], 99)
+        if stats["failures"] or refused or not p99 <= args.p99_target:
+            break
+        best = rooms
+    if best is None:
+        print(f"No level met the round-trip p99 target of {args.p99_target} ms.")
+    else:
+        print(
+            f"Max concurrent rooms with round-trip p99 <= {args.p99_target} ms: {best}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--levels",
+        type=lambda text: [int(n) for n in text.split(",")],
+        default=[50, 100, 250, 500, 1000, 2000],
+        help="concurrent rooms per level, comma separated",
+    )
+    parser.add_argument("--p99-target", type=float, default=100, help="ms")
+    parser.add_argument("--games", type=int, default=2, help="games per match")
+    parser.add_argument("--chat-every", type=int, default=3, help="rounds (0: none)")
+    parser.add_argument("--connect-batch", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--uri", help="use a running server instead of starting one")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as scratch:
+        server = None
+        uri = args.uri
+        if uri is None:
+            port = free_port()
+            server = start_server(port, scratch)
+            uri = f"ws://127.0.0.1:{port}"
+        try:
+            asyncio.run(ramp(uri, args))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Receive latency while an invite prompt is open.
+
+Feeds timestamped server frames into the real client message loop
+(handlers.handle_ws_messages with a LobbyWindow, offscreen Qt) at a steady
+rate, opens an invite question halfway through and leaves it unanswered.
+Reports send-to-handled latency percentiles before and while the prompt is
+open; they should match, since prompts no longer block the message loop.
+
+    python bench/prompt_latency.py
+    python bench/prompt_latency.py --rate 200 --seconds 5
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import argparse  # Command line options
+import asyncio  # Async event loop
+import json  # Frames
+import os  # Offscreen Qt
+import sys  # Project path
+import time  # Timestamps
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# =========================================
+#         IN-PROCESS SERVER CONNECTION
+# =========================================
+class FeedConnection:
+    # Stands in for the client websocket: frames are pushed in by the bench
+    def __init__(self):
+        self.frames = asyncio.Queue()
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.frames.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# =========================================
+#         MEASUREMENT
+# =========================================
+async def run(rate, seconds):
+    import handlers
+    from lobby import LobbyWindow
+    from outbox import Outbox
+
+    ws = FeedConnection()
+    lobby = LobbyWindow(Outbox(ws), "bench")
+    lobby.show()
+    latencies = {"no prompt": [], "prompt open": []}
+    phase = "no prompt"
+    handle_message = handlers.handle_message
+
+    async def timed_handle_message(ws, lobby, data):
+        result = await handle_message(ws, lobby, data)
+        if "sent_at" in data:
+            latencies[phase].append((time.perf_counter() - data["sent_at"]) * 1000)
+        return result
+
+    handlers.handle_message = timed_handle_message
+    loop_task = asyncio.ensure_future(handlers.handle_ws_messages(ws, lobby))
+    interval = 1 / rate
+    for phase in ("no prompt", "prompt open"):
+        if phase == "prompt open":
+            invite = {"type": "invite_received", "from": "rival"}
+            ws.frames.put_nowait(json.dumps(invite))
+        deadline = time.perf_counter() + seconds
+        n = 0
+        while time.perf_counter() < deadline:
+            # Chat frames are never coalesced away, so every one is measured
+            ws.frames.put_nowait(
+                json.dumps(
+                    {
+                        "type": "chat",
+                        "sender": "rival",
+                        "message": f"m{n}",
+                        "sent_at": time.perf_counter(),
+                    }
+                )
+            )
+            n += 1
+            await asyncio.sleep(interval)
+        await asyncio.sleep(0.1)  # Let the last frames through before switching
+    ws.frames.put_nowait(None)
+    await loop_task
+    handlers.handle_message = handle_message
+    prompt_open = "rival" in lobby.invite_prompts
+    lobby.close_invite_prompts()
+    return latencies, prompt_open
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=100, help="frames per second")
+    parser.add_argument("--seconds", type=float, default=3, help="per phase")
+    args = parser.parse_args()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    from PyQt6 import QtWidgets
+    from qasync import QEventLoop
+
+    app = QtWidgets.QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        latencies, prompt_open = loop.run_until_complete(run(args.rate, args.seconds))
+    print("Invite prompt stayed open during phase 2:", prompt_open)
+    print(f"{'phase':<12} {'frames':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for phase, values in latencies.items():
+        if not values:
+            print(f"{phase:<12} {0:>7}  (no frames handled)")
+            continue
+        print(
+            f"{phase:<12} {len(values):>7} {percentile(values, 50):8.2f} "
+            f"{percentile(values, 99):8.2f} {max(values):8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Per-round UI update time of the game window.
+
+Builds a GameClient (offscreen Qt, themed like the real client) and plays
+rounds through it the way a player sees them: pick an action, submit, then
+apply the server's round_result (hp changes, game over and reset included).
+Each round is timed up to a synchronous repaint, so style polish and layout
+are part of the number.
+
+Run it on both sides of a UI change to compare, e.g. against the previous
+commit checked out in a scratch worktree:
+
+    python bench/round_ui.py
+    git worktree add /tmp/before HEAD~1
+    python bench/round_ui.py --root /tmp/before
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import argparse  # Command line options
+import asyncio  # Async event loop
+import os  # Offscreen Qt
+import statistics  # Mean
+import sys  # Project path
+import time  # Timings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One scripted match; each entry is (my action, opponent action, my hp, their hp)
+MATCH = [
+    ("load", "load", 3, 3),
+    ("attack", "block", 3, 3),
+    ("load", "load", 3, 3),
+    ("attack", "load", 3, 2),
+    ("block", "attack", 3, 2),
+    ("load", "load", 3, 2),
+    ("attack", "load", 3, 1),
+    ("load", "block", 3, 1),
+    ("attack", "load", 3, 0),
+]
+
+
+class NullConnection:
+    # The game window only sends; nothing has to arrive anywhere
+    async def send(self, message):
+        pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(rounds):
+    from game_window import GameClient
+
+    try:
+        from outbox import Outbox
+    except ImportError:
+        connection = NullConnection()  # Trees from before the outbound queue
+    else:
+        connection = Outbox(NullConnection())
+    window = GameClient(asyncio.get_running_loop(), connection, "me", "rival")
+    window.show()
+    await asyncio.sleep(0)  # Show events run on the qasync loop, not re-entered
+    timings = []
+    seq = 0
+    while len(timings) < rounds:
+        # Each match opens with a full update, like after entering a room or a
+        # reset, so the timed rounds apply their deltas instead of asking to resync
+        seq += 1
+        await window.handle_game_message(
+            {
+                "type": "update",
+                "seq": seq,
+                "full": True,
+                "round": 1,
+                "hp": 3,
+                "opponent_hp": 3,
+                "loaded": False,
+                "opponent_loaded": False,
+            }
+        )
+        for number, (mine, theirs, hp, opponent_hp) in enumerate(MATCH, start=1):
+            started = time.perf_counter()
+            window.select_action(mine)
+            window.submit_action()
+            seq += 1
+            frame = {
+                "type": "round_result",
+                "your_action": mine,
+                "opponent_action": theirs,
+                "update": {
+                    "seq": seq,
+                    "round": number + 1,
+                    "hp": hp,
+                    "opponent_hp": opponent_hp,
+                    "loaded": mine == "load",
+                    "opponent_loaded": theirs == "load",
+                },
+            }
+            if opponent_hp == 0:
+                frame["winner"] = "me"
+            await window.handle_game_message(frame)
+            window.repaint()
+            timings.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0)  # Let timers (label flash, chat flush) run
+        window.reset_game()
+    window.close()
+    return timings[:rounds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--root", default=ROOT, help="client source tree to time")
+    args = parser.parse_args()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, args.root)
+    from PyQt6 import QtWidgets
+    from qasync import QEventLoop
+
+    app = QtWidgets.QApplication(sys.argv)
+    try:
+        from theme import apply_theme
+    except ImportError:
+        apply_theme = None  # Trees from before the application-wide theme
+    if apply_theme is not None:
+        apply_theme(app)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        timings = loop.run_until_complete(run(args.rounds))
+    print(f"Per-round UI update over {len(timings)} rounds (ms):")
+    print(
+        f"  mean {statistics.mean(timings):.3f}  p50 {percentile(timings, 50):.3f}  "
+        f"p95 {percentile(timings, 95):.3f}  p99 {percentile(timings, 99):.3f}  "
+        f"max {max(timings):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Churn soak benchmark for the game server's session / room lifecycle.
+
+Runs many connect -> invite -> play a full match -> leave -> disconnect cycles
+against the real connection handler (in-process, no sockets) and checks that
+memory stays flat:
+- after every batch, all per-connection and per-room tables must be empty;
+- allocated memory blocks, sampled after warm-up, must not keep growing.
+
+    python bench/soak.py                      # 200,000 cycles (about 10 minutes)
+    python bench/soak.py --cycles 20000 --pairs 20
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import argparse  # Command line options
+import asyncio  # Async event loop
+import gc  # Collect before sampling memory
+import importlib.util  # Load game-server.py (not an importable module name)
+import json  # Client frames
+import os  # Environment for the server
+import sys  # Allocated-block counter
+import tempfile  # Scratch profile database
+import time  # Throughput
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tables that must be empty once every client of a batch has disconnected
+TRACKED_TABLES = (
+    "rooms",
+    "players",
+    "submitted_actions",
+    "pending_resets",
+    "USERS",
+    "LOBBY",
+    "OPEN_ROOMS",
+    "USERS_IN_ROOM",
+    "INVITES",
+    "INVITED",
+    "USER_BY_NAME",
+    "USER_INDEX",
+    "ROOM_INDEX",
+    "GAME_ROOM_INDEX",
+    "LOBBY_VIEWS",
+    "LOBBY_SUBSCRIBERS",
+    "LAST_LOBBY_FRAME",
+    "LAST_LOBBY_TOTALS",
+    "ROOM_ACTORS",
+    "PENDING_FRAMES",
+    "MATCH_RECORDS",
+    "CONNECTIONS",
+    "CONNECTION_IDS",
+    "CONNECTION_INDEX",
+    "PEERS",
+    "REMOTE_USERS",
+    "REMOTE_ROOMS",
+    "REMOTE_SESSIONS",
+)
+RECORD_WAIT_SECONDS = 5  # Match results are recorded on their own tasks
+
+
+def load_server(profile_db):
+    os.environ["PYBAT_PROFILE_DB"] = profile_db
+    os.environ.setdefault("PYBAT_ADMIN_PORT", "0")
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location(
+        "game_server", os.path.join(ROOT, "game-server.py")
+    )
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    return server
+
+
+# =========================================
+#         IN-PROCESS CLIENT CONNECTION
+# =========================================
+class SoakConnection:
+    # Stands in for a websocket: the server reads inbox and writes outbox
+    def __init__(self, address):
+        self.remote_address = address
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+
+    async def recv(self):
+        message = await self.inbox.get()
+        if message is None:
+            raise ConnectionResetError("client disconnected")
+        return message
+
+    async def send(self, message):
+        self.outbox.put_nowait(message)
+
+    async def close(self, *args):
+        self.inbox.put_nowait(None)
+
+    def push(self, **payload):
+        self.inbox.put_nowait(json.dumps(payload))
+
+    async def expect(self, msg_type):
+        # Skip other frames (e.g. lobby traffic) until one of msg_type arrives
+        while True:
+            data = json.loads(await self.outbox.get())
+            if data.get("type") == msg_type:
+                return data
+
+
+async def play_cycle(server, pair):
+    # One full session lifecycle for two clients
+    a_name, b_name = f"soak{pair}a", f"soak{pair}b"
+    a = SoakConnection(("127.0.0.1", 2 * pair))
+    b = SoakConnection(("127.0.0.1", 2 * pair + 1))
+    tasks = [
+        asyncio.create_task(server.handler(a)),
+        asyncio.create_task(server.handler(b)),
+    ]
+    a.inbox.put_nowait(a_name)
+    b.inbox.put_nowait(b_name)
+    await a.expect("lobby_update")
+    await b.expect("lobby_update")
+    a.push(type="invite", to=b_name)
+    await b.expect("invite_received")
+    b.push(type="invite_response", **{"from": a_name, "accepted": True})
+    await a.expect("invite_result")
+    a.push(type="enter_room")
+    await a.expect("update")
+    await b.expect("update")
+    # A loads then attacks; B never blocks, so the match ends after 3 hits
+    while True:
+        for action in ("load", "attack"):
+            a.push(type="submit", action=action)
+            b.push(type="submit", action="load")
+            await b.expect("round_result")
+            result = await a.expect("round_result")
+            if "winner" in result:
+                break
+        else:
+            continue
+        break
+    a.push(type="leave_room")
+    await b.expect("room_left")
+    await a.expect("room_left")
+    await a.close()
+    await b.close()
+    await asyncio.gather(*tasks)
+
+
+def leftover_entries(server):
+    return {
+        name: len(getattr(server, name))
+        for name in TRACKED_TABLES
+        if len(getattr(server, name))
+    }
+
+
+# =========================================
+#         SOAK LOOP
+# =========================================
+async def soak(cycles, pairs, warmup, samples, tolerance):
+    with tempfile.TemporaryDirectory() as scratch:
+        server = load_server(os.path.join(scratch, "profiles.db"))
+        batches = max(1, cycles // pairs)
+        sample_every = max(1, batches // samples)
+        warmup_batches = max(1, warmup // pairs)
+        baseline = None
+        readings = []
+        started = time.perf_counter()
+        for batch in range(1, batches + 1):
+            await asyncio.gather(*(play_cycle(server, pair) for pair in range(pairs)))
+            if server.MATCH_RECORDS:
+                await asyncio.wait(server.MATCH_RECORDS, timeout=RECORD_WAIT_SECONDS)
+            leaked = leftover_entries(server)
+            if leaked:
+                raise AssertionError(f"batch {batch}: entries left behind {leaked}")
+            if batch == warmup_batches or (
+                batch > warmup_batches and batch % sample_every == 0
+            ):
+                gc.collect()
+                blocks = sys.getallocatedblocks()
+                if baseline is None:
+                    baseline = blocks
+                readings.append(blocks)
+                rate = batch * pairs / (time.perf_counter() - started)
+                print(
+                    f"{batch * pairs:>9} cycles  {blocks:>9} blocks  "
+                    f"{blocks - baseline:>+8}  {rate:,.0f} cycles/s"
+                )
+        await server.profiles.close()
+    growth = readings[-1] - baseline
+    limit = max(int(baseline * tolerance), 10000)
+    print(f"Block growth after warm-up: {growth:+} (limit {limit})")
+    if growth > limit:
+        raise AssertionError(f"memory kept growing: {growth:+} blocks after warm-up")
+    print("Memory stayed flat.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=200_000)
+    parser.add_argument("--pairs", type=int, default=10, help="concurrent matches")
+    parser.add_argument("--warmup", type=int, default=5000, help="cycles before baseline")
+    parser.add_argument("--samples", type=int, default=20, help="memory readings")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.02, help="allowed growth, fraction"
+    )
+    args = parser.parse_args()
+    asyncio.run(soak(args.cycles, args.pairs, args.warmup, args.samples, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
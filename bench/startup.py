@@ -0,0 +1,178 @@
+"""
+Client startup benchmark: time from process start to the first lobby paint.
+
+Starts a local game server, then launches the client several times in fresh
+processes (offscreen Qt, name given up front instead of typed) and reports:
+- median time to each startup milestone, measured from process spawn;
+- the slowest imports of the last run (python -X importtime).
+
+    python bench/startup.py
+    python bench/startup.py --runs 10 --top 25
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import argparse  # Command line options
+import json  # Milestones from the child process
+import os  # Environment for server / client
+import socket  # Free port, server readiness
+import statistics  # Medians
+import subprocess  # Server and client processes
+import sys  # Interpreter path
+import tempfile  # Scratch profile database
+import time  # Timestamps
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHILD_TIMEOUT_SECONDS = 60
+
+
+# =========================================
+#         CLIENT PROCESS (ONE STARTUP)
+# =========================================
+def run_child():
+    # Runs inside the measured process; prints its milestones as JSON and exits
+    marks = {"interpreter_ready": time.time()}
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, ROOT)
+    import asyncio
+    from PyQt6 import QtCore, QtWidgets
+    from qasync import QEventLoop
+    import main_async
+
+    marks["client_imported"] = time.time()
+    app = QtWidgets.QApplication(sys.argv)
+    main_async.apply_theme(app)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    marks["app_created"] = time.time()
+
+    class FirstLobbyPaint(QtCore.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Type.Paint and isinstance(
+                obj, main_async.LobbyWindow
+            ):
+                marks["lobby_painted"] = time.time()
+                print(json.dumps(marks), flush=True)
+                os._exit(0)
+            return False
+
+    watcher = FirstLobbyPaint()
+    app.installEventFilter(watcher)
+    with loop:
+        loop.run_until_complete(main_async.main_async(username="startup-bench"))
+    os._exit(1)  # The lobby never painted
+
+
+# =========================================
+#         LOCAL SERVER
+# =========================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, scratch):
+    env = dict(
+        os.environ,
+        PYBAT_HOST="127.0.0.1",
+        PYBAT_PORT=str(port),
+        PYBAT_ADMIN_PORT="0",
+        PYBAT_PROFILE_DB=os.path.join(scratch, "profiles.db"),
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "game-server.py")],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("game server did not start")
+
+
+# =========================================
+#         MEASUREMENT
+# =========================================
+def parse_importtime(stderr, top):
+    # (cumulative_ms, self_ms, module) of the slowest top-level and project imports
+    project = {name[:-3] for name in os.listdir(ROOT) if name.endswith(".py")}
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        module = name.strip()
+        top_level = name.startswith(" ") and not name.startswith("  ")
+        if top_level or module in project:
+            rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, module))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def measure(uri, runs):
+    env = dict(os.environ, PYBAT_SERVER_URI=uri, QT_QPA_PLATFORM="offscreen")
+    timings = []
+    stderr = ""
+    for _ in range(runs):
+        spawned = time.time()
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=CHILD_TIMEOUT_SECONDS,
+        )
+        if child.returncode != 0 or not child.stdout.strip():
+            raise RuntimeError(
+                f"client did not reach the lobby:\n{child.stderr[-2000:]}"
+            )
+        marks = json.loads(child.stdout.strip().splitlines()[-1])
+        timings.append({name: (t - spawned) * 1000 for name, t in marks.items()})
+        stderr = child.stderr
+    return timings, stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="imports listed")
+    parser.add_argument("--uri", help="use a running server instead of starting one")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return
+    with tempfile.TemporaryDirectory() as scratch:
+        server = None
+        uri = args.uri
+        if uri is None:
+            port = free_port()
+            server = start_server(port, scratch)
+            uri = f"ws://127.0.0.1:{port}"
+        try:
+            timings, stderr = measure(uri, args.runs)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+    print(f"Startup milestones, median of {args.runs} runs (ms after spawn):")
+    for name in timings[0]:
+        print(f"  {name:<18} {statistics.median(t[name] for t in timings):8.1f}")
+    print("Slowest imports (last run):")
+    print(f"  {'cumulative':>10} {'self':>8}  module")
+    for cumulative, own, module in parse_importtime(stderr, args.top):
+        print(f"  {cumulative:10.1f} {own:8.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
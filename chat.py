@@ -9,10 +9,106 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
     QHBoxLayout,
 )
-from PyQt6.QtCore import Qt
-import json
-import asyncio
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QTextBlockFormat, QTextCharFormat, QTextCursor
 import functools
+import html
+import logging
+from logpipe import get_logger, log_event
+
+log = get_logger("client.chat")
+
+
+# =========================================
+#         CHAT LOG (BOUNDED, BATCHED)
+# =========================================
+CHAT_MAX_BLOCKS = 1000  # Lines kept in the log; the oldest are dropped past this
+CHAT_FLUSH_MS = 16  # Pending lines are written at most once per UI frame
+
+# Prebuilt line templates: only the escaped sender / message are filled in
+ROUND_SEP_HTML = (
+    '<div style="margin:12px 0 4px 0; border-bottom:2px solid #888; font-size:13px;'
+    ' color:#bbb;">— Round {round} —</div><br>'
+)
+MATCH_END_HTML = (
+    '<div style="margin:16px 0 8px 0; border-bottom:3px double #ffcc00;'
+    ' font-size:15px; color:#ffcc00; text-align:center;">=== End of Match ===</div>'
+    "<br>"
+)
+LINE_HTML = (
+    '<b><span style="color:{color};">{sender}:</span></b> '
+    '<span style="{style}">{message}</span>'
+)
+# (name color, message style) by side, for action results and for chat
+ACTION_LINE_STYLES = {
+    "You": (
+        "#1565c0",
+        "background-color:#cce4ff; color:#1565c0; padding:2px 6px; border-radius:6px;",
+    ),
+    "Enemy": (
+        "#c62828",
+        "background-color:#ffe3e3; color:#c62828; padding:2px 6px; border-radius:6px;",
+    ),
+    None: ("#fff", ""),
+}
+CHAT_LINE_STYLES = {
+    "You": ("#1565c0", "color:#fff;"),
+    "Enemy": ("#c62828", "color:#fff;"),
+}
+
+
+def format_line(sender, message, color, style):
+    return LINE_HTML.format(
+        color=color,
+        sender=html.escape(sender),
+        message=html.escape(message),
+        style=style,
+    )
+
+
+class ChatLog:
+    """
+    Append-only view of the game chat over a read-only QTextEdit.
+    Lines are queued and written together once per UI frame in one edit block
+    (one layout pass), the document keeps at most max_blocks blocks and has no
+    undo history, so memory and append cost stay flat however long the session.
+    """
+
+    def __init__(self, display, max_blocks=CHAT_MAX_BLOCKS):
+        self.display = display
+        self.document = display.document()
+        self.document.setMaximumBlockCount(max_blocks)
+        self.document.setUndoRedoEnabled(False)
+        self.pending = []
+        self.timer = QTimer(display)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(CHAT_FLUSH_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def append(self, line_html):
+        self.pending.append(line_html)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def clear(self):
+        self.pending = []
+        self.timer.stop()
+        self.document.clear()
+
+    def flush(self):
+        if not self.pending:
+            return
+        lines, self.pending = self.pending, []
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for line_html in lines:
+            if not self.document.isEmpty():
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertHtml(line_html)
+        cursor.endEditBlock()
+        scrollbar = self.display.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
 
 
 # =========================================
@@ -39,11 +135,12 @@ def create_chat_ui(self):
     self.chat_display = QTextEdit()
     self.chat_display.setReadOnly(True)
     self.chat_display.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-    self.chat_display.setStyleSheet("margin-bottom: 12px; margin-top: 12px;")
+    self.chat_display.setObjectName("ChatDisplay")
     self.chat_display.setSizePolicy(
         QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
     )
     self.chat_layout.addWidget(self.chat_display, stretch=10)
+    self.chat_log = ChatLog(self.chat_display)
 
     # --- Message input box ---
     self.message_input = QTextEdit()
@@ -82,16 +179,13 @@ def create_chat_ui(self):
     self.exit_room_btn.setSizePolicy(
         QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed
     )
-    self.exit_room_btn.setStyleSheet(
-        "background-color: #c62828; color: white; font-weight: bold; border-radius: 6px; padding: 8px 0; margin-top: 16px;"
-    )
+    self.exit_room_btn.setObjectName("ExitRoomButton")
+    self.exit_room_btn.setProperty("role", "danger")
 
     def handle_exit_room():
         # Send leave_room message to server and close game window
-        if hasattr(self, "websocket") and self.websocket:
-            import asyncio, json
-
-            asyncio.create_task(self.websocket.send(json.dumps({"type": "leave_room"})))
+        if getattr(self, "outbox", None):
+            self.outbox.send({"type": "leave_room"})
         # If in a parent_lobby context, show lobby
         if hasattr(self, "parent_lobby") and self.parent_lobby:
             self.close()
@@ -107,24 +201,7 @@ def create_chat_ui(self):
     # --- Hide Game toggle button (bottom left) ---
     self.hide_game_btn = QPushButton("<")
     self.hide_game_btn.setFixedSize(24, 24)
-    self.hide_game_btn.setStyleSheet(
-        """
-        QPushButton {
-            background: transparent;
-            border: none;
-            color: transparent;
-            font-size: 14px;
-            padding: 2px 6px;
-            margin-top: 8px;
-        }
-        QPushButton:hover {
-            background: #222;
-            border: 2px solid #ffcc00;
-            border-radius: 6px;
-            color: #ffcc00;
-        }
-        """
-    )
+    self.hide_game_btn.setObjectName("HideGameToggle")
     self.hide_game_btn.setCheckable(True)
     self.hide_game_btn.setChecked(True)
 
@@ -194,167 +271,4 @@ def connect_chat_signals(self):
             pass
         self.send_btn.clicked.connect(self.send_message)
     else:
-        print(
-            "Warning: send_message method not found on self, chat send will not work."
-        )
-
-
-# =========================================
-#         LOBBY INVITE BUTTON HANDLER
-# =========================================
-def connect_lobby_invite(self, user_list_widget):
-    def on_user_selected():
-        selected = user_list_widget.selectedItems()
-        if not selected:
-            self.invite_button.setEnabled(False)
-            return
-        selected_user = (
-            selected[0].text().replace(" (you)", "").replace(" (in room)", "")
-        )
-        # Check if selected user is self or in room
-        if selected_user == self.username:
-            self.invite_button.setEnabled(False)
-            return
-        if "(in room)" in selected[0].text():
-            self.invite_button.setEnabled(False)
-            return
-        # Check if current user is in room
-        for i in range(user_list_widget.count()):
-            item = user_list_widget.item(i)
-            if item.text().startswith(self.username) and "(in room)" in item.text():
-                self.invite_button.setEnabled(False)
-                return
-        self.invite_button.setEnabled(True)
-
-        # Use a closure to always get the current selected user at click time
-        def send_invite():
-            selected = user_list_widget.selectedItems()
-            if not selected:
-                print("[DEBUG] No user selected at click time.")
-                return
-            user = selected[0].text().replace(" (you)", "").replace(" (in room)", "")
-            print(f"[DEBUG] Sending invite to: {user}")
-            import asyncio, json
-
-            asyncio.create_task(
-                self.ws.send(json.dumps({"type": "invite", "to": user}))
-            )
-
-        try:
-            self.invite_button.clicked.disconnect()
-        except TypeError:
-            pass
-        self.invite_button.clicked.connect(send_invite)
-
-    user_list_widget.itemSelectionChanged.connect(on_user_selected)
-
-
-# =========================================
-#         GAME/LOBBY INTEGRATION HELPERS
-# =========================================
-def start_game_session(self, websocket, username, opponent_name):
-    """
-    Helper to transition from lobby/room UI to the game session UI.
-    Should be called when a room is joined with two users (either via invite or open room).
-    """
-    from client import GameClient
-
-    self.game_window = GameClient(
-        self.loop, websocket, username, opponent_name, parent_lobby=self
-    )
-    self.game_window.round = (
-        -2
-    )  # Offset starting round by -2 (will be incremented to 1 on first update)
-    self.game_window._last_round_for_chat = -2
-    self.game_window.show()
-    self.hide()
-    # Do NOT start a new receive_messages coroutine here!
-    # The main handle_ws_messages coroutine will continue to dispatch messages.
-
-
-# =========================================
-#         LOBBY INVITE/ROOM HANDLERS
-# =========================================
-def handle_lobby_message(self, data):
-    """
-    Call this from your lobby/room message handler to process lobby events.
-    Handles: room_joined, invite_received, invite_result, create_room, join_room, leave_room.
-    """
-    msg_type = data.get("type")
-    if msg_type == "room_joined":
-        usernames = data.get("usernames", [])
-        if len(usernames) == 2:
-            # Start game session with the other user
-            opponent = [u for u in usernames if u != self.username][0]
-            self.start_game_session(self.ws, self.username, opponent)
-        else:
-            # Waiting for another player to join the room
-            from PyQt6.QtWidgets import QMessageBox
-
-            QMessageBox.information(
-                None, "Room Created", "Waiting for another player to join..."
-            )
-    elif msg_type == "invite_received":
-        from_user = data.get("from")
-        from PyQt6.QtWidgets import QMessageBox
-
-        reply = QMessageBox.question(
-            None,
-            "Invitation",
-            f"You have been invited by {from_user}! Accept?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-        )
-        if reply == QMessageBox.StandardButton.Yes:
-            asyncio.create_task(
-                self.ws.send(
-                    json.dumps(
-                        {
-                            "type": "invite_response",
-                            "from": from_user,
-                            "accepted": True,
-                        }
-                    )
-                )
-            )
-        else:
-            asyncio.create_task(
-                self.ws.send(
-                    json.dumps(
-                        {
-                            "type": "invite_response",
-                            "from": from_user,
-                            "accepted": False,
-                        }
-                    )
-                )
-            )
-    elif msg_type == "invite_result":
-        from_user = data.get("from")
-        accepted = data.get("accepted")
-        from PyQt6.QtWidgets import QMessageBox
-
-        if accepted:
-            QMessageBox.information(
-                None, "Invite Accepted", f"{from_user} accepted your invitation!"
-            )
-            asyncio.create_task(self.ws.send(json.dumps({"type": "enter_room"})))
-        else:
-            QMessageBox.information(
-                None, "Invite Declined", f"{from_user} declined your invitation."
-            )
-    elif msg_type == "room_left":
-        # Return to lobby UI if user leaves the room/game
-        if hasattr(self, "game_window") and self.game_window:
-            # Add chat notification if the other client disconnected
-            if hasattr(self.game_window, "append_chat_message"):
-                # Ensure the chat window is visible before closing
-                self.game_window.chat_display.append(
-                    '<b><span style="color:#ffcc00;">System:</span></b> <span style="color:#fff;">Your opponent has left or disconnected.</span>'
-                )
-                self.game_window.chat_display.moveCursor(
-                    self.game_window.chat_display.textCursor().End
-                )
-            self.game_window.close()
-            self.game_window = None
-        self.show()
-    # You can add more handlers for create_room, join_room, etc. as needed...
+        log_event(log, logging.WARNING, "send_message_missing")
@@ -1,4 +1,5 @@
 from PyQt6 import QtWidgets
+from PyQt6.QtCore import Qt
 
 
 class NamePrompt(QtWidgets.QDialog):
@@ -14,3 +15,52 @@ class NamePrompt(QtWidgets.QDialog):
 
     def get_name(self):
         return self.input.text().strip()
+
+
+# Non-modal message boxes: they return at once and never run a nested event loop,
+# so server frames keep being processed while one is open.
+# They have no parent, so Python owns them: each is held here until it is answered
+# or closed, else a caller that drops the return value would destroy it at once.
+_OPEN_BOXES = set()
+
+
+def _message_box(icon, title, text, buttons):
+    box = QtWidgets.QMessageBox(icon, title, text, buttons)
+    box.setWindowModality(Qt.WindowModality.NonModal)
+    box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+    _OPEN_BOXES.add(box)
+    box.finished.connect(lambda _result: _OPEN_BOXES.discard(box))
+    return box
+
+
+def show_notice(title, text):
+    box = _message_box(
+        QtWidgets.QMessageBox.Icon.Information,
+        title,
+        text,
+        QtWidgets.QMessageBox.StandardButton.Ok,
+    )
+    box.show()
+    return box
+
+
+def ask(title, text, on_answer):
+    """
+    Yes/No question; on_answer(True/False) is called once, when the user answers.
+    Closing the box any other way (including box.close()) answers No.
+    """
+    yes = QtWidgets.QMessageBox.StandardButton.Yes
+    box = _message_box(
+        QtWidgets.QMessageBox.Icon.Question,
+        title,
+        text,
+        yes | QtWidgets.QMessageBox.StandardButton.No,
+    )
+
+    def finished(_result):
+        clicked = box.clickedButton()
+        on_answer(clicked is not None and box.standardButton(clicked) == yes)
+
+    box.finished.connect(finished)
+    box.show()
+    return box
@@ -5,6 +5,68 @@ import asyncio  # Async event loop
 import websockets  # WebSocket server
 import json  # JSON encoding/decoding
 import uuid  # Unique room IDs
+import os  # Environment-based configuration
+import random  # Spread out reconnects when draining
+import signal  # Shutdown signals for graceful drain
+import logging  # Log levels
+import time  # Connection activity timestamps
+from logpipe import get_logger, log_event  # Queued structured logging
+from backplane import create_backplane  # Cross-node pub/sub link
+from lobby_index import SortedIndex  # Sorted names for paged lobby views
+from profiles import ProfileStore  # Persistent player profiles behind an LRU cache
+from ratings import INITIAL_RATING, elo_update  # Incremental match ratings
+from admin import serve_admin, snapshot_page, page_params  # Local introspection
+
+log = get_logger("server")
+
+# =========================================
+#         SERVER CONFIGURATION
+# =========================================
+SERVER_HOST = os.environ.get("PYBAT_HOST", "localhost")
+SERVER_PORT = int(os.environ.get("PYBAT_PORT", "8765"))
+# Backplane shared by all nodes of one logical lobby, e.g. "tcp://127.0.0.1:8766"
+BACKPLANE_URL = os.environ.get("PYBAT_BACKPLANE", "")
+NODE_ID = os.environ.get("PYBAT_NODE_ID") or uuid.uuid4().hex[:8]
+# Lobby entries sent per page, unless a client asks for fewer
+LOBBY_PAGE_SIZE = int(os.environ.get("PYBAT_LOBBY_PAGE_SIZE", "50"))
+MAX_LOBBY_PAGE_SIZE = 200
+# On shutdown, seconds running matches get to finish before everyone is redirected
+DRAIN_DEADLINE_SECONDS = float(os.environ.get("PYBAT_DRAIN_DEADLINE", "300"))
+# Redirected clients reconnect at a random moment within this many seconds
+DRAIN_RECONNECT_SPREAD = float(os.environ.get("PYBAT_DRAIN_RECONNECT_SPREAD", "10"))
+# Server clients should reconnect to while this one drains (default: same URL)
+DRAIN_REDIRECT_URL = os.environ.get("PYBAT_DRAIN_REDIRECT_URL", "")
+# Rounds always resolve at once; their frames wait up to this long to be flushed
+# together with other rooms' frames (0 sends every round's frames immediately)
+ROUND_TICK_SECONDS = float(os.environ.get("PYBAT_ROUND_TICK", "0.02"))
+# Below this many active rooms the flush tick is skipped and frames go out at once
+ROUND_BATCH_MIN_ROOMS = int(os.environ.get("PYBAT_ROUND_BATCH_MIN_ROOMS", "50"))
+# Lobby changes are broadcast together at most this often (0: each one at once)
+LOBBY_UPDATE_SECONDS = float(os.environ.get("PYBAT_LOBBY_TICK", "0.05"))
+# SQLite file holding player profiles (display name, stats, settings)
+PROFILE_DB_PATH = os.environ.get("PYBAT_PROFILE_DB", "profiles.db")
+# Profiles kept in memory; hot-path reads are served from this cache
+PROFILE_CACHE_SIZE = int(os.environ.get("PYBAT_PROFILE_CACHE_SIZE", "10000"))
+# Seconds changed profiles wait before being written to disk in one batch
+PROFILE_FLUSH_SECONDS = float(os.environ.get("PYBAT_PROFILE_FLUSH", "1.0"))
+MAX_SETTINGS = 32  # Most settings keys a player may store in their profile
+# Local-only admin HTTP/JSON endpoint (always bound to 127.0.0.1); 0 disables it
+ADMIN_PORT = int(os.environ.get("PYBAT_ADMIN_PORT", "8767"))
+ADMIN_HOST = "127.0.0.1"
+# Admission control: connections beyond these limits are told to retry later
+MAX_CONNECTIONS = int(os.environ.get("PYBAT_MAX_CONNECTIONS", "10000"))
+MAX_HANDSHAKES = int(os.environ.get("PYBAT_MAX_HANDSHAKES", "500"))  # Awaiting a name
+HANDSHAKE_TIMEOUT_SECONDS = float(os.environ.get("PYBAT_HANDSHAKE_TIMEOUT", "10"))
+MAX_FRAME_BYTES = int(os.environ.get("PYBAT_MAX_FRAME_BYTES", "65536"))
+# New joins are refused while the event loop runs this many seconds behind
+SHED_LAG_SECONDS = float(os.environ.get("PYBAT_SHED_LAG", "0.2"))
+LAG_SAMPLE_SECONDS = 0.1  # How often the loop lag is measured
+# Refused clients are told to retry after a random delay in this range (seconds)
+SHED_RETRY_MIN = 1.0
+SHED_RETRY_MAX = float(os.environ.get("PYBAT_SHED_RETRY_MAX", "10"))
+# Stamp every frame to a client with the server's send time ("server_ts", epoch
+# seconds), so client latency traces can tell network time from client time
+FRAME_TIMESTAMPS = os.environ.get("PYBAT_FRAME_TIMESTAMPS", "") == "1"
 
 # =========================================
 #         GLOBAL GAME STATE
@@ -16,6 +78,15 @@ submitted_actions = (
 )  # Tracks submitted actions per room: { room_id: { ws: "action" } }
 pending_resets = {}  # Tracks which players in a room have requested reset
 client_counter = 1  # Global counter for assigning default client names
+draining = False  # Set on shutdown: no new rooms, lobby users are redirected
+GAME_ROOM_INDEX = SortedIndex()  # Sorted ids of the rooms in `rooms` (admin paging)
+CONNECTIONS = {}  # Maps local websocket to its ConnectionStats
+CONNECTION_IDS = {}  # Maps connection id to websocket
+CONNECTION_INDEX = SortedIndex()  # Sorted ids of the open connections (admin paging)
+connection_counter = 0  # Last connection id handed out
+profiles = ProfileStore(
+    PROFILE_DB_PATH, cache_size=PROFILE_CACHE_SIZE, flush_interval=PROFILE_FLUSH_SECONDS
+)
 
 # =========================================
 #         GLOBAL LOBBY STATE
@@ -25,268 +96,756 @@ LOBBY = {}  # Maps websocket to username
 OPEN_ROOMS = {}  # Maps room_id to dict: { 'id': room_id, 'users': [usernames] }
 USERS_IN_ROOM = set()  # Set of users currently in a room
 INVITES = {}  # Maps inviter websocket to invitee websocket
+INVITED = {}  # Maps invitee websocket to inviter websocket (reverse of INVITES)
+USER_BY_NAME = {}  # Maps username to its local websocket
+USER_INDEX = SortedIndex()  # Sorted names of every lobby user, local and remote
+ROOM_INDEX = SortedIndex()  # Sorted ids of every open room, local and remote
+# Maps websocket to its lobby view: (prefix, offset, limit, room_offset, room_limit);
+# users and open rooms are paged separately, both filtered by the one prefix
+LOBBY_VIEWS = {}
+LOBBY_SUBSCRIBERS = set()  # Websockets receiving lobby_update (not mid-match)
+LAST_LOBBY_FRAME = {}  # Maps websocket to the last lobby_update it was sent
+LAST_LOBBY_TOTALS = {}  # Maps websocket to the last lobby_totals it was sent
+LOBBY_TOTALS_SECONDS = 1.0  # Lobby size counts are pushed at most this often
+lobby_dirty = False  # Whether the lobby changed since the last broadcast
+lobby_task = None  # Task broadcasting lobby changes once the interval is up
+lobby_totals_dirty = False  # Whether the counts may have changed since the last push
+lobby_totals_task = None  # Task pushing lobby_totals once the interval is up
+DEFAULT_VIEW = ("", 0, LOBBY_PAGE_SIZE, 0, LOBBY_PAGE_SIZE)
+
+# =========================================
+#         GLOBAL CLUSTER STATE
+# =========================================
+backplane = None  # Backplane to the other nodes, or None when running alone
+REMOTE_USERS = {}  # Maps username on another node to { 'node', 'in_room', 'rating' }
+REMOTE_ROOMS = {}  # Maps open room_id on another node to { 'id', 'users', 'node' }
+PEERS = {}  # Maps (node, username) to the RemotePeer standing in for that user here
+REMOTE_SESSIONS = {}  # Maps local websocket to the node hosting its room
+PUBLISHED = {"users": {}, "rooms": {}}  # Local lobby state last sent to the cluster
 
 
 # =========================================
 #         UTILITY FUNCTIONS
 # =========================================
 async def notify_pair_status(room_id):
-    # Notifies both players in a room that the game is ready to update
-    for player in rooms[room_id]["players"]:
-        await player.send(json.dumps({"type": "update"}))
-
-
-async def notify_lobby():
-    if USERS:
-        # Mark users in a room
-        usernames = []
-        for user in USERS:
-            name = LOBBY.get(user, "?")
-            if user in USERS_IN_ROOM:
-                name += " (in room)"
-            usernames.append(name)
-        open_rooms = [r["id"] for r in OPEN_ROOMS.values()]
-        message = json.dumps(
+    # Notifies both players that the match started, with the full initial state
+    await broadcast_state(room_id, full=True)
+
+
+def add_open_room(room_id, usernames):
+    if room_id not in OPEN_ROOMS and room_id not in REMOTE_ROOMS:
+        ROOM_INDEX.add(room_id)
+    OPEN_ROOMS[room_id] = {"id": room_id, "users": usernames}
+
+
+def remove_open_room(room_id):
+    del OPEN_ROOMS[room_id]
+    if room_id not in REMOTE_ROOMS:
+        ROOM_INDEX.discard(room_id)
+
+
+def user_in_room(name):
+    # In-room flag for a lobby entry, whether the user is local or on another node
+    user_ws = USER_BY_NAME.get(name)
+    if user_ws is not None:
+        return user_ws in USERS_IN_ROOM
+    info = REMOTE_USERS.get(name)
+    return bool(info and info["in_room"])
+
+
+def user_rating(name):
+    # Rating shown in the lobby, from the profile cache or cluster index; never
+    # hits disk, so a miss shows the initial rating (record_match reads through)
+    profile = profiles.peek(name)
+    if profile is not None:
+        return profile["rating"]
+    info = REMOTE_USERS.get(name)
+    if info and info.get("rating") is not None:
+        return info["rating"]
+    return INITIAL_RATING
+
+
+def room_users(room_id):
+    room = OPEN_ROOMS.get(room_id) or REMOTE_ROOMS.get(room_id)
+    return list(room["users"]) if room else []
+
+
+def lobby_page(view, in_room):
+    """
+    Build one page of the lobby for a view: (prefix, offset, limit, room_offset,
+    room_limit). Users and open rooms have their own page, so paging through
+    users never hides the rooms. Only what is on the pages (plus whether more
+    follow on each) is included, so users joining or leaving off the page leave
+    it unchanged; the size of the lobby goes out separately, in the throttled
+    lobby_totals frame.
+    """
+    prefix, offset, limit, room_offset, room_limit = view
+    names, total_users = USER_INDEX.page(prefix, offset, limit)
+    room_ids, total_rooms = ROOM_INDEX.page(prefix, room_offset, room_limit)
+    return {
+        "type": "lobby_update",
+        "users": [
             {
-                "type": "lobby_update",
-                "users": usernames,
-                "open_rooms": open_rooms,
+                "name": name,
+                "in_room": user_in_room(name),
+                "rating": round(user_rating(name)),
             }
+            for name in names
+        ],
+        "open_rooms": [
+            {"id": room_id, "users": room_users(room_id)} for room_id in room_ids
+        ],
+        "more": offset + limit < total_users,
+        "more_rooms": room_offset + room_limit < total_rooms,
+        "prefix": prefix,
+        "offset": offset,
+        "limit": limit,
+        "room_offset": room_offset,
+        "room_limit": room_limit,
+        "in_room": in_room,
+    }
+
+
+async def notify_lobby(only=None):
+    """
+    Push the lobby to the clients subscribed to it.
+    A change (only=None) is not broadcast at once: changes are coalesced and one
+    task pushes them at most every LOBBY_UPDATE_SECONDS, so a burst of joins,
+    invites and room changes costs one fan-out and the handler that made the
+    change never waits on it. only=ws sends that one client its page right away
+    (a new subscriber or a new view).
+    """
+    global lobby_dirty, lobby_task
+    if only is not None:
+        if only in LOBBY_SUBSCRIBERS:
+            await send_lobby_pages([only])
+        return
+    if LOBBY_UPDATE_SECONDS <= 0:
+        await broadcast_lobby()
+        return
+    lobby_dirty = True
+    if lobby_task is None or lobby_task.done():
+        lobby_task = asyncio.ensure_future(push_lobby_updates())
+
+
+async def push_lobby_updates():
+    # One broadcast per interval; runs again if the lobby changed during a push
+    global lobby_dirty
+    while lobby_dirty:
+        await asyncio.sleep(LOBBY_UPDATE_SECONDS)
+        lobby_dirty = False
+        await broadcast_lobby()
+
+
+async def broadcast_lobby():
+    sync_cluster()
+    if draining:
+        # Everyone is being redirected; skip the per-disconnect broadcast storm
+        return
+    await send_lobby_pages(LOBBY_SUBSCRIBERS)
+    schedule_lobby_totals()
+
+
+async def send_lobby_pages(targets):
+    """
+    Send each target the page of the lobby it subscribed to.
+    Pages are built and encoded once per distinct view, a client is only sent a
+    frame when its page differs from the last one it received, and all frames
+    are written concurrently. The lobby's size goes out separately (lobby_totals,
+    throttled), except to views that have not had their counts yet.
+    """
+    frames = {}  # Maps (view, in_room) to the encoded lobby_update
+    sends = []
+    fresh = []  # New views, which get their counts at once
+    for user in list(targets):
+        if user not in LAST_LOBBY_TOTALS:
+            fresh.append(user)
+        key = (LOBBY_VIEWS.get(user, DEFAULT_VIEW), user in USERS_IN_ROOM)
+        message = frames.get(key)
+        if message is None:
+            message = frames[key] = json.dumps(lobby_page(*key))
+        if LAST_LOBBY_FRAME.get(user) != message:
+            sends.append(send_lobby_frame(user, message))
+    if sends:
+        await asyncio.gather(*sends)
+    fresh = [user for user in fresh if user in LOBBY_SUBSCRIBERS]
+    if fresh:
+        await send_lobby_totals(fresh)
+
+
+async def send_lobby_frame(user, message):
+    try:
+        await send_message(user, message)
+    except Exception:
+        # Their connection handler finishes the cleanup
+        USERS.discard(user)
+        LOBBY_SUBSCRIBERS.discard(user)
+        return
+    if user in LOBBY_SUBSCRIBERS:  # Not unsubscribed or gone during the send
+        LAST_LOBBY_FRAME[user] = message
+
+
+def lobby_totals(prefix):
+    users_lo, users_hi = USER_INDEX.prefix_range(prefix)
+    rooms_lo, rooms_hi = ROOM_INDEX.prefix_range(prefix)
+    return {
+        "type": "lobby_totals",
+        "prefix": prefix,
+        "total_users": users_hi - users_lo,
+        "total_rooms": rooms_hi - rooms_lo,
+    }
+
+
+async def send_lobby_totals(targets):
+    # Counts of each client's view prefix, built once per prefix, sent if changed
+    frames = {}
+    sends = []
+    for user in list(targets):
+        prefix = LOBBY_VIEWS.get(user, DEFAULT_VIEW)[0]
+        message = frames.get(prefix)
+        if message is None:
+            message = frames[prefix] = json.dumps(lobby_totals(prefix))
+        if LAST_LOBBY_TOTALS.get(user) != message:
+            sends.append(send_lobby_totals_frame(user, message))
+    if sends:
+        await asyncio.gather(*sends)
+
+
+async def send_lobby_totals_frame(user, message):
+    try:
+        await send_message(user, message)
+    except Exception:
+        return  # The connection's handler cleans up
+    if user in LOBBY_SUBSCRIBERS:
+        LAST_LOBBY_TOTALS[user] = message
+
+
+def schedule_lobby_totals():
+    global lobby_totals_dirty, lobby_totals_task
+    lobby_totals_dirty = True
+    if lobby_totals_task is None or lobby_totals_task.done():
+        lobby_totals_task = asyncio.ensure_future(push_lobby_totals())
+
+
+async def push_lobby_totals():
+    # At most one push per interval; runs again if counts changed during a push
+    global lobby_totals_dirty
+    while lobby_totals_dirty:
+        await asyncio.sleep(LOBBY_TOTALS_SECONDS)
+        lobby_totals_dirty = False
+        await send_lobby_totals(LOBBY_SUBSCRIBERS)
+
+
+async def subscribe_lobby(ws):
+    """
+    Start pushing lobby updates to a client that is back in the lobby,
+    beginning with one fresh snapshot of its view.
+    Users on other nodes are (un)subscribed by their own node.
+    """
+    if isinstance(ws, RemotePeer) or ws not in USERS or ws in LOBBY_SUBSCRIBERS:
+        return
+    if draining:
+        # Back in the lobby of a node that is shutting down: send it elsewhere
+        await redirect_user(ws)
+        return
+    LOBBY_SUBSCRIBERS.add(ws)
+    LAST_LOBBY_FRAME.pop(ws, None)
+    LAST_LOBBY_TOTALS.pop(ws, None)
+    await notify_lobby(only=ws)
+
+
+def unsubscribe_lobby(ws):
+    # Stop lobby traffic to a client whose lobby is hidden (e.g. mid-match)
+    LOBBY_SUBSCRIBERS.discard(ws)
+    LAST_LOBBY_FRAME.pop(ws, None)
+    LAST_LOBBY_TOTALS.pop(ws, None)
+
+
+# =========================================
+#         MESSAGE VALIDATION
+# =========================================
+MAX_NAME_LENGTH = 32  # Longest accepted username
+MAX_CHAT_LENGTH = 500  # Longest accepted chat message
+MAX_ROOM_ID_LENGTH = 80  # Longest accepted room id
+ALLOWED_ACTIONS = ("attack", "block", "load")  # Moves a player may submit
+
+
+def field(kind, required=True, max_length=None, choices=None):
+    # Describes one payload field of a message type
+    return {
+        "kind": kind,
+        "required": required,
+        "max_length": max_length,
+        "choices": choices,
+    }
+
+
+def compile_validator(schema):
+    """
+    Turn a message schema into a validator function.
+    Done once at startup so each incoming frame only runs a flat list of checks.
+    The validator returns an error string, or None if the payload is valid.
+    """
+    checks = tuple(
+        (
+            key,
+            rule["kind"],
+            rule["required"],
+            rule["max_length"],
+            frozenset(rule["choices"]) if rule["choices"] else None,
+        )
+        for key, rule in schema.items()
+    )
+
+    def validate(data):
+        for key, kind, required, max_length, choices in checks:
+            value = data.get(key)
+            if value is None:
+                if required:
+                    return f"missing field '{key}'"
+                continue
+            if not isinstance(value, kind):
+                return f"field '{key}' has the wrong type"
+            if max_length is not None and len(value) > max_length:
+                return f"field '{key}' is too long"
+            if choices is not None and value not in choices:
+                return f"field '{key}' has an unknown value"
+        return None
+
+    return validate
+
+
+# =========================================
+#         MESSAGE DISPATCH REGISTRY
+# =========================================
+MESSAGE_HANDLERS = {}  # Maps message type to (handler coroutine, validator)
+# Messages that would start a new room or match; refused while draining
+DRAIN_BLOCKED_TYPES = frozenset(
+    ("create_room", "join_room", "invite", "invite_response", "enter_room", "reset")
+)
+
+
+def message_handler(msg_type, **schema):
+    # Registers a coroutine as the handler for one message type
+    def register(func):
+        MESSAGE_HANDLERS[msg_type] = (func, compile_validator(schema))
+        return func
+
+    return register
+
+
+async def send_error(ws, error):
+    # Tell the client its frame was rejected instead of dropping the connection
+    await send_message(ws, json.dumps({"type": "error", "error": error}))
+
+
+def parse_frame(msg):
+    # Decode a raw frame; returns None if it is not a JSON object
+    try:
+        data = json.loads(msg)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def dispatch(ws, msg):
+    data = parse_frame(msg)
+    if data is None:
+        log_event(log, logging.DEBUG, "malformed_message", sampled=True)
+        await send_error(ws, "malformed message")
+        return
+    log_event(log, logging.DEBUG, "message", sampled=True, type=data.get("type"))
+    entry = MESSAGE_HANDLERS.get(data.get("type"))
+    if entry is None:
+        await send_error(ws, "unknown message type")
+        return
+    func, validate = entry
+    error = validate(data)
+    if error:
+        await send_error(ws, error)
+        return
+    if draining and data["type"] in DRAIN_BLOCKED_TYPES:
+        await send_error(ws, "server is shutting down")
+        return
+    node = remote_owner(ws, data)
+    if node is not None:
+        # The state this message acts on lives on another node
+        backplane.publish(
+            {"event": "forward", "name": LOBBY.get(ws), "message": msg}, to=node
         )
-        # Remove closed websockets before broadcasting
-        to_remove = set()
-        for user in USERS:
-            try:
-                await user.send(message)
-            except Exception:
-                to_remove.add(user)
-        for user in to_remove:
-            USERS.discard(user)
-            LOBBY.pop(user, None)
+        return
+    if data["type"] in ROOM_MESSAGE_TYPES:
+        actor = ROOM_ACTORS.get(players[ws].get("room"))
+        if actor is not None:
+            # Queued for the room's own task; waits only if its inbox is full
+            await actor.post(func, ws, data)
+            return
+    await run_handler(func, ws, data)
+
+
+async def run_handler(func, ws, data):
+    try:
+        await func(ws, data)
+    except websockets.ConnectionClosed as e:
+        target = getattr(e, "target", ws)
+        if target is ws:
+            raise  # The sender's own connection: its handler cleans up
+        # A peer the handler was sending to (invitee, opponent) is gone: only
+        # that peer is torn down, the sender carries on
+        log_event(log, logging.INFO, "peer_closed", type=data.get("type"))
+        await disconnect_user(target)
+    except Exception:
+        log.exception("handler_failed", extra={"fields": {"type": data.get("type")}})
+        await send_error(ws, "could not process message")
 
 
 # =========================================
 #         MESSAGE HANDLER
 # =========================================
-async def handle_message(ws, data):
+def assign_name(name):
+    # Use the chosen name, or hand out a default client name if it is blank
     global client_counter
-    if data["type"] == "name":
-        # Client sent their chosen name; store it or assign default
-        name = data.get("name", None)
-        if name and name.strip():
-            players[ws]["name"] = name.strip()
-        else:
-            players[ws]["name"] = f"client{client_counter}"
-            await ws.send(
-                json.dumps({"type": "lobby_joined", "name": players[ws]["name"]})
-            )
-            client_counter += 1
-    elif data["type"] == "submit":
-        room_id = players[ws].get("room")
-        if not room_id or room_id not in rooms:
-            return
-        action = data["action"]
-        submitted_actions.setdefault(room_id, {})[ws] = action
-        if len(submitted_actions[room_id]) == 2:
-            await process_round(room_id)
-    elif data["type"] == "reset":
-        room_id = players[ws].get("room")
-        if not room_id or room_id not in rooms:
-            return
-        if room_id not in pending_resets:
-            pending_resets[room_id] = set()
-        pending_resets[room_id].add(ws)
-        if (
-            room_id in rooms
-            and len(rooms[room_id]["players"]) == 2
-            and len(pending_resets[room_id]) == 2
-        ):
-            for player in rooms[room_id]["players"]:
-                players[player]["hp"] = 3
-                players[player]["loaded"] = False
-            rooms[room_id][
-                "round"
-            ] = -1  # Offset round to -1 so broadcast_state sends round 1
-            submitted_actions[room_id] = {}
-            pending_resets[room_id] = set()
-            await broadcast_state(room_id)
-        else:
-            await ws.send(json.dumps({"type": "waiting_for_reset"}))
-    elif data["type"] == "chat":
-        room_id = players[ws].get("room")
-        if not room_id or room_id not in rooms:
-            return
-        sender_name = players[ws].get("name", "Player")
-        message = data["message"]
+    if isinstance(name, str) and name.strip():
+        return name.strip()[:MAX_NAME_LENGTH], False
+    name = f"client{client_counter}"
+    client_counter += 1
+    return name, True
+
+
+@message_handler("submit", action=field(str, choices=ALLOWED_ACTIONS))
+async def handle_submit(ws, data):
+    room_id = players[ws].get("room")
+    if not room_id or room_id not in rooms:
+        return
+    submitted_actions.setdefault(room_id, {})[ws] = data["action"]
+    if len(submitted_actions[room_id]) == 2:
+        # Both actions are in: the round is resolved now, only its frames are batched
+        await queue_frames(resolve_round(room_id))
+
+
+@message_handler("reset")
+async def handle_reset(ws, data):
+    room_id = players[ws].get("room")
+    if not room_id or room_id not in rooms:
+        return
+    if room_id not in pending_resets:
+        pending_resets[room_id] = set()
+    pending_resets[room_id].add(ws)
+    if (
+        room_id in rooms
+        and len(rooms[room_id]["players"]) == 2
+        and len(pending_resets[room_id]) == 2
+    ):
         for player in rooms[room_id]["players"]:
-            if player != ws:
-                await player.send(
-                    json.dumps(
-                        {"type": "chat", "sender": sender_name, "message": message}
-                    )
-                )
+            players[player]["hp"] = 3
+            players[player]["loaded"] = False
+        rooms[room_id][
+            "round"
+        ] = -1  # Offset round to -1 so broadcast_state sends round 1
+        submitted_actions[room_id] = {}
+        pending_resets[room_id] = set()
+        await broadcast_state(room_id, full=True)
+    else:
+        await send_message(ws, json.dumps({"type": "waiting_for_reset"}))
+
+
+@message_handler("chat", message=field(str, max_length=MAX_CHAT_LENGTH))
+async def handle_chat(ws, data):
+    room_id = players[ws].get("room")
+    if not room_id or room_id not in rooms:
+        return
+    sender_name = display_name(ws, "Player")
+    message = data["message"]
+    for player in rooms[room_id]["players"]:
+        if player != ws:
+            await send_message(
+                player,
+                json.dumps({"type": "chat", "sender": sender_name, "message": message})
+            )
 
 
 # =========================================
 #         MESSAGE HANDLER (LOBBY)
 # =========================================
-async def handle_lobby_message(ws, data):
-    global INVITES
-    if data.get("type") == "create_room":
-        # Prevent user from creating more than one open room or being in multiple rooms
-        if ws in USERS_IN_ROOM:
-            # Already in a room, ignore request
+@message_handler("create_room")
+async def handle_create_room(ws, data):
+    # Prevent user from creating more than one open room or being in multiple rooms
+    if ws in USERS_IN_ROOM:
+        # Already in a room, ignore request
+        return
+    for room in OPEN_ROOMS.values():
+        if LOBBY[ws] in room["users"]:
+            # Already has an open room, ignore request
             return
-        for room in OPEN_ROOMS.values():
-            if LOBBY[ws] in room["users"]:
-                # Already has an open room, ignore request
-                return
-        room_id = f"{LOBBY[ws]}'s room"
-        OPEN_ROOMS[room_id] = {"id": room_id, "users": [LOBBY[ws]]}
+    room_id = f"{LOBBY[ws]}'s room"
+    add_open_room(room_id, [LOBBY[ws]])
+    USERS_IN_ROOM.add(ws)
+    await send_message(
+        ws, json.dumps({"type": "room_joined", "usernames": [LOBBY[ws]]})
+    )
+    await notify_lobby()
+
+
+@message_handler("join_room", room_id=field(str, max_length=MAX_ROOM_ID_LENGTH))
+async def handle_join_room(ws, data):
+    # Prevent user from joining if already in a room
+    if ws in USERS_IN_ROOM:
+        return
+    room_id = data["room_id"]
+    room = OPEN_ROOMS.get(room_id)
+    if room and len(room["users"]) == 1:
+        # Find the websocket of the room creator
+        creator_ws = find_lobby_user(room["users"][0])
+        if creator_ws is None:
+            return
+        room["users"].append(LOBBY[ws])
         USERS_IN_ROOM.add(ws)
-        await ws.send(json.dumps({"type": "room_joined", "usernames": [LOBBY[ws]]}))
+        USERS_IN_ROOM.add(creator_ws)
+        usernames = room["users"]
+        # Notify both clients that they have joined the room
+        await send_message(
+            ws, json.dumps({"type": "room_joined", "usernames": usernames})
+        )
+        await send_message(
+            creator_ws,
+            json.dumps({"type": "room_joined", "usernames": usernames})
+        )
         await notify_lobby()
-    elif data.get("type") == "join_room":
-        # Prevent user from joining if already in a room
-        if ws in USERS_IN_ROOM:
-            return
-        room_id = data.get("room_id")
-        room = OPEN_ROOMS.get(room_id)
-        if room and len(room["users"]) == 1:
-            room["users"].append(LOBBY[ws])
-            # Find the websocket of the room creator
-            creator_ws = None
-            for w, name in LOBBY.items():
-                if name == room["users"][0]:
-                    creator_ws = w
-                    break
-            USERS_IN_ROOM.add(ws)
-            USERS_IN_ROOM.add(creator_ws)
-            usernames = room["users"]
-            # Notify both clients that they have joined the room
-            await ws.send(json.dumps({"type": "room_joined", "usernames": usernames}))
-            await creator_ws.send(
-                json.dumps({"type": "room_joined", "usernames": usernames})
-            )
-            await notify_lobby()
-    elif data.get("type") == "leave_room":
-        name = LOBBY.get(ws)
-        USERS_IN_ROOM.discard(ws)
-        # Remove user from any open room
-        for room_id, room in list(OPEN_ROOMS.items()):
-            if name in room["users"]:
-                room["users"].remove(name)
-                if not room["users"]:
-                    del OPEN_ROOMS[room_id]
-        # --- Notify the other player in a game room, if any ---
-        user_room = players.get(ws, {}).get("room")
-        if user_room and user_room in rooms:
-            other_players = [p for p in rooms[user_room]["players"] if p != ws]
-            for other in other_players:
-                try:
-                    await other.send(json.dumps({"type": "room_left"}))
-                    USERS_IN_ROOM.discard(
-                        other
-                    )  # Remove the other player from USERS_IN_ROOM
-                    if other in players:
-                        players[other]["room"] = None
-                except Exception:
-                    pass
-            del rooms[user_room]
-        if ws in players:
-            players[ws]["room"] = None
-        await ws.send(json.dumps({"type": "room_left"}))
+
+
+@message_handler("leave_room")
+async def handle_leave_room(ws, data):
+    USERS_IN_ROOM.discard(ws)
+    leave_open_rooms(LOBBY.get(ws))
+    await end_game_room(players[ws].get("room"), ws)
+    await send_message(ws, json.dumps({"type": "room_left"}))
+    await subscribe_lobby(ws)
+    await notify_lobby()
+
+
+@message_handler("invite", to=field(str, max_length=MAX_NAME_LENGTH))
+async def handle_invite(ws, data):
+    # Only allow one invite at a time per user
+    to_name = data["to"]
+    from_name = LOBBY.get(ws)
+    if not to_name or not from_name:
+        return
+    # Find the websocket for the invitee (or the peer for a user on another node)
+    to_ws = find_user(to_name)
+    if not to_ws or to_ws in INVITED or ws in INVITES:
+        # Already invited or has a pending invite
+        return
+    open_invite(ws, to_ws)
+    await send_message(
+        to_ws, json.dumps({"type": "invite_received", "from": from_name})
+    )
+
+
+@message_handler(
+    "invite_response",
+    **{
+        "from": field(str, max_length=MAX_NAME_LENGTH),
+        "accepted": field(bool),
+    },
+)
+async def handle_invite_response(ws, data):
+    from_name = data["from"]
+    accepted = data["accepted"]
+    inviter_ws = find_lobby_user(from_name)
+    if not inviter_ws or INVITES.get(inviter_ws) is not ws:
+        # No pending invite from that user to this one
+        return
+    # Notify inviter of result
+    await send_message(
+        inviter_ws,
+        json.dumps(
+            {"type": "invite_result", "from": LOBBY.get(ws), "accepted": accepted}
+        )
+    )
+    if accepted:
+        # Create a room for both users
+        room_id = f"{from_name} vs {LOBBY.get(ws)}"
+        add_open_room(room_id, [from_name, LOBBY.get(ws)])
+        USERS_IN_ROOM.add(inviter_ws)
+        USERS_IN_ROOM.add(ws)
+        await send_message(
+            inviter_ws,
+            json.dumps({"type": "room_joined", "usernames": [from_name, LOBBY.get(ws)]})
+        )
+        await send_message(
+            ws,
+            json.dumps({"type": "room_joined", "usernames": [from_name, LOBBY.get(ws)]})
+        )
         await notify_lobby()
-    elif data.get("type") == "invite":
-        # Only allow one invite at a time per user
-        to_name = data.get("to")
-        from_name = LOBBY.get(ws)
-        if not to_name or not from_name:
-            return
-        # Find the websocket for the invitee
-        to_ws = None
-        for user_ws, name in LOBBY.items():
-            if name == to_name:
-                to_ws = user_ws
-                break
-        if not to_ws or to_ws in INVITES.values() or ws in INVITES:
-            # Already invited or has a pending invite
-            return
-        INVITES[ws] = to_ws
-        await to_ws.send(json.dumps({"type": "invite_received", "from": from_name}))
-    elif data.get("type") == "invite_response":
-        from_name = data.get("from")
-        accepted = data.get("accepted")
-        # Find inviter websocket
-        inviter_ws = None
-        for user_ws, name in LOBBY.items():
-            if name == from_name:
-                inviter_ws = user_ws
-                break
-        if not inviter_ws or inviter_ws not in INVITES:
+    close_invite(inviter_ws)
+    await notify_lobby()
+
+
+@message_handler("enter_room")
+async def handle_enter_room(ws, data):
+    # This is sent by the inviter after invite is accepted, to trigger game session
+    # Find the open room with both users
+    inviter_name = LOBBY.get(ws)
+    for room_id, room in list(OPEN_ROOMS.items()):
+        if inviter_name in room["users"] and len(room["users"]) == 2:
+            # Create a game session for both users
+            user_names = room["users"]
+            ws1 = find_lobby_user(user_names[0])
+            ws2 = find_lobby_user(user_names[1])
+            if ws1 and ws2:
+                room_uuid = open_game_room(ws1, ws2)
+                # Remove from open rooms
+                remove_open_room(room_id)
+                # Players mid-match get no lobby traffic until they leave the room
+                unsubscribe_lobby(ws1)
+                unsubscribe_lobby(ws2)
+                await notify_lobby()
+                await notify_pair_status(room_uuid)
+            break
+
+
+@message_handler(
+    "lobby_view",
+    prefix=field(str, required=False, max_length=MAX_NAME_LENGTH),
+    offset=field(int, required=False),
+    limit=field(int, required=False),
+    room_offset=field(int, required=False),
+    room_limit=field(int, required=False),
+)
+async def handle_lobby_view(ws, data):
+    # Subscribe to one page / prefix filter of the lobby; only that view is pushed
+    LOBBY_VIEWS[ws] = (
+        data.get("prefix") or "",
+        *page_bounds(data.get("offset"), data.get("limit")),
+        *page_bounds(data.get("room_offset"), data.get("room_limit")),
+    )
+    LAST_LOBBY_TOTALS.pop(ws, None)  # Counts of the new view are sent with its page
+    await notify_lobby(only=ws)
+
+
+def page_bounds(offset, limit):
+    offset = max(0, offset or 0)
+    return offset, min(max(1, limit or LOBBY_PAGE_SIZE), MAX_LOBBY_PAGE_SIZE)
+
+
+@message_handler("lobby_subscribe")
+async def handle_lobby_subscribe(ws, data):
+    await subscribe_lobby(ws)
+
+
+@message_handler("lobby_unsubscribe")
+async def handle_lobby_unsubscribe(ws, data):
+    unsubscribe_lobby(ws)
+
+
+@message_handler("get_profile")
+async def handle_get_profile(ws, data):
+    profile = await profiles.load(LOBBY[ws])
+    await send_message(ws, json.dumps({"type": "profile", **profile}))
+
+
+@message_handler(
+    "update_profile",
+    display_name=field(str, required=False, max_length=MAX_NAME_LENGTH),
+    settings=field(dict, required=False, max_length=MAX_SETTINGS),
+)
+async def handle_update_profile(ws, data):
+    name = LOBBY[ws]
+    profile = await profiles.load(name)
+    changes = {}
+    display = (data.get("display_name") or "").strip()
+    if display:
+        changes["display_name"] = display
+    if data.get("settings") is not None:
+        settings = dict(profile["settings"])
+        settings.update(data["settings"])
+        if len(settings) > MAX_SETTINGS:
+            await send_error(ws, "too many settings")
             return
-        invitee_ws = INVITES[inviter_ws]
-        # Notify inviter of result
-        await inviter_ws.send(
-            json.dumps(
-                {"type": "invite_result", "from": LOBBY.get(ws), "accepted": accepted}
-            )
+        changes["settings"] = settings
+    profile = profiles.update(name, **changes)
+    await send_message(ws, json.dumps({"type": "profile", **profile}))
+
+
+# =========================================
+#         OUTGOING FRAMES
+# =========================================
+class ConnectionStats:
+    # Traffic counters of one local connection, shown by the admin endpoint
+    __slots__ = (
+        "id",
+        "address",
+        "connected_at",
+        "last_activity",
+        "bytes_in",
+        "bytes_out",
+        "frames_in",
+        "frames_out",
+    )
+
+    def __init__(self, conn_id, address):
+        self.id = conn_id
+        self.address = address
+        self.connected_at = self.last_activity = time.time()
+        self.bytes_in = self.bytes_out = self.frames_in = self.frames_out = 0
+
+
+async def send_message(ws, message):
+    # Every frame to a client goes through here, so its traffic is counted
+    stats = CONNECTIONS.get(ws)
+    if stats is not None:
+        stats.bytes_out += len(message)
+        stats.frames_out += 1
+        stats.last_activity = time.time()
+    if FRAME_TIMESTAMPS and message.startswith('{"'):
+        # Spliced into the encoded frame: no re-encoding per recipient
+        message = f'{{"server_ts": {time.time():.6f}, {message[1:]}'
+    try:
+        await ws.send(message)
+    except websockets.ConnectionClosed as e:
+        e.target = ws  # Whose connection it was: run_handler tells sender from peer
+        raise
+
+
+async def send_frames(ws, messages):
+    # Send one player's frames in order; a dead socket only loses its own frames
+    try:
+        for message in messages:
+            await send_message(ws, message)
+    except Exception:
+        pass
+
+
+async def flush_frames(frames):
+    """
+    Send a batch of (websocket, payload) frames.
+    Payloads are encoded once each (identical dicts share one string), frames are
+    grouped per websocket to keep their order, and all sockets are written together.
+    """
+    encoded = {}
+    outgoing = {}
+    for ws, payload in frames:
+        key = id(payload)
+        if key not in encoded:
+            encoded[key] = json.dumps(payload)
+        outgoing.setdefault(ws, []).append(encoded[key])
+    if len(outgoing) == 1:
+        ws, messages = outgoing.popitem()
+        await send_frames(ws, messages)
+    elif outgoing:
+        await asyncio.gather(
+            *(send_frames(ws, messages) for ws, messages in outgoing.items())
         )
-        if accepted:
-            # Create a room for both users
-            room_id = f"{from_name} vs {LOBBY.get(ws)}"
-            OPEN_ROOMS[room_id] = {"id": room_id, "users": [from_name, LOBBY.get(ws)]}
-            USERS_IN_ROOM.add(inviter_ws)
-            USERS_IN_ROOM.add(ws)
-            await inviter_ws.send(
-                json.dumps(
-                    {"type": "room_joined", "usernames": [from_name, LOBBY.get(ws)]}
-                )
-            )
-            await ws.send(
-                json.dumps(
-                    {"type": "room_joined", "usernames": [from_name, LOBBY.get(ws)]}
-                )
-            )
-            await notify_lobby()
-        INVITES.pop(inviter_ws, None)
-        await notify_lobby()
-    elif data.get("type") == "enter_room":
-        # This is sent by the inviter after invite is accepted, to trigger game session
-        # Find the open room with both users
-        inviter_name = LOBBY.get(ws)
-        for room_id, room in list(OPEN_ROOMS.items()):
-            if inviter_name in room["users"] and len(room["users"]) == 2:
-                # Create a game session for both users
-                user_names = room["users"]
-                ws1 = None
-                ws2 = None
-                for user_ws, name in LOBBY.items():
-                    if name == user_names[0]:
-                        ws1 = user_ws
-                    elif name == user_names[1]:
-                        ws2 = user_ws
-                if ws1 and ws2:
-                    # Set up the game room
-                    room_uuid = str(uuid.uuid4())
-                    rooms[room_uuid] = {"players": [ws1, ws2], "round": 0}
-                    players[ws1]["room"] = room_uuid
-                    players[ws2]["room"] = room_uuid
-                    players[ws1]["hp"] = 3
-                    players[ws2]["hp"] = 3
-                    players[ws1]["loaded"] = False
-                    players[ws2]["loaded"] = False
-                    # Remove from open rooms
-                    del OPEN_ROOMS[room_id]
-                    await notify_lobby()
-                    await notify_pair_status(room_uuid)
-                break
 
 
 # =========================================
 #         ROUND RESOLUTION
 # =========================================
-async def process_round(room_id):
+def resolve_round(room_id):
+    """
+    Apply both submitted actions to the room and return the frames to send.
+    Pure state change: nothing is awaited, so many rooms can be resolved in one go.
+    """
     actions = submitted_actions[room_id]
     players_list = rooms[room_id]["players"]
     a_ws, b_ws = players_list
@@ -309,135 +868,1003 @@ async def process_round(room_id):
     resolve(b, a, b_action, a_action)
     if "round" in rooms[room_id]:
         rooms[room_id]["round"] += 1
+    submitted_actions[room_id] = {}
+    winner = None  # Stays None for a draw: both knocked out in the same round
+    game_over = a["hp"] <= 0 or b["hp"] <= 0
+    if game_over:
+        if a["hp"] > 0:
+            winner = a["name"]
+        elif b["hp"] > 0:
+            winner = b["name"]
+        schedule_record_match(a_ws, b_ws, winner)
+    # One round_result frame per player: both actions, the state delta, the outcome
+    frames = []
     for ws, my_action, opp_action in [
         (a_ws, a_action, b_action),
         (b_ws, b_action, a_action),
     ]:
-        await ws.send(
-            json.dumps(
-                {
-                    "type": "actions",
-                    "your_action": my_action,
-                    "opponent_action": opp_action,
-                }
-            )
+        _, update = state_frame(room_id, ws)
+        del update["type"]
+        payload = {
+            "type": "round_result",
+            "your_action": my_action,
+            "opponent_action": opp_action,
+            "update": update,
+        }
+        if game_over:
+            payload["winner"] = winner
+        frames.append((ws, payload))
+    return frames
+
+
+MATCH_RECORDS = set()  # record_match tasks still reading ratings
+
+
+def schedule_record_match(a_ws, b_ws, winner):
+    # resolve_round awaits nothing, so the match is recorded on its own task
+    task = asyncio.ensure_future(
+        record_match(
+            (players[a_ws]["name"], home_node(a_ws)),
+            (players[b_ws]["name"], home_node(b_ws)),
+            winner,
         )
-    submitted_actions[room_id] = {}
-    await broadcast_state(room_id)
-    for player in players_list:
-        if players[player]["hp"] <= 0:
-            winner = (
-                players[a_ws]["name"]
-                if players[a_ws]["hp"] > 0
-                else players[b_ws]["name"]
+    )
+    MATCH_RECORDS.add(task)
+    task.add_done_callback(MATCH_RECORDS.discard)
+
+
+def home_node(ws):
+    # Node holding a player's profile: None for this node's own users
+    return ws.node if isinstance(ws, RemotePeer) else None
+
+
+async def match_rating(name, node):
+    if node is None:
+        return (await profiles.load(name))["rating"]  # Read through on a cache miss
+    info = REMOTE_USERS.get(name)
+    if info and info.get("rating") is not None:
+        return info["rating"]
+    return INITIAL_RATING
+
+
+async def record_match(a, b, winner):
+    """
+    Count a finished match and move both ratings (written to disk later, in a batch).
+    a and b are (name, home node); winner is a name, or None for a draw.
+    A player from another node has the result applied by their own node, which
+    holds their profile: only the rating change is sent there.
+    """
+    (a_name, _), (b_name, _) = a, b
+    ratings = [await match_rating(name, node) for name, node in (a, b)]
+    score_a = 0.5 if winner is None else 1.0 if winner == a_name else 0.0
+    new_ratings = elo_update(ratings[0], ratings[1], score_a)
+    for (name, node), old, new in zip((a, b), ratings, new_ratings):
+        if winner is None:
+            result = "draws"
+        else:
+            result = "wins" if name == winner else "losses"
+        stats = {"matches": 1, result: 1}
+        if node is None:
+            profiles.update(name, stats=stats, rating=new)
+        elif backplane is not None:
+            backplane.publish(
+                {
+                    "event": "match_result",
+                    "name": name,
+                    "stats": stats,
+                    "rating_change": new - old,
+                    "match": [a_name, b_name, winner],
+                },
+                to=node,
             )
-            for p in players_list:
-                await p.send(json.dumps({"type": "game_over", "winner": winner}))
+    profiles.log_match(a_name, b_name, winner)
+
+
+# =========================================
+#         ROUND TICK (BATCHED FLUSH)
+# =========================================
+PENDING_FRAMES = []  # Game frames from room actors, waiting for the next tick
+round_tick_task = None  # Task that flushes PENDING_FRAMES on the next tick
+
+
+async def queue_frames(frames):
+    """
+    Send game frames from a room actor.
+    Under load they join the current tick's batch, so many rooms share one flush;
+    when the server is quiet (or ticking is disabled) they are sent right away.
+    Frames queued earlier always go out first, so per-player order is kept.
+    """
+    global round_tick_task
+    if not PENDING_FRAMES and (
+        ROUND_TICK_SECONDS <= 0 or len(rooms) < ROUND_BATCH_MIN_ROOMS
+    ):
+        await flush_frames(frames)
+        return
+    PENDING_FRAMES.extend(frames)
+    if round_tick_task is None or round_tick_task.done():
+        round_tick_task = asyncio.create_task(round_tick())
+
+
+async def round_tick():
+    # Wait out one tick, then flush every room's frames at once. Frames queued
+    # while a flush is in flight go out on the next tick of this same task: the
+    # task only ends once nothing is pending, so queue_frames never strands any.
+    while PENDING_FRAMES:
+        await asyncio.sleep(ROUND_TICK_SECONDS)
+        frames = PENDING_FRAMES[:]
+        PENDING_FRAMES.clear()
+        await flush_frames(frames)
+
+
+# =========================================
+#         ROOM ACTORS
+# =========================================
+# Messages that act on a game room; they run on that room's actor task
+ROOM_MESSAGE_TYPES = frozenset(("submit", "reset", "chat", "resync"))
+ROOM_INBOX_SIZE = 64  # Messages a room queues before senders have to wait
+ROOM_ACTORS = {}  # Maps room_id to its RoomActor
+
+
+class RoomActor:
+    """
+    Runs one game room as its own task.
+    Messages for the room are queued in its inbox and handled strictly one at a
+    time, so nothing else changes the room while a handler awaits a send.
+    A room is a self-contained unit: it can be throttled, batched or handed to
+    another process without touching the connection handlers.
+    """
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.inbox = asyncio.Queue(ROOM_INBOX_SIZE)
+        self.stopping = False  # Set when the room ends from one of its own handlers
+        self.task = asyncio.create_task(self.run())
+
+    async def post(self, func, ws, data):
+        if not self.task.done():
+            await self.inbox.put((func, ws, data))
+
+    async def run(self):
+        try:
+            while not self.stopping:
+                item = await self.inbox.get()
+                if item is None:
+                    return
+                func, ws, data = item
+                # Skip messages from players who left the room while they were queued
+                if players.get(ws, {}).get("room") != self.room_id:
+                    continue
+                try:
+                    await run_handler(func, ws, data)
+                except websockets.ConnectionClosed:
+                    pass  # The connection's own handler cleans up
+        finally:
+            # Nothing reads the inbox any more: free it so no sender waits on it
+            while not self.inbox.empty():
+                self.inbox.get_nowait()
+
+    async def stop(self):
+        if asyncio.current_task() is self.task:
+            # Ended by one of this room's own handlers (a peer's socket closed
+            # mid-send): it cannot wait for space in its own inbox, so the task
+            # stops after the current message and drops the rest (room is gone)
+            self.stopping = True
+            return
+        if self.task.done():
             return
+        # Finish the messages already queued, then end the task
+        await self.inbox.put(None)
+        await self.task
 
 
 # =========================================
 #         BROADCAST GAME STATE
 # =========================================
-async def broadcast_state(room_id):
-    if "round" not in rooms[room_id]:
-        rooms[room_id]["round"] = -2
-    round_number = rooms[room_id]["round"] + 1
-    players_list = rooms[room_id]["players"]
-    if len(players_list) == 2:
-        name_a = players[players_list[0]].get("name", "Player1")
-        name_b = players[players_list[1]].get("name", "Player2")
+STATE_FIELDS = ("hp", "opponent_hp", "loaded", "opponent_loaded", "round")
+
+
+def state_frame(room_id, player, full=False):
+    """
+    Build the next versioned update for one player.
+    Each update carries a per-player sequence number. A full update (match start,
+    reset, resync) carries every field plus the names; otherwise only the fields
+    that changed since the last update sent to that player are included.
+    """
+    room = rooms[room_id]
+    if "round" not in room:
+        room["round"] = -2
+    opponent = [p for p in room["players"] if p != player][0]
+    state = {
+        "hp": players[player]["hp"],
+        "opponent_hp": players[opponent]["hp"],
+        "loaded": players[player]["loaded"],
+        "opponent_loaded": players[opponent]["loaded"],
+        "round": room["round"] + 1,
+    }
+    session = players[player]
+    session["seq"] = session.get("seq", 0) + 1
+    last = session.get("sent_state")
+    payload = {"type": "update", "seq": session["seq"]}
+    if full or last is None:
+        payload["full"] = True
+        payload.update(state)
+        # Names never change during a match, so they only go out with full updates
+        payload["your_name"] = display_name(player, "Player")
+        payload["opponent_name"] = display_name(opponent, "Enemy")
     else:
-        name_a = name_b = "Player"
-    for player in rooms[room_id]["players"]:
-        opponent = [p for p in rooms[room_id]["players"] if p != player][0]
-        your_name = players[player].get("name", "Player")
-        opponent_name = players[opponent].get("name", "Enemy")
-        await player.send(
-            json.dumps(
-                {
-                    "type": "update",
-                    "hp": players[player]["hp"],
-                    "opponent_hp": players[opponent]["hp"],
-                    "loaded": players[player]["loaded"],
-                    "opponent_loaded": players[opponent]["loaded"],
-                    "round": round_number,
-                    "your_name": your_name,
-                    "opponent_name": opponent_name,
-                }
+        for key in STATE_FIELDS:
+            if last[key] != state[key]:
+                payload[key] = state[key]
+    session["sent_state"] = state
+    return player, payload
+
+
+def display_name(ws, default):
+    # Profile display name from the cache, falling back to the login name
+    name = players[ws].get("name")
+    if name is None:
+        return default
+    profile = profiles.peek(name)
+    return profile["display_name"] if profile else name
+
+
+def state_frames(room_id, full=False):
+    return [state_frame(room_id, player, full) for player in rooms[room_id]["players"]]
+
+
+async def broadcast_state(room_id, full=False):
+    await queue_frames(state_frames(room_id, full))
+
+
+@message_handler("resync")
+async def handle_resync(ws, data):
+    # Client saw a gap in update sequence numbers: send it the full state again
+    room_id = players[ws].get("room")
+    if not room_id or room_id not in rooms or len(rooms[room_id]["players"]) != 2:
+        return
+    await queue_frames([state_frame(room_id, ws, full=True)])
+
+
+# =========================================
+#         CLUSTER (BACKPLANE)
+# =========================================
+HOSTED_MESSAGE_TYPES = (
+    "submit",
+    "reset",
+    "chat",
+    "leave_room",
+    "enter_room",
+    "resync",
+)
+
+
+class RemotePeer:
+    """
+    Stands in for a user connected to another node.
+    It is stored wherever a websocket would be (LOBBY, players, rooms, INVITES),
+    and send() delivers the frame to the user's own node through the backplane.
+    """
+
+    def __init__(self, node, name):
+        self.node = node
+        self.name = name
+        self.hosted = False  # Whether the user's node knows this node hosts its room
+
+    async def send(self, message):
+        if backplane is not None:
+            backplane.publish(
+                {"event": "deliver", "name": self.name, "message": message},
+                to=self.node,
             )
-        )
+
+
+def find_local_user(name):
+    return USER_BY_NAME.get(name)
+
+
+def set_remote_user(node, name, in_room, rating=None):
+    if name not in REMOTE_USERS:
+        USER_INDEX.add(name)
+    REMOTE_USERS[name] = {"node": node, "in_room": in_room, "rating": rating}
+
+
+def remove_remote_user(name):
+    if REMOTE_USERS.pop(name, None) is not None:
+        USER_INDEX.discard(name)
+
+
+def set_remote_room(node, room_id, usernames):
+    if room_id not in REMOTE_ROOMS and room_id not in OPEN_ROOMS:
+        ROOM_INDEX.add(room_id)
+    REMOTE_ROOMS[room_id] = {"id": room_id, "users": usernames, "node": node}
+
+
+def remove_remote_room(room_id):
+    if REMOTE_ROOMS.pop(room_id, None) is not None and room_id not in OPEN_ROOMS:
+        ROOM_INDEX.discard(room_id)
+
+
+def find_lobby_user(name):
+    # Local websocket or existing peer in LOBBY for a name (by lookup, not a scan)
+    user_ws = USER_BY_NAME.get(name)
+    if user_ws is None:
+        info = REMOTE_USERS.get(name)
+        if info is not None:
+            user_ws = PEERS.get((info["node"], name))
+    return user_ws
+
+
+def find_user(name):
+    # Local websocket or existing peer first, then a peer for a user on another node
+    user_ws = find_lobby_user(name)
+    if user_ws is not None:
+        return user_ws
+    info = REMOTE_USERS.get(name)
+    if info is not None:
+        return get_peer(info["node"], name)
+    return None
+
+
+def get_peer(node, name):
+    peer = PEERS.get((node, name))
+    if peer is None:
+        peer = PEERS[(node, name)] = RemotePeer(node, name)
+        LOBBY[peer] = name
+        players[peer] = new_player(name)
+    return peer
+
+
+def remote_owner(ws, data):
+    # Returns the node that owns the state a client message acts on, or None if local
+    if backplane is None or isinstance(ws, RemotePeer):
+        return None
+    msg_type = data["type"]
+    if msg_type in HOSTED_MESSAGE_TYPES and ws in REMOTE_SESSIONS:
+        return REMOTE_SESSIONS[ws]
+    if msg_type == "join_room" and data["room_id"] in REMOTE_ROOMS:
+        return REMOTE_ROOMS[data["room_id"]]["node"]
+    if msg_type == "invite_response" and find_local_user(data["from"]) is None:
+        info = REMOTE_USERS.get(data["from"])
+        return info["node"] if info else None
+    return None
+
+
+def sync_cluster():
+    """
+    Publish what changed in this node's part of the lobby since the last call.
+    Only deltas go over the backplane; full state is sent once to nodes that say hello.
+    """
+    if backplane is None:
+        return
+    users = {
+        LOBBY[ws]: (ws in USERS_IN_ROOM, round(user_rating(LOBBY[ws])))
+        for ws in USERS
+        if ws in LOBBY
+    }
+    open_rooms = {rid: list(room["users"]) for rid, room in OPEN_ROOMS.items()}
+    old_users = PUBLISHED["users"]
+    old_rooms = PUBLISHED["rooms"]
+    for name, (in_room, rating) in users.items():
+        if old_users.get(name) != (in_room, rating):
+            backplane.publish(
+                {"event": "user", "name": name, "in_room": in_room, "rating": rating}
+            )
+    for name in old_users.keys() - users.keys():
+        backplane.publish({"event": "user_left", "name": name})
+    for room_id, usernames in open_rooms.items():
+        if old_rooms.get(room_id) != usernames:
+            backplane.publish({"event": "room", "id": room_id, "users": usernames})
+    for room_id in old_rooms.keys() - open_rooms.keys():
+        backplane.publish({"event": "room_closed", "id": room_id})
+    PUBLISHED["users"] = users
+    PUBLISHED["rooms"] = open_rooms
+    # Tell other nodes when one of their users joins or leaves a room hosted here
+    for peer in PEERS.values():
+        hosted = peer in USERS_IN_ROOM
+        if hosted != peer.hosted:
+            peer.hosted = hosted
+            backplane.publish(
+                {"event": "hosted" if hosted else "released", "name": peer.name},
+                to=peer.node,
+            )
+
+
+CLUSTER_HANDLERS = {}  # Maps backplane event name to its handler coroutine
+
+
+def cluster_event(name):
+    # Registers a coroutine as the handler for one backplane event
+    def register(func):
+        CLUSTER_HANDLERS[name] = func
+        return func
+
+    return register
+
+
+async def handle_cluster_batch(node, events):
+    # Apply a batch from another node; the lobby is re-broadcast at most once per batch
+    lobby_changed = False
+    for event in events:
+        func = CLUSTER_HANDLERS.get(event.get("event"))
+        if func is None:
+            continue
+        if await func(node, event):
+            lobby_changed = True
+    if lobby_changed:
+        await notify_lobby()
+
+
+async def forget_node(node):
+    for name, info in list(REMOTE_USERS.items()):
+        if info["node"] == node:
+            remove_remote_user(name)
+    for room_id, room in list(REMOTE_ROOMS.items()):
+        if room["node"] == node:
+            remove_remote_room(room_id)
+    for (peer_node, _), peer in list(PEERS.items()):
+        if peer_node == node:
+            await disconnect_user(peer)
+
+
+@cluster_event("hello")
+async def on_hello(node, event):
+    # A node joined: send it this node's full lobby state once
+    backplane.publish(
+        {"event": "sync", "users": PUBLISHED["users"], "rooms": PUBLISHED["rooms"]},
+        to=node,
+    )
+    return False
+
+
+@cluster_event("sync")
+async def on_sync(node, event):
+    for name, (in_room, rating) in event.get("users", {}).items():
+        set_remote_user(node, name, in_room, rating)
+    for room_id, usernames in event.get("rooms", {}).items():
+        set_remote_room(node, room_id, usernames)
+    return True
+
+
+@cluster_event("bye")
+async def on_bye(node, event):
+    await forget_node(node)
+    return True
+
+
+@cluster_event("user")
+async def on_user(node, event):
+    set_remote_user(node, event["name"], event["in_room"], event.get("rating"))
+    return True
+
+
+@cluster_event("user_left")
+async def on_user_left(node, event):
+    remove_remote_user(event["name"])
+    peer = PEERS.get((node, event["name"]))
+    if peer is not None:
+        await disconnect_user(peer)
+    return True
+
+
+@cluster_event("room")
+async def on_room(node, event):
+    set_remote_room(node, event["id"], event["users"])
+    return True
+
+
+@cluster_event("room_closed")
+async def on_room_closed(node, event):
+    remove_remote_room(event["id"])
+    return True
+
+
+@cluster_event("deliver")
+async def on_deliver(node, event):
+    # A frame from another node for one of this node's users
+    user_ws = find_local_user(event["name"])
+    if user_ws is not None:
+        try:
+            await send_message(user_ws, event["message"])
+        except Exception:
+            pass
+    return False
+
+
+@cluster_event("match_result")
+async def on_match_result(node, event):
+    # A match one of this node's users played in a room hosted on another node
+    name = event["name"]
+    profile = await profiles.load(name)
+    profiles.update(
+        name,
+        stats=event["stats"],
+        rating=profile["rating"] + event["rating_change"],
+    )
+    # Logged here too, so this node's history can recompute the player's rating
+    profiles.log_match(*event["match"])
+    return True  # The new rating is published with the next lobby sync
+
+
+@cluster_event("forward")
+async def on_forward(node, event):
+    # A client message from a user on another node acting on state hosted here
+    await dispatch(get_peer(node, event["name"]), event["message"])
+    return False
+
+
+@cluster_event("hosted")
+async def on_hosted(node, event):
+    user_ws = find_local_user(event["name"])
+    if user_ws is None:
+        return False
+    REMOTE_SESSIONS[user_ws] = node
+    USERS_IN_ROOM.add(user_ws)
+    # Only two-player rooms are hosted remotely, so the user is heading into a match
+    unsubscribe_lobby(user_ws)
+    return True
+
+
+@cluster_event("released")
+async def on_released(node, event):
+    user_ws = find_local_user(event["name"])
+    if user_ws is None or REMOTE_SESSIONS.get(user_ws) != node:
+        return False
+    del REMOTE_SESSIONS[user_ws]
+    USERS_IN_ROOM.discard(user_ws)
+    await subscribe_lobby(user_ws)
+    return True
+
+
+# =========================================
+#         ADMISSION CONTROL
+# =========================================
+handshakes_in_flight = 0  # Connections accepted but still waiting for their name
+loop_lag = 0.0  # Latest measured event-loop lag, in seconds
+REFUSED = {}  # Maps refusal reason to the number of connections refused for it
+
+
+async def monitor_loop_lag():
+    # Sleep for a fixed interval and record how late the loop woke us up.
+    # Spikes count at once and fade over a few samples, so shedding does not flap.
+    global loop_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + LAG_SAMPLE_SECONDS
+        await asyncio.sleep(LAG_SAMPLE_SECONDS)
+        loop_lag = max(loop.time() - expected, loop_lag * 0.8, 0.0)
+
+
+def admission_refusal():
+    # Reason to turn a new connection away, or None to admit it
+    if len(CONNECTIONS) >= MAX_CONNECTIONS:
+        return "too_many_connections"
+    if handshakes_in_flight >= MAX_HANDSHAKES:
+        return "too_many_handshakes"
+    if loop_lag > SHED_LAG_SECONDS:
+        # Shed new joins so rooms already playing keep their latency
+        return "overloaded"
+    return None
+
+
+async def refuse_connection(ws, reason):
+    REFUSED[reason] = REFUSED.get(reason, 0) + 1
+    log_event(log, logging.DEBUG, "connection_refused", sampled=True, reason=reason)
+    message = {
+        "type": "reconnect",
+        "reason": reason,
+        "retry_after": round(random.uniform(SHED_RETRY_MIN, SHED_RETRY_MAX), 2),
+    }
+    try:
+        await ws.send(json.dumps(message))
+        await ws.close(1013, "try again later")
+    except Exception:
+        pass
 
 
 # =========================================
 #         CONNECTION HANDLER (LOBBY)
 # =========================================
 async def handler(ws):
+    global connection_counter, handshakes_in_flight
+    reason = admission_refusal()
+    if reason is not None:
+        await refuse_connection(ws, reason)
+        return
+    connection_counter += 1
+    stats = CONNECTIONS[ws] = ConnectionStats(
+        connection_counter, getattr(ws, "remote_address", None)
+    )
+    CONNECTION_IDS[stats.id] = ws
+    CONNECTION_INDEX.add(stats.id)
     try:
-        name_msg = await ws.recv()
-        name_data = (
-            json.loads(name_msg) if name_msg.startswith("{") else {"name": name_msg}
-        )
-        name = name_data.get("name", "Player")
-        LOBBY[ws] = name
-        USERS.add(ws)
-        players[ws] = {"name": name, "hp": 3, "loaded": False, "room": None}
+        handshakes_in_flight += 1
+        try:
+            # Idle sockets that never send a name are dropped
+            name_msg = await asyncio.wait_for(ws.recv(), HANDSHAKE_TIMEOUT_SECONDS)
+        finally:
+            handshakes_in_flight -= 1
+        if isinstance(name_msg, str) and name_msg.startswith("{"):
+            name_data = parse_frame(name_msg) or {}
+        else:
+            name_data = {"name": name_msg}
+        name, is_default = assign_name(name_data.get("name"))
+        # Cache hit, or one batched disk read shared with other logins in flight
+        await profiles.load(name)
+        open_session(ws, name)
+        if is_default:
+            await send_message(ws, json.dumps({"type": "lobby_joined", "name": name}))
+        await notify_lobby(only=ws)  # Its first page now; the others on the next push
         await notify_lobby()
         while True:
             msg = await ws.recv()
-            data = json.loads(msg)
-            # Lobby message handling
-            if data.get("type") in (
-                "create_room",
-                "join_room",
-                "leave_room",
-                "invite",
-                "invite_response",
-                "enter_room",
-            ):
-                await handle_lobby_message(ws, data)
-            # Game message handling
-            elif data.get("type") in ("submit", "reset", "chat"):
-                await handle_message(ws, data)
+            stats.bytes_in += len(msg)
+            stats.frames_in += 1
+            stats.last_activity = time.time()
+            # Route through the dispatch registry (lobby and game messages alike)
+            await dispatch(ws, msg)
     except Exception as e:
-        print(f"Error: {e}")
+        log_event(log, logging.INFO, "connection_closed", error=str(e))
     finally:
-        USERS.discard(ws)
-        name = LOBBY.pop(ws, None)
-        USERS_IN_ROOM.discard(ws)
-        # Remove user from any open room
-        for rid, room in list(OPEN_ROOMS.items()):
-            if name in room["users"]:
-                room["users"].remove(name)
-                if not room["users"]:
-                    del OPEN_ROOMS[rid]
-        # --- Notify the other player in a game room, if any ---
-        user_room = players.get(ws, {}).get("room")
-        if user_room and user_room in rooms:
-            other_players = [p for p in rooms[user_room]["players"] if p != ws]
-            for other in other_players:
-                try:
-                    await other.send(json.dumps({"type": "room_left"}))
-                    USERS_IN_ROOM.discard(
-                        other
-                    )  # Remove the other player from USERS_IN_ROOM
-                    if other in players:
-                        players[other]["room"] = None
-                except Exception:
-                    pass
-            del rooms[user_room]
-        if ws in players:
+        await disconnect_user(ws)
+
+
+async def disconnect_user(ws):
+    # Tear down a local connection, or a peer whose user left another node
+    room_id = players.get(ws, {}).get("room")
+    name = close_session(ws)
+    leave_open_rooms(name)
+    await end_game_room(room_id, ws)
+    await notify_lobby()
+
+
+# =========================================
+#         LIFECYCLE (SESSIONS, ROOMS, INVITES)
+# =========================================
+# Everything a connection, game room or invite adds to the global state is added
+# by an open_* function here and removed by the matching close_* function, so
+# nothing is left behind when a player disconnects or a room ends.
+def new_player(name):
+    return {"name": name, "hp": 3, "loaded": False, "room": None}
+
+
+def open_session(ws, name):
+    # Register a local client in the lobby once its name is known
+    LOBBY[ws] = name
+    USERS.add(ws)
+    USER_BY_NAME[name] = ws
+    USER_INDEX.add(name)
+    LOBBY_SUBSCRIBERS.add(ws)
+    players[ws] = new_player(name)
+
+
+def close_session(ws):
+    """
+    Remove a local client or remote peer from every lobby, invite and connection
+    table, and drop its player state. Game and open rooms are left to the caller.
+    Returns the session's name (None if it never got one).
+    """
+    USERS.discard(ws)
+    name = LOBBY.pop(ws, None)
+    USERS_IN_ROOM.discard(ws)
+    REMOTE_SESSIONS.pop(ws, None)
+    LOBBY_VIEWS.pop(ws, None)
+    unsubscribe_lobby(ws)
+    drop_invites(ws)
+    players.pop(ws, None)
+    if isinstance(ws, RemotePeer):
+        PEERS.pop((ws.node, ws.name), None)
+        return name
+    stats = CONNECTIONS.pop(ws, None)
+    if stats is not None:
+        CONNECTION_IDS.pop(stats.id, None)
+        CONNECTION_INDEX.discard(stats.id)
+    if name is not None:
+        USER_INDEX.discard(name)
+        if USER_BY_NAME.get(name) is ws:
+            del USER_BY_NAME[name]
+    return name
+
+
+def leave_open_rooms(name):
+    # Take a user out of any open (not yet started) room; empty rooms close
+    if name is None:
+        return
+    for room_id, room in list(OPEN_ROOMS.items()):
+        if name in room["users"]:
+            room["users"].remove(name)
+            if not room["users"]:
+                remove_open_room(room_id)
+
+
+def open_game_room(ws1, ws2):
+    # Start a match between two players; returns the new room id
+    room_id = str(uuid.uuid4())
+    rooms[room_id] = {"players": [ws1, ws2], "round": 0}
+    GAME_ROOM_INDEX.add(room_id)
+    ROOM_ACTORS[room_id] = RoomActor(room_id)
+    for ws in (ws1, ws2):
+        players[ws]["room"] = room_id
+        players[ws]["hp"] = 3
+        players[ws]["loaded"] = False
+    return room_id
+
+
+def close_game_room(room_id):
+    # Forget a game room and everything keyed by it; returns its players
+    room = rooms.pop(room_id, None)
+    if room is None:
+        return []
+    GAME_ROOM_INDEX.discard(room_id)
+    submitted_actions.pop(room_id, None)
+    pending_resets.pop(room_id, None)
+    for ws in room["players"]:
+        if ws in players and players[ws]["room"] == room_id:
             players[ws]["room"] = None
-        await notify_lobby()
+    return room["players"]
+
+
+async def end_game_room(room_id, leaver):
+    # `leaver` left its game room: close it and send the other player back to the lobby
+    if not room_id:
+        return
+    actor = ROOM_ACTORS.pop(room_id, None)
+    if actor is not None:
+        # The room finishes the messages it already queued before it goes away
+        await actor.stop()
+    for other in close_game_room(room_id):
+        if other is leaver:
+            continue
+        try:
+            await send_message(other, json.dumps({"type": "room_left"}))
+            USERS_IN_ROOM.discard(other)
+            await subscribe_lobby(other)
+        except Exception:
+            pass
+
+
+def open_invite(inviter, invitee):
+    INVITES[inviter] = invitee
+    INVITED[invitee] = inviter
+
+
+def close_invite(inviter):
+    invitee = INVITES.pop(inviter, None)
+    if invitee is not None and INVITED.get(invitee) is inviter:
+        del INVITED[invitee]
+
+
+def drop_invites(ws):
+    # Cancel invites sent by or to a session that is going away
+    close_invite(ws)
+    inviter = INVITED.get(ws)
+    if inviter is not None:
+        close_invite(inviter)
+
+
+# =========================================
+#         GRACEFUL DRAIN
+# =========================================
+async def redirect_user(ws):
+    # Ask a client to reconnect (elsewhere) at a random moment, then close it
+    message = {
+        "type": "reconnect",
+        "retry_after": round(random.uniform(0, DRAIN_RECONNECT_SPREAD), 2),
+    }
+    if DRAIN_REDIRECT_URL:
+        message["url"] = DRAIN_REDIRECT_URL
+    try:
+        await send_message(ws, json.dumps(message))
+        await ws.close(1001, "server draining")
+    except Exception:
+        pass
+
+
+def match_running(room):
+    # A match is over once a player has no hp left (until a reset, refused while draining)
+    return all(players[p]["hp"] > 0 for p in room["players"] if p in players)
+
+
+async def drain(server):
+    """
+    Shut down without dropping everyone at once:
+    stop accepting connections and creating rooms, redirect lobby-only users,
+    let running matches finish (up to DRAIN_DEADLINE_SECONDS), then redirect the rest.
+    """
+    global draining
+    draining = True
+    log_event(log, logging.WARNING, "drain_started", users=len(USERS), rooms=len(rooms))
+    server.server.close()  # Stop listening; open connections stay up
+    in_match = {p for room in rooms.values() for p in room["players"]}
+    in_match.update(REMOTE_SESSIONS)
+    await asyncio.gather(
+        *(redirect_user(ws) for ws in list(USERS) if ws not in in_match)
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DRAIN_DEADLINE_SECONDS
+    while loop.time() < deadline:
+        if not any(match_running(room) for room in rooms.values()):
+            break
+        await asyncio.sleep(0.5)
+    await asyncio.gather(*(redirect_user(ws) for ws in list(USERS)))
+    log_event(log, logging.WARNING, "drain_finished")
+
+
+# =========================================
+#         ADMIN ENDPOINT
+# =========================================
+def session_name(ws):
+    return LOBBY.get(ws) or players.get(ws, {}).get("name")
+
+
+def describe_room(room_id):
+    room = rooms.get(room_id)
+    if room is None:
+        return None
+    submitted = submitted_actions.get(room_id, {})
+    resets = pending_resets.get(room_id, ())
+    return {
+        "id": room_id,
+        "round": room.get("round", 0) + 1,
+        "players": [
+            {
+                "name": session_name(p),
+                "hp": players.get(p, {}).get("hp"),
+                "remote": isinstance(p, RemotePeer),
+            }
+            for p in room["players"]
+        ],
+        "submitted": [session_name(p) for p in submitted],
+        "reset_requested": [session_name(p) for p in resets],
+        "inbox": ROOM_ACTORS[room_id].inbox.qsize() if room_id in ROOM_ACTORS else 0,
+    }
+
+
+def describe_open_room(room_id):
+    room = OPEN_ROOMS.get(room_id) or REMOTE_ROOMS.get(room_id)
+    if room is None:
+        return None
+    node = room.get("node", NODE_ID)
+    return {"id": room_id, "users": list(room["users"]), "node": node}
+
+
+def describe_connection(conn_id):
+    ws = CONNECTION_IDS.get(conn_id)
+    stats = CONNECTIONS.get(ws)
+    if stats is None:
+        return None
+    transport = getattr(ws, "transport", None)
+    return {
+        "id": conn_id,
+        "name": LOBBY.get(ws),
+        "address": stats.address,
+        "room": players.get(ws, {}).get("room"),
+        "bytes_in": stats.bytes_in,
+        "bytes_out": stats.bytes_out,
+        "frames_in": stats.frames_in,
+        "frames_out": stats.frames_out,
+        # Bytes written but not yet accepted by the socket
+        "queue_depth": transport.get_write_buffer_size() if transport else None,
+        "idle_seconds": round(time.time() - stats.last_activity, 3),
+        "connected_seconds": round(time.time() - stats.connected_at, 3),
+    }
+
+
+async def admin_summary(query):
+    return {
+        "node": NODE_ID,
+        "draining": draining,
+        "connections": len(CONNECTIONS),
+        "lobby_users": len(USER_INDEX),
+        "rooms": len(rooms),
+        "room_actors": len(ROOM_ACTORS),
+        "pending_frames": len(PENDING_FRAMES),
+        "open_rooms": len(ROOM_INDEX),
+        "invites": len(INVITES),
+        "handshakes_in_flight": handshakes_in_flight,
+        "loop_lag": round(loop_lag, 4),
+        "refused": REFUSED,
+    }
+
+
+async def admin_rooms(query):
+    cursor, limit = page_params(query)
+    return await snapshot_page(
+        GAME_ROOM_INDEX.after(cursor, limit), limit, describe_room
+    )
+
+
+async def admin_open_rooms(query):
+    cursor, limit = page_params(query)
+    return await snapshot_page(
+        ROOM_INDEX.after(cursor, limit), limit, describe_open_room
+    )
+
+
+async def admin_invites(query):
+    # Pending invites are few; they are paged by inviter name
+    cursor, limit = page_params(query)
+    pending = sorted(
+        (LOBBY.get(inviter) or "", session_name(invitee) or "")
+        for inviter, invitee in list(INVITES.items())
+    )
+    if cursor is not None:
+        pending = [entry for entry in pending if entry[0] > cursor]
+    page = await snapshot_page(
+        pending[:limit], limit, lambda entry: {"from": entry[0], "to": entry[1]}
+    )
+    if page["next_cursor"] is not None:
+        page["next_cursor"] = page["next_cursor"][0]
+    return page
+
+
+async def admin_connections(query):
+    cursor, limit = page_params(query)
+    try:
+        after = int(cursor) if cursor is not None else None
+    except ValueError:
+        after = None
+    return await snapshot_page(
+        CONNECTION_INDEX.after(after, limit), limit, describe_connection
+    )
+
+
+ADMIN_ROUTES = {
+    "/": admin_summary,
+    "/rooms": admin_rooms,
+    "/open_rooms": admin_open_rooms,
+    "/invites": admin_invites,
+    "/connections": admin_connections,
+}
 
 
 # =========================================
 #         SERVER ENTRY POINT
 # =========================================
 async def main():
-    async with websockets.serve(handler, "localhost", 8765):
-        print("WebSocket server started on ws://localhost:8765")
-        await asyncio.Future()
+    global backplane
+    backplane = create_backplane(BACKPLANE_URL, NODE_ID)
+    if backplane is not None:
+        await backplane.start(handle_cluster_batch)
+        backplane.publish({"event": "hello"})
+        print(f"Node {NODE_ID} joined backplane {BACKPLANE_URL}")
+    # First SIGTERM/SIGINT drains the server; a second one stops it immediately
+    stop = asyncio.Event()
+    main_task = asyncio.current_task()
+
+    def request_stop():
+        if stop.is_set():
+            main_task.cancel()
+        stop.set()
+
+    admin_server = None
+    if ADMIN_PORT:
+        admin_server = await serve_admin(ADMIN_HOST, ADMIN_PORT, ADMIN_ROUTES)
+        print(f"Admin endpoint on http://{ADMIN_HOST}:{ADMIN_PORT}/")
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_stop)
+        except (NotImplementedError, AttributeError):
+            pass  # No signal handlers on this platform (e.g. Windows)
+    try:
+        async with websockets.serve(
+            handler, SERVER_HOST, SERVER_PORT, max_size=MAX_FRAME_BYTES
+        ) as server:
+            print(f"WebSocket server started on ws://{SERVER_HOST}:{SERVER_PORT}")
+            await stop.wait()
+            print("Draining: finishing matches and redirecting clients...")
+            await drain(server)
+    finally:
+        lag_monitor.cancel()
+        # Matches that just ended still have their results to record
+        await asyncio.gather(*MATCH_RECORDS, return_exceptions=True)
+        if backplane is not None:
+            backplane.publish({"event": "bye"})
+            await backplane.close()
+        await profiles.close()  # Write out profiles still waiting for write-behind
+        if admin_server is not None:
+            admin_server.close()
 
 
 if __name__ == "__main__":
@@ -1,19 +1,29 @@
 import json
-import asyncio
 from PyQt6 import QtWidgets, QtCore
 from PyQt6.QtCore import QTimer, Qt
 from PyQt6.QtWidgets import QFrame, QVBoxLayout
 from splitters import DoubleLineSplitter
-from ui import create_main_ui, apply_dark_theme
-from chat import create_chat_ui, connect_chat_signals
+from ui import create_main_ui
+from theme import set_state
+from chat import (
+    create_chat_ui,
+    connect_chat_signals,
+    format_line,
+    ACTION_LINE_STYLES,
+    CHAT_LINE_STYLES,
+    MATCH_END_HTML,
+    ROUND_SEP_HTML,
+)
 from network import connect_to_server
+from outbox import Outbox
 
 
 class GameClient(QtWidgets.QWidget):
-    def __init__(self, loop, websocket, username, opponent_name, parent_lobby=None):
+    def __init__(
+        self, loop, outbox, username, opponent_name, parent_lobby=None, recorder=None
+    ):
         super().__init__()
-        self.setObjectName("GameClient")
-        self.setStyleSheet(self.styleSheet() + "\n#GameClient { border: none; }")
+        self.setObjectName("GameClient")  # Scope of the game rules in theme.py
         self.setWindowTitle(f"Game - {username} vs {opponent_name}")
         self.action = None
         self.loaded = False
@@ -22,13 +32,17 @@ class GameClient(QtWidgets.QWidget):
         self.round = 0
         self.opponent_name = opponent_name
         self.username = username
-        self.websocket = websocket
+        self.outbox = outbox  # Outbound queue (outbox.py); None until connected
+        self.websocket = None  # Own connection, only in standalone mode
         self.loop = loop
-        self.last_actions = None
         self.parent_lobby = parent_lobby
+        self.recorder = recorder  # MatchRecorder (recording.py) of this match, if any
+        self.state_seq = None  # Sequence number of the last applied state update
+        self.resync_pending = False
+        self.match_over = False  # Game over shown; cleared when a new game starts
+        self.opponent_loaded = False
         self.block_points = 3
         self.init_ui()
-        apply_dark_theme(self)
         self._last_round_for_chat = 0
         self.setMinimumSize(700, 500)
         self.setAttribute(QtCore.Qt.WidgetAttribute.WA_DeleteOnClose)
@@ -152,9 +166,8 @@ class GameClient(QtWidgets.QWidget):
         self.attack_btn.setEnabled(self.loaded)
         self.block_btn.setEnabled(self.block_points > 0)
         self.load_btn.setEnabled(not self.loaded)
-        self.attack_btn.setStyleSheet("")
-        self.block_btn.setStyleSheet("")
-        self.load_btn.setStyleSheet("")
+        for btn in (self.attack_btn, self.block_btn, self.load_btn):
+            set_state(btn, "selected", False)
         self.update_block_points_ui()
 
     def disable_buttons(self):
@@ -166,23 +179,13 @@ class GameClient(QtWidgets.QWidget):
     def select_action(self, action):
         self.action = action
         self.submit_btn.setEnabled(True)
-        highlight_style = (
-            "background-color: #ffcc00; color: #222; border: 2px solid #fff;"
-        )
-        default_style = ""
-        self.attack_btn.setStyleSheet(default_style)
-        self.block_btn.setStyleSheet(default_style)
-        self.load_btn.setStyleSheet(default_style)
-        if action == "attack":
-            self.attack_btn.setStyleSheet(highlight_style)
-        elif action == "block":
-            self.block_btn.setStyleSheet(highlight_style)
-        elif action == "load":
-            self.load_btn.setStyleSheet(highlight_style)
+        set_state(self.attack_btn, "selected", action == "attack")
+        set_state(self.block_btn, "selected", action == "block")
+        set_state(self.load_btn, "selected", action == "load")
         self.update_block_points_ui()
 
     def submit_action(self):
-        if self.websocket and self.action:
+        if self.outbox and self.action:
             # Block points logic: decrement if block, increment if not block
             if self.action == "block":
                 if self.block_points > 0:
@@ -195,34 +198,27 @@ class GameClient(QtWidgets.QWidget):
                 self.block_btn.setEnabled(False)
             else:
                 self.block_btn.setEnabled(True)
-            import asyncio
-
-            asyncio.create_task(
-                self.websocket.send(
-                    json.dumps({"type": "submit", "action": self.action})
-                )
-            )
+            self.outbox.send({"type": "submit", "action": self.action})
             self.submit_btn.setEnabled(False)
             self.disable_buttons()
             self.action = None
 
     def reset_game(self):
-        if self.websocket:
-            asyncio.create_task(self.websocket.send(json.dumps({"type": "reset"})))
+        if self.outbox:
+            self.outbox.send({"type": "reset"})
         self.reset_btn.setEnabled(False)
-        self.game_frame.setStyleSheet("QFrame#GameArea { border: none; }")
+        self.match_over = False
+        set_state(self.game_frame, "result", "")
         self.round_label.setText("Round: 1")
         self.round = 1
-        self.last_actions = None
         self._last_round_for_chat = 1
         self.block_points = 3
         self.update_block_points_ui()
         self.block_btn.setEnabled(True)
 
     def highlight_label(self, label):
-        original_style = label.styleSheet()
-        label.setStyleSheet("background-color: red; color: white;")
-        QTimer.singleShot(1000, lambda: label.setStyleSheet(original_style))
+        set_state(label, "flash", True)
+        QTimer.singleShot(1000, lambda: set_state(label, "flash", False))
 
     def append_chat_message(
         self,
@@ -233,69 +229,43 @@ class GameClient(QtWidgets.QWidget):
         round_number=None,
         match_end_sep=False,
     ):
-        from PyQt6.QtGui import QTextCursor
-
         if not self.chat_container.isVisible():
             if not self.message_toggle_btn.text().startswith("Show Chat 🚨"):
                 self.message_toggle_btn.setText("Show Chat 🚨")
         html = ""
         if round_sep and round_number is not None:
-            html += (
-                f'<div style="margin:12px 0 4px 0; border-bottom:2px solid #888; font-size:13px; color:#bbb;">— Round {round_number} —</div>'
-                "<br>"
-            )
+            html += ROUND_SEP_HTML.format(round=round_number)
         if match_end_sep:
-            html += (
-                '<div style="margin:16px 0 8px 0; border-bottom:3px double #ffcc00; font-size:15px; color:#ffcc00; text-align:center;">=== End of Match ===</div>'
-                "<br>"
+            html += MATCH_END_HTML
+        if sender or message:
+            side = (
+                "You"
+                if sender == "You"
+                else "Enemy" if sender in ("Player", "Enemy") else None
             )
-        if highlight == "action":
-            if sender == "You":
+            if highlight == "action":
+                name_color, msg_style = ACTION_LINE_STYLES[side]
+            else:
+                name_color, msg_style = CHAT_LINE_STYLES[side or "Enemy"]
+            if side == "You":
                 sender_display = self.username
-                name_color = "#1565c0"
-                msg_style = "background-color:#cce4ff; color:#1565c0; padding:2px 6px; border-radius:6px;"
-            elif sender in ("Player", "Enemy"):
+            elif side == "Enemy":
                 sender_display = self.opponent_name
-                name_color = "#c62828"
-                msg_style = "background-color:#ffe3e3; color:#c62828; padding:2px 6px; border-radius:6px;"
             else:
                 sender_display = sender
-                name_color = "#fff"
-                msg_style = ""
-            html += (
-                f'<b><span style="color:{name_color};">{sender_display}:</span></b> '
-                f'<span style="{msg_style}">{message}</span>'
-            )
-        else:
-            if sender == "You":
-                sender_display = self.username
-                name_color = "#1565c0"
-            else:
-                sender_display = (
-                    self.opponent_name
-                    if sender in ("Player", "Enemy", self.opponent_name)
-                    else sender
-                )
-                name_color = "#c62828"
-            msg_style = "color:#fff;"
-            html += (
-                f'<b><span style="color:{name_color};">{sender_display}:</span></b> '
-                f'<span style="{msg_style}">{message}</span>'
-            )
-        self.chat_display.append(html)
-        self.chat_display.moveCursor(QTextCursor.MoveOperation.End)
+            html += format_line(sender_display, message, name_color, msg_style)
+        self.chat_log.append(html)
 
     async def receive_messages(self):
         self.websocket = await connect_to_server("ws://localhost:8765")
         if not self.websocket:
             self.status_label.setText("Could not connect to server.")
             return
+        self.outbox = Outbox(self.websocket)
         if self.username:
-            await self.websocket.send(
-                json.dumps({"type": "name", "name": self.username})
-            )
+            self.outbox.send({"type": "name", "name": self.username})
         else:
-            await self.websocket.send(json.dumps({"type": "name"}))
+            self.outbox.send({"type": "name"})
         self._last_round_for_chat = 1
         try:
             async for msg in self.websocket:
@@ -309,78 +279,8 @@ class GameClient(QtWidgets.QWidget):
                     self.round = 1
                     self.round_label.setText("Round: 1")
                     self._last_round_for_chat = 1
-                elif msg_type == "update":
-                    self.round = data["round"]
-                    self.opponent_name = data.get("opponent_name", "Enemy")
-                    if self.round == 1:
-                        self._last_round_for_chat = 1
-                        self.round_label.setText("Round: 1")
-                    if self.last_actions is not None:
-                        my_action, opp_action = self.last_actions
-                        my_result, opp_result = self.get_action_results(
-                            my_action, opp_action
-                        )
-                        round_sep = (
-                            self._last_round_for_chat is None
-                            or self.round != self._last_round_for_chat
-                        )
-                        sep_round_number = self.round if round_sep else None
-                        self.append_chat_message(
-                            "You",
-                            my_result,
-                            highlight="action",
-                            round_sep=round_sep,
-                            round_number=sep_round_number,
-                        )
-                        self.append_chat_message(
-                            "Enemy", opp_result, highlight="action"
-                        )
-                        self._last_round_for_chat = self.round
-                    self.last_actions = None
-                    self.loaded = data["loaded"]
-                    self.opponent_name = data.get("opponent_name", "Enemy")
-                    self.opponent_loaded = data.get("opponent_loaded", False)
-                    if data["hp"] < self.hp:
-                        self.highlight_label(self.hp_label)
-                    if data["opponent_hp"] < self.opponent_hp:
-                        self.highlight_label(self.opponent_hp_label)
-                    self.hp = data["hp"]
-                    self.opponent_hp = data["opponent_hp"]
-                    self.update_hp_labels()
-                    self.round_label.setText(f"Round: {self.round}")
-                    loaded_emoji = "✅" if self.loaded else "❌"
-                    self.loaded_label.setText(f"Loaded: {loaded_emoji}")
-                    self.status_label.setText("Select your move")
-                    self.enable_buttons()
-                    self.update_block_points_ui()  # Ensure shield UI updates every round
-                elif msg_type == "game_over":
-                    winner = data["winner"]
-                    if self.hp <= 0 and self.opponent_hp > 0:
-                        color = "#ff0000"
-                        self.status_label.setText(f"Defeat! {self.opponent_name} wins.")
-                    elif self.hp > 0 and self.opponent_hp <= 0:
-                        color = "#00ff00"
-                        self.status_label.setText(f"Victory! You win!")
-                    elif self.hp <= 0 and self.opponent_hp <= 0:
-                        color = "#FFD600"
-                        self.status_label.setText("Draw! Nobody wins.")
-                    else:
-                        color = "#888888"
-                        self.status_label.setText(f"Game Over! Winner: {winner}")
-                    self.game_frame.setStyleSheet(
-                        f"QFrame#GameArea {{ border: 4px solid {color}; border-radius: 10px; }}"
-                    )
-                    self.disable_buttons()
-                    self.reset_btn.setEnabled(True)
-                    self.append_chat_message("", "", match_end_sep=True)
-                elif msg_type == "chat":
-                    sender = data.get("sender", "Enemy")
-                    message = data.get("message", "")
-                    if sender == "Player":
-                        sender = "Enemy"
-                    self.append_chat_message(sender, message)
-                elif msg_type == "actions":
-                    self.last_actions = (data["your_action"], data["opponent_action"])
+                elif msg_type in ("round_result", "update", "game_over", "chat"):
+                    await self.handle_game_message(data)
         except (Exception,):
             self.status_label.setText("Connection error.")
 
@@ -410,11 +310,12 @@ class GameClient(QtWidgets.QWidget):
 
     def send_message(self):
         message = self.message_input.toPlainText().strip()
-        if not message or not self.websocket:
+        if not message or not self.outbox:
             return
-        asyncio.create_task(
-            self.websocket.send(json.dumps({"type": "chat", "message": message}))
-        )
+        self.outbox.send({"type": "chat", "message": message})
+        if self.recorder:
+            # Own lines are not echoed by the server: record them as sent
+            self.recorder.record({"type": "chat", "sender": "You", "message": message})
         self.append_chat_message("You", message)
         self.message_input.clear()
 
@@ -442,76 +343,150 @@ class GameClient(QtWidgets.QWidget):
         self.enable_buttons()
         self.update_block_points_ui()
 
+    def accept_state_update(self, data):
+        """
+        Check an update's sequence number before applying it.
+        Full updates are always applied; a delta is only applied if it directly
+        follows the last one, otherwise a full resync is requested from the server.
+        Deltas merged by the receive pipeline start at merged_from instead of seq.
+        """
+        seq = data.get("seq")
+        if seq is None:
+            return True  # Unversioned update
+        if data.get("full"):
+            self.state_seq = seq
+            self.resync_pending = False
+            return True
+        first = data.get("merged_from", seq)
+        if self.state_seq is not None and first == self.state_seq + 1:
+            self.state_seq = seq
+            return True
+        if not self.resync_pending and self.outbox:
+            self.resync_pending = True
+            self.outbox.send({"type": "resync"})
+        return False
+
+    def apply_state_update(self, data, actions=None):
+        # Deltas only carry changed fields; anything missing keeps its value
+        self.round = data.get("round", self.round)
+        self.opponent_name = data.get("opponent_name", self.opponent_name)
+        if self.round == 1:
+            self._last_round_for_chat = 1
+            self.round_label.setText("Round: 1")
+            self.match_over = False
+        if actions is not None:
+            self.append_action_lines(actions, self.round)
+        self.loaded = data.get("loaded", self.loaded)
+        self.opponent_loaded = data.get("opponent_loaded", self.opponent_loaded)
+        if data.get("hp", self.hp) < self.hp:
+            self.highlight_label(self.hp_label)
+        if data.get("opponent_hp", self.opponent_hp) < self.opponent_hp:
+            self.highlight_label(self.opponent_hp_label)
+        self.hp = data.get("hp", self.hp)
+        self.opponent_hp = data.get("opponent_hp", self.opponent_hp)
+        self.update_hp_labels()
+        self.round_label.setText(f"Round: {self.round}")
+        loaded_emoji = "✅" if self.loaded else "❌"
+        self.loaded_label.setText(f"Loaded: {loaded_emoji}")
+        self.update_block_points_ui()  # Ensure shield UI updates every round
+        if self.match_over:
+            return  # A resync after the last round keeps the game-over view
+        self.status_label.setText("Select your move")
+        self.enable_buttons()
+
+    def append_action_lines(self, actions, round_number):
+        # Chat lines with what both players did this round
+        my_result, opp_result = self.get_action_results(*actions)
+        round_sep = (
+            self._last_round_for_chat is None
+            or round_number != self._last_round_for_chat
+        )
+        self.append_chat_message(
+            "You",
+            my_result,
+            highlight="action",
+            round_sep=round_sep,
+            round_number=round_number if round_sep else None,
+        )
+        self.append_chat_message("Enemy", opp_result, highlight="action")
+        self._last_round_for_chat = round_number
+
+    def game_over_result(self, winner):
+        # (result property for the border, status text) of a finished game
+        if self.hp <= 0 and self.opponent_hp > 0:
+            return "defeat", f"Defeat! {self.opponent_name} wins."
+        elif self.hp > 0 and self.opponent_hp <= 0:
+            return "victory", "Victory! You win!"
+        elif self.hp <= 0 and self.opponent_hp <= 0:
+            return "draw", "Draw! Nobody wins."
+        return "over", f"Game Over! Winner: {winner}"
+
+    def show_game_over(self, winner):
+        self.match_over = True
+        result, text = self.game_over_result(winner)
+        self.status_label.setText(text)
+        set_state(self.game_frame, "result", result)  # Border color (theme.py)
+        self.disable_buttons()
+        self.reset_btn.setEnabled(True)
+        self.append_chat_message("", "", match_end_sep=True)
+
+    def show_replay_state(self, state):
+        # Replay viewer: show a recorded state as is (no flashes, nothing sent)
+        self.round = state["round"]
+        self.hp = state["hp"]
+        self.opponent_hp = state["opponent_hp"]
+        self.loaded = state["loaded"]
+        self.opponent_loaded = state["opponent_loaded"]
+        self.block_points = state["block_points"]
+        self.update_hp_labels()
+        self.round_label.setText(f"Round: {self.round}")
+        self.update_block_points_ui()
+        if not state["over"]:
+            result = ""
+            if state["your_action"]:
+                self.status_label.setText(
+                    f"You: {state['your_action']}  /  "
+                    f"{self.opponent_name}: {state['opponent_action']}"
+                )
+            else:
+                self.status_label.setText("Match start")
+        else:
+            result, text = self.game_over_result(state["winner"])
+            self.status_label.setText(text)
+        set_state(self.game_frame, "result", result)
+
+    def closeEvent(self, event):
+        if self.recorder:
+            self.recorder.close()
+        super().closeEvent(event)
+
     async def handle_game_message(self, data):
+        if self.recorder:
+            self.recorder.record(data)
         msg_type = data.get("type")
-        if msg_type == "update":
-            self.round = data.get("round", 1)
-            self.opponent_name = data.get("opponent_name", "Enemy")
-            if self.round == 1:
-                self._last_round_for_chat = 1
-                self.round_label.setText("Round: 1")
-            if self.last_actions is not None:
-                my_action, opp_action = self.last_actions
-                my_result, opp_result = self.get_action_results(my_action, opp_action)
-                round_sep = (
-                    self._last_round_for_chat is None
-                    or self.round != self._last_round_for_chat
-                )
-                sep_round_number = self.round if round_sep else None
-                self.append_chat_message(
-                    "You",
-                    my_result,
-                    highlight="action",
-                    round_sep=round_sep,
-                    round_number=sep_round_number,
-                )
-                self.append_chat_message("Enemy", opp_result, highlight="action")
-                self._last_round_for_chat = self.round
-            self.last_actions = None
-            self.loaded = data.get("loaded", False)
-            self.opponent_name = data.get("opponent_name", "Enemy")
-            self.opponent_loaded = data.get("opponent_loaded", False)
-            if data.get("hp", self.hp) < self.hp:
-                self.highlight_label(self.hp_label)
-            if data.get("opponent_hp", self.opponent_hp) < self.opponent_hp:
-                self.highlight_label(self.opponent_hp_label)
-            self.hp = data.get("hp", self.hp)
-            self.opponent_hp = data.get("opponent_hp", self.opponent_hp)
-            self.update_hp_labels()
-            self.round_label.setText(f"Round: {self.round}")
-            loaded_emoji = "✅" if self.loaded else "❌"
-            self.loaded_label.setText(f"Loaded: {loaded_emoji}")
-            self.status_label.setText("Select your move")
-            self.enable_buttons()
-            self.update_block_points_ui()  # Ensure shield UI updates every round
-        elif msg_type == "game_over":
-            winner = data["winner"]
-            if self.hp <= 0 and self.opponent_hp > 0:
-                color = "#ff0000"
-                self.status_label.setText(f"Defeat! {self.opponent_name} wins.")
-            elif self.hp > 0 and self.opponent_hp <= 0:
-                color = "#00ff00"
-                self.status_label.setText(f"Victory! You win!")
-            elif self.hp <= 0 and self.opponent_hp <= 0:
-                color = "#FFD600"
-                self.status_label.setText("Draw! Nobody wins.")
+        if msg_type == "round_result":
+            # One frame per round: both actions, the state delta and the outcome
+            update = data.get("update", {})
+            actions = (data["your_action"], data["opponent_action"])
+            if self.accept_state_update(update):
+                self.apply_state_update(update, actions=actions)
             else:
-                color = "#888888"
-                self.status_label.setText(f"Game Over! Winner: {winner}")
-            self.game_frame.setStyleSheet(
-                f"QFrame#GameArea {{ border: 4px solid {color}; border-radius: 10px; }}"
-            )
-            self.disable_buttons()
-            self.reset_btn.setEnabled(True)
-            self.append_chat_message("", "", match_end_sep=True)
+                # Only the state waits for the resync; the outcome is shown now
+                self.append_action_lines(actions, update.get("round", self.round))
+            if "winner" in data:
+                self.show_game_over(data["winner"])
+        elif msg_type == "update":
+            if not self.accept_state_update(data):
+                return
+            self.apply_state_update(data)
+        elif msg_type == "game_over":
+            self.show_game_over(data["winner"])
         elif msg_type == "chat":
             sender = data.get("sender", "Enemy")
             message = data.get("message", "")
             if sender == "Player":
                 sender = "Enemy"
             self.append_chat_message(sender, message)
-        elif msg_type == "actions":
-            self.last_actions = (data["your_action"], data["opponent_action"])
         elif msg_type == "room_left":
             self.close()
             if self.parent_lobby:
@@ -1,83 +1,84 @@
-import json
-from PyQt6.QtWidgets import QMessageBox
+import logging
+from dialogs import show_notice
+from logpipe import get_logger, log_event
+from receive import ReceivePipeline
+import latency
+
+log = get_logger("client.handlers")
 
 
 async def handle_ws_messages(ws, lobby):
-    print("[handle_ws_messages] Entered message loop")
-    async for msg in ws:
-        print(f"[handle_ws_messages] Received: {msg}")
-        data = json.loads(msg)
+    """
+    Dispatch server frames to the lobby / game windows until the connection ends.
+    Frames are decoded off the GUI thread and arrive in coalesced batches, at most
+    one batch per UI frame (see receive.py).
+    Returns the server's reconnect message if it asked us to reconnect, else None.
+    """
+    log_event(log, logging.INFO, "message_loop_started")
+    tracker = latency.tracker
+    async for batch in ReceivePipeline(ws).batches():
+        for data in batch:
+            redirect = await handle_message(ws, lobby, data)
+            if tracker is not None:
+                tracker.handled(data)
+            if redirect is not None:
+                return redirect
+    return None
+
+
+async def handle_message(ws, lobby, data):
+    # Apply one decoded server message; returns it if it is a reconnect request
+    if lobby.game_window:
+        if data.get("type") in (
+            "round_result",
+            "update",
+            "game_over",
+            "chat",
+            "room_left",
+        ):
+            await lobby.game_window.handle_game_message(data)
+            if data.get("type") == "room_left":
+                lobby.show_lobby()
+            return None
+    if data.get("type") == "lobby_update":
+        lobby.update_view(data)
+        lobby.update_users(data.get("users", []))
+        lobby.update_rooms(data.get("open_rooms", []))
+    elif data.get("type") == "lobby_totals":
+        lobby.update_totals(data)
+    elif data.get("type") == "room_joined":
+        log_event(
+            log, logging.INFO, "room_joined", usernames=data.get("usernames", [])
+        )
+        lobby.open_room(data.get("usernames", []))
+    elif data.get("type") == "room_left":
+        lobby.show_lobby()
+    elif data.get("type") == "invite_received":
+        from_user = data.get("from")
+        log_event(log, logging.INFO, "invite_received", sender=from_user)
+        lobby.prompt_invite(from_user)  # The reply is sent when the user answers
+    elif data.get("type") == "invite_result":
+        from_user = data.get("from")
+        accepted = data.get("accepted")
+        log_event(
+            log, logging.INFO, "invite_result", sender=from_user, accepted=accepted
+        )
+        if accepted:
+            lobby.outbox.send({"type": "enter_room"})
+            show_notice("Invite Accepted", f"{from_user} accepted your invitation!")
+        else:
+            show_notice("Invite Declined", f"{from_user} declined your invitation.")
+    elif data.get("type") == "reconnect":
+        # The server is draining or too busy: reconnect after the given delay
+        log_event(
+            log,
+            logging.INFO,
+            "reconnect_requested",
+            retry_after=data.get("retry_after"),
+            reason=data.get("reason"),
+        )
         if lobby.game_window:
-            print(f"[handle_ws_messages] Forwarding to game_window: {data.get('type')}")
-            if data.get("type") in (
-                "update",
-                "game_over",
-                "chat",
-                "actions",
-                "room_left",
-            ):
-                await lobby.game_window.handle_game_message(data)
-                if data.get("type") == "room_left":
-                    print("[handle_ws_messages] room_left received, showing lobby")
-                    lobby.show_lobby()
-                continue
-        if data.get("type") == "lobby_update":
-            print(
-                f"[handle_ws_messages] lobby_update: users={data.get('users', [])}, rooms={data.get('open_rooms', [])}"
-            )
-            lobby.update_users(data.get("users", []))
-            lobby.update_rooms(data.get("open_rooms", []))
-        elif data.get("type") == "room_joined":
-            print(
-                f"[handle_ws_messages] room_joined: usernames={data.get('usernames', [])}"
-            )
-            lobby.open_room(data.get("usernames", []))
-        elif data.get("type") == "room_left":
-            print("[handle_ws_messages] room_left: showing lobby")
             lobby.show_lobby()
-        elif data.get("type") == "invite_received":
-            from_user = data.get("from")
-            print(f"[handle_ws_messages] invite_received from {from_user}")
-            reply = QMessageBox.question(
-                None,
-                "Invitation",
-                f"You have been invited by {from_user}! Accept?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            )
-            if reply == QMessageBox.StandardButton.Yes:
-                print("[handle_ws_messages] Invite accepted")
-                await ws.send(
-                    json.dumps(
-                        {
-                            "type": "invite_response",
-                            "from": from_user,
-                            "accepted": True,
-                        }
-                    )
-                )
-            else:
-                print("[handle_ws_messages] Invite declined")
-                await ws.send(
-                    json.dumps(
-                        {
-                            "type": "invite_response",
-                            "from": from_user,
-                            "accepted": False,
-                        }
-                    )
-                )
-        elif data.get("type") == "invite_result":
-            from_user = data.get("from")
-            accepted = data.get("accepted")
-            print(
-                f"[handle_ws_messages] invite_result from {from_user}, accepted={accepted}"
-            )
-            if accepted:
-                QMessageBox.information(
-                    None, "Invite Accepted", f"{from_user} accepted your invitation!"
-                )
-                await ws.send(json.dumps({"type": "enter_room"}))
-            else:
-                QMessageBox.information(
-                    None, "Invite Declined", f"{from_user} declined your invitation."
-                )
+        return data
+    elif data.get("type") == "error":
+        log_event(log, logging.WARNING, "message_rejected", error=data.get("error"))
@@ -0,0 +1,192 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Loop lag sampling
+import json  # Trace export
+import logging  # Log levels
+import os  # Environment-based configuration
+import time  # Timestamps
+from collections import deque  # Rolling sample windows
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("client.latency")
+
+# =========================================
+#         LATENCY CONFIGURATION
+# =========================================
+# Set PYBAT_LATENCY=1 to time every server frame from socket receive to paint
+LATENCY_ENABLED = os.environ.get("PYBAT_LATENCY", "") == "1"
+# Trace written when the client exits (Chrome trace format: chrome://tracing, Perfetto)
+LATENCY_TRACE_FILE = os.environ.get("PYBAT_LATENCY_TRACE", "latency-trace.json")
+LATENCY_WINDOW = 1000  # Samples per stage behind the rolling percentiles
+TRACE_LIMIT = 20000  # Most recent frames / lag samples kept for the export
+LOOP_LAG_SAMPLE_SECONDS = 0.05
+OVERLAY_REFRESH_MS = 500
+
+# (stage, from, to): timestamps a frame collects on its way to the screen.
+# "server" is the server's send time (PYBAT_FRAME_TIMESTAMPS=1 on the server);
+# across machines "network" also holds the clock offset between them.
+# "decode" includes the wait for the next UI frame batch (see receive.py).
+STAGES = (
+    ("network", "server", "received"),
+    ("decode", "received", "decoded"),
+    ("handle", "decoded", "handled"),
+    ("paint", "handled", "painted"),
+    ("total", "received", "painted"),
+)
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# =========================================
+#         LATENCY TRACKER
+# =========================================
+class LatencyTracker:
+    """
+    Collects per-frame timestamps (epoch seconds, in a "_trace" dict on each
+    decoded message) and qasync loop lag, and keeps rolling percentiles of each
+    stage. A frame counts as painted at the first widget paint after its handler.
+    """
+
+    def __init__(self):
+        self.samples = {stage: deque(maxlen=LATENCY_WINDOW) for stage, _, _ in STAGES}
+        self.samples["loop lag"] = deque(maxlen=LATENCY_WINDOW)
+        self.frames = deque(maxlen=TRACE_LIMIT)
+        self.lags = deque(maxlen=TRACE_LIMIT)  # (time, lag ms)
+        self.awaiting_paint = []
+        self.watcher = None
+        self.overlay = None
+        self.lag_task = None
+
+    def handled(self, data):
+        trace = data.get("_trace")
+        if trace is None:
+            return
+        trace["handled"] = time.time()
+        trace["type"] = data.get("type")
+        self.awaiting_paint.append(trace)
+
+    def painted(self):
+        if not self.awaiting_paint:
+            return
+        now = time.time()
+        for trace in self.awaiting_paint:
+            trace["painted"] = now
+            for stage, start, end in STAGES:
+                if trace.get(start) is not None:
+                    self.samples[stage].append((trace[end] - trace[start]) * 1000)
+            self.frames.append(trace)
+        self.awaiting_paint = []
+
+    def summary(self):
+        # {stage: (p50, p95, p99, max, count)} in ms, for stages with samples
+        out = {}
+        for stage, values in self.samples.items():
+            if values:
+                ordered = sorted(values)
+                out[stage] = (
+                    percentile(ordered, 50),
+                    percentile(ordered, 95),
+                    percentile(ordered, 99),
+                    ordered[-1],
+                    len(ordered),
+                )
+        return out
+
+    async def monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_SAMPLE_SECONDS)
+            lag = max(0.0, loop.time() - started - LOOP_LAG_SAMPLE_SECONDS) * 1000
+            self.samples["loop lag"].append(lag)
+            self.lags.append((time.time(), lag))
+
+    def start(self, app):
+        # Hook into the running application: paint watcher, overlay, lag sampler
+        from PyQt6 import QtCore, QtWidgets
+
+        tracker = self
+
+        class PaintWatcher(QtCore.QObject):
+            def eventFilter(self, obj, event):
+                if (
+                    event.type() == QtCore.QEvent.Type.Paint
+                    and tracker.awaiting_paint
+                    and obj is not tracker.overlay
+                ):
+                    tracker.painted()
+                return False
+
+        self.watcher = PaintWatcher()
+        app.installEventFilter(self.watcher)
+        self.overlay = QtWidgets.QLabel()
+        self.overlay.setObjectName("LatencyOverlay")  # Styled in theme.py
+        self.overlay.setWindowFlags(
+            QtCore.Qt.WindowType.Tool
+            | QtCore.Qt.WindowType.FramelessWindowHint
+            | QtCore.Qt.WindowType.WindowStaysOnTopHint
+        )
+        self.overlay.setAttribute(QtCore.Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        timer = QtCore.QTimer(self.overlay)
+        timer.timeout.connect(self.refresh_overlay)
+        timer.start(OVERLAY_REFRESH_MS)
+        self.refresh_overlay()
+        self.overlay.show()
+        self.lag_task = asyncio.ensure_future(self.monitor_loop_lag())
+
+    def refresh_overlay(self):
+        lines = [f"{'ms':<9}{'p50':>7}{'p95':>7}{'p99':>7}{'max':>7}{'n':>6}"]
+        for stage, (p50, p95, p99, worst, count) in self.summary().items():
+            lines.append(
+                f"{stage:<9}{p50:7.1f}{p95:7.1f}{p99:7.1f}{worst:7.1f}{count:6d}"
+            )
+        self.overlay.setText("\n".join(lines))
+        self.overlay.adjustSize()
+
+    def export(self, path=LATENCY_TRACE_FILE):
+        # One complete event per stage of each frame, plus a loop lag counter
+        events = []
+        for trace in self.frames:
+            for stage, start, end in STAGES[:-1]:
+                if trace.get(start) is None:
+                    continue
+                events.append(
+                    {
+                        "name": stage,
+                        "cat": trace.get("type") or "frame",
+                        "ph": "X",
+                        "ts": trace[start] * 1e6,
+                        "dur": (trace[end] - trace[start]) * 1e6,
+                        "pid": 1,
+                        "tid": 1,
+                    }
+                )
+        for at, lag in self.lags:
+            events.append(
+                {
+                    "name": "loop lag",
+                    "ph": "C",
+                    "ts": at * 1e6,
+                    "pid": 1,
+                    "args": {"ms": lag},
+                }
+            )
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "summary": self.summary()}, f)
+        log_event(
+            log,
+            logging.INFO,
+            "latency_trace_written",
+            path=path,
+            frames=len(self.frames),
+        )
+
+    def stop(self):
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+
+
+tracker = LatencyTracker() if LATENCY_ENABLED else None
@@ -1,13 +1,27 @@
 from PyQt6 import QtWidgets
-from PyQt6.QtWidgets import QMessageBox
 import asyncio
-import json
+import logging
+from logpipe import get_logger, log_event
+from dialogs import ask, show_notice
+from recording import start_recording
+from lobby_model import (
+    RecordListModel,
+    make_filter_proxy,
+    room_record,
+    selected_record,
+    set_prefix_filter,
+    user_record,
+)
+
+log = get_logger("client.lobby")
+
+LOBBY_PAGE_SIZE = 50  # Users and rooms requested per lobby page
 
 
 class RoomWindow(QtWidgets.QWidget):
-    def __init__(self, ws, usernames, my_username, lobby):
+    def __init__(self, outbox, usernames, my_username, lobby):
         super().__init__()
-        self.ws = ws
+        self.outbox = outbox
         self.usernames = usernames
         self.my_username = my_username
         self.lobby = lobby
@@ -30,176 +44,291 @@ class RoomWindow(QtWidgets.QWidget):
             self.user_list.addItem(label)
 
     def leave_room(self):
-        asyncio.create_task(self.ws.send(json.dumps({"type": "leave_room"})))
+        self.outbox.send({"type": "leave_room"})
         self.close()
         self.lobby.show()
 
 
+def page_text(offset, shown, total):
+    # "11-20 of 35" for a page of a list, "0 of 35" when the page is empty
+    if shown:
+        return f"{offset + 1}-{offset + shown} of {total}"
+    return f"0 of {total}"
+
+
 class LobbyWindow(QtWidgets.QWidget):
-    def __init__(self, ws, username):
+    def __init__(self, outbox, username):
         super().__init__()
-        self.ws = ws
+        self.outbox = outbox  # Outbound queue of the current connection
         self.username = username
         self.setWindowTitle(f"Lobby - {username}")
         self.resize(600, 400)
         self.layout = QtWidgets.QHBoxLayout(self)
-        self.user_list = QtWidgets.QListWidget()
-        self.layout.addWidget(self.user_list)
+        self.in_room = False  # Own status, as reported by the server
+        self.view_prefix = ""  # Lobby view this client is subscribed to
+        self.view_offset = 0
+        self.view_limit = LOBBY_PAGE_SIZE
+        self.view_room_offset = 0  # Open rooms are paged on their own
+        self.view_room_limit = LOBBY_PAGE_SIZE
+        self.total_users = 0  # Users and rooms matching the view (lobby_totals)
+        self.total_rooms = 0
+        self.page_offset = 0  # Offset and row count of the pages last received
+        self.page_shown = 0
+        self.room_page_offset = 0
+        self.room_page_shown = 0
+        self.search_input = QtWidgets.QLineEdit()
+        self.search_input.setPlaceholderText("Search users and rooms...")
+        self.search_input.textChanged.connect(self.on_search_changed)
+        # Lists are views over diff-updated models: a lobby_update only touches
+        # the rows that changed, and the views keep selection and scroll position
+        self.user_model = RecordListModel(self)
+        self.user_proxy = make_filter_proxy(self.user_model)
+        self.user_list = QtWidgets.QListView()
+        self.user_list.setUniformItemSizes(True)
+        self.user_list.setModel(self.user_proxy)
+        self.prev_page_button = QtWidgets.QPushButton("<")
+        self.prev_page_button.clicked.connect(lambda: self.change_page(-1))
+        self.next_page_button = QtWidgets.QPushButton(">")
+        self.next_page_button.clicked.connect(lambda: self.change_page(1))
+        self.page_label = QtWidgets.QLabel("")
+        page_row = QtWidgets.QHBoxLayout()
+        page_row.addWidget(self.prev_page_button)
+        page_row.addWidget(self.page_label, stretch=1)
+        page_row.addWidget(self.next_page_button)
+        user_col = QtWidgets.QVBoxLayout()
+        user_col.addWidget(self.search_input)
+        user_col.addWidget(self.user_list)
+        user_col.addLayout(page_row)
+        self.layout.addLayout(user_col)
         self.invite_button = QtWidgets.QPushButton("Invite")
         self.invite_button.setEnabled(False)
         self.layout.addWidget(self.invite_button)
-        self.room_list = QtWidgets.QListWidget()
+        self.room_model = RecordListModel(self)
+        self.room_proxy = make_filter_proxy(self.room_model)
+        self.room_list = QtWidgets.QListView()
+        self.room_list.setUniformItemSizes(True)
+        self.room_list.setModel(self.room_proxy)
         self.layout.addWidget(self.room_list)
         self.create_room_button = QtWidgets.QPushButton("Create Open Room")
         self.create_room_button.clicked.connect(self.create_open_room)
+        self.prev_room_page_button = QtWidgets.QPushButton("<")
+        self.prev_room_page_button.clicked.connect(lambda: self.change_room_page(-1))
+        self.next_room_page_button = QtWidgets.QPushButton(">")
+        self.next_room_page_button.clicked.connect(lambda: self.change_room_page(1))
+        self.room_page_label = QtWidgets.QLabel("")
+        room_page_row = QtWidgets.QHBoxLayout()
+        room_page_row.addWidget(self.prev_room_page_button)
+        room_page_row.addWidget(self.room_page_label, stretch=1)
+        room_page_row.addWidget(self.next_room_page_button)
         room_col = QtWidgets.QVBoxLayout()
         room_col.addWidget(self.room_list)
+        room_col.addLayout(room_page_row)
         room_col.addWidget(self.create_room_button)
         room_col.addStretch()
         self.close_room_button = QtWidgets.QPushButton("Close Room")
-        self.close_room_button.setStyleSheet(
-            "background-color: #c62828; color: white; font-weight: bold; border-radius: 6px; padding: 8px 0;"
-        )
+        self.close_room_button.setProperty("role", "danger")  # Grey while disabled
         self.close_room_button.setEnabled(False)
         self.close_room_button.clicked.connect(self.close_own_room)
         room_col.addWidget(self.close_room_button)
         room_col_widget = QtWidgets.QWidget()
         room_col_widget.setLayout(room_col)
         self.layout.addWidget(room_col_widget)
-        self.user_list.itemSelectionChanged.connect(self.on_user_selected)
-        self.room_list.itemSelectionChanged.connect(self.on_room_selected)
+        self.user_list.selectionModel().selectionChanged.connect(self.on_user_selected)
+        self.room_list.selectionModel().selectionChanged.connect(self.on_room_selected)
         self.join_room_button = QtWidgets.QPushButton("Join Room")
+        self.join_room_button.setProperty("role", "go")  # Green while enabled
         self.join_room_button.setEnabled(False)
         self.join_room_button.clicked.connect(self.join_selected_room)
         room_col.addWidget(self.join_room_button)
         self.room_window = None
         self.game_window = None
-        from chat import connect_lobby_invite
+        self.invite_prompts = {}  # Inviter name -> open invite question
+        self.waiting_notice = None  # "Waiting for another player" box, while open
+        self.send_failed_notice = None  # "Connection Problem" box, once a send fails
+        # Wired here rather than in chat.py so the lobby never imports game modules
+        self.invite_button.clicked.connect(self.send_invite)
 
-        connect_lobby_invite(self, self.user_list)
+    def send_invite(self):
+        # Reads the selection at click time
+        record = selected_record(self.user_list)
+        if record is None:
+            log_event(log, logging.DEBUG, "invite_without_selection")
+            return
+        log_event(log, logging.DEBUG, "send_invite", to=record.key)
+        self.outbox.send({"type": "invite", "to": record.key})
 
     def on_user_selected(self):
-        selected = self.user_list.selectedItems()
-        if not selected:
-            self.invite_button.setEnabled(False)
-            return
-        selected_user = (
-            selected[0].text().replace(" (you)", "").replace(" (in room)", "")
+        record = selected_record(self.user_list)
+        self.invite_button.setEnabled(
+            record is not None and record.invitable and not self.in_room
         )
-        if selected_user == self.username or "(in room)" in selected[0].text():
-            self.invite_button.setEnabled(False)
-            return
-        for i in range(self.user_list.count()):
-            item = self.user_list.item(i)
-            if item.text().startswith(self.username) and "(in room)" in item.text():
-                self.invite_button.setEnabled(False)
-                return
-        self.invite_button.setEnabled(True)
 
     def on_room_selected(self):
-        selected = self.room_list.selectedItems()
-        if not selected:
-            self.join_room_button.setEnabled(False)
-            self.join_room_button.setStyleSheet("")
-            return
-        room_id = selected[0].text()
-        is_joinable = False
-        if room_id.endswith("'s room"):
-            owner = room_id[:-7]
-            user_in_room = False
-            for i in range(self.user_list.count()):
-                item = self.user_list.item(i)
-                if item.text().startswith(self.username) and "(in room)" in item.text():
-                    user_in_room = True
-                    break
-            if not user_in_room and owner != self.username:
-                is_joinable = True
-        if is_joinable:
-            self.join_room_button.setEnabled(True)
-            self.join_room_button.setStyleSheet(
-                "background-color: #43a047; color: white; font-weight: bold; border-radius: 6px; padding: 8px 0;"
-            )
-        else:
-            self.join_room_button.setEnabled(False)
-            self.join_room_button.setStyleSheet("")
+        record = selected_record(self.room_list)
+        self.join_room_button.setEnabled(
+            record is not None and record.joinable and not self.in_room
+        )
+
+    def update_view(self, data):
+        # Paging details of the lobby_update frame for the subscribed view
+        self.in_room = data.get("in_room", self.in_room)
+        self.page_offset = data.get("offset", 0)
+        self.page_shown = len(data.get("users", []))
+        self.prev_page_button.setEnabled(self.page_offset > 0)
+        self.next_page_button.setEnabled(bool(data.get("more")))
+        self.room_page_offset = data.get("room_offset", 0)
+        self.room_page_shown = len(data.get("open_rooms", []))
+        self.prev_room_page_button.setEnabled(self.room_page_offset > 0)
+        self.next_room_page_button.setEnabled(bool(data.get("more_rooms")))
+        self.update_page_label()
+
+    def update_totals(self, data):
+        # lobby_totals: size of the subscribed view, pushed at most once a second
+        if data.get("prefix", "") != self.view_prefix:
+            return  # Counts of a view we already left
+        self.total_users = data.get("total_users", 0)
+        self.total_rooms = data.get("total_rooms", 0)
+        self.update_page_label()
+
+    def update_page_label(self):
+        self.page_label.setText(
+            page_text(self.page_offset, self.page_shown, self.total_users)
+        )
+        self.room_page_label.setText(
+            page_text(self.room_page_offset, self.room_page_shown, self.total_rooms)
+        )
+
+    def subscribe_view(self):
+        # Ask the server for one page / prefix of the lobby; only that view is pushed
+        self.outbox.send(
+            {
+                "type": "lobby_view",
+                "prefix": self.view_prefix,
+                "offset": self.view_offset,
+                "limit": self.view_limit,
+                "room_offset": self.view_room_offset,
+                "room_limit": self.view_room_limit,
+            }
+        )
+
+    def on_search_changed(self, text):
+        self.view_prefix = text.strip()
+        # Narrow the rows already shown at once; the server's page follows
+        set_prefix_filter(self.user_proxy, self.view_prefix)
+        set_prefix_filter(self.room_proxy, self.view_prefix)
+        self.view_offset = 0
+        self.view_room_offset = 0
+        self.subscribe_view()
+
+    def change_page(self, step):
+        offset = self.view_offset + step * self.view_limit
+        self.view_offset = max(0, min(offset, max(0, self.total_users - 1)))
+        self.subscribe_view()
+
+    def change_room_page(self, step):
+        offset = self.view_room_offset + step * self.view_room_limit
+        self.view_room_offset = max(0, min(offset, max(0, self.total_rooms - 1)))
+        self.subscribe_view()
 
     def update_users(self, users):
-        print(f"[LobbyWindow] update_users called with: {users}")
-        self.user_list.clear()
-        for user in users:
-            label = user
-            if user.startswith(self.username):
-                if "(you)" not in label:
-                    label = label.replace(" (in room)", "") + " (you)"
-                    if " (in room)" in user:
-                        label += " (in room)"
-            self.user_list.addItem(label)
-        self.user_list.repaint()
+        log_event(log, logging.DEBUG, "update_users", sampled=True, count=len(users))
+        self.user_model.set_records([user_record(u, self.username) for u in users])
         self.on_user_selected()
 
     def update_rooms(self, rooms):
-        print(f"[LobbyWindow] update_rooms called with: {rooms}")
-        self.room_list.clear()
-        for room in rooms:
-            self.room_list.addItem(room)
-        has_own_room = False
-        for room in rooms:
-            if room.startswith(f"{self.username}'s room"):
-                has_own_room = True
-                break
-        user_in_room = False
-        for i in range(self.user_list.count()):
-            item = self.user_list.item(i)
-            if item.text().startswith(self.username) and "(in room)" in item.text():
-                user_in_room = True
-                break
-        enabled = has_own_room and user_in_room
-        self.close_room_button.setEnabled(enabled)
-        if enabled:
-            self.close_room_button.setStyleSheet(
-                "background-color: #c62828; color: white; font-weight: bold; border-radius: 6px; padding: 8px 0;"
-            )
-        else:
-            self.close_room_button.setStyleSheet(
-                "background-color: #888; color: #eee; font-weight: bold; border-radius: 6px; padding: 8px 0;"
-            )
+        log_event(log, logging.DEBUG, "update_rooms", sampled=True, count=len(rooms))
+        records = [room_record(r, self.username) for r in rooms]
+        self.room_model.set_records(records)
+        self.on_room_selected()
+        has_own_room = any(record.own for record in records)
+        self.close_room_button.setEnabled(has_own_room and self.in_room)
 
     def close_own_room(self):
-        asyncio.create_task(self.ws.send(json.dumps({"type": "leave_room"})))
+        self.outbox.send({"type": "leave_room"})
 
     def join_selected_room(self):
-        selected = self.room_list.selectedItems()
-        if selected:
-            room_id = selected[0].text()
-            asyncio.create_task(
-                self.ws.send(json.dumps({"type": "join_room", "room_id": room_id}))
+        record = selected_record(self.room_list)
+        if record is not None:
+            self.outbox.send({"type": "join_room", "room_id": record.key})
+
+    def prompt_invite(self, from_user):
+        # Non-modal: frames keep flowing while the question is open
+        if from_user in self.invite_prompts:
+            return
+
+        def answer(accepted):
+            self.invite_prompts.pop(from_user, None)
+            log_event(
+                log,
+                logging.INFO,
+                "invite_answered",
+                sender=from_user,
+                accepted=accepted,
             )
+            self.outbox.send(
+                {"type": "invite_response", "from": from_user, "accepted": accepted}
+            )
+
+        self.invite_prompts[from_user] = ask(
+            "Invitation", f"You have been invited by {from_user}! Accept?", answer
+        )
+
+    def close_invite_prompts(self):
+        # Closing an open invite question declines it
+        for box in list(self.invite_prompts.values()):
+            box.close()
 
     def open_room(self, usernames):
-        print(f"[LobbyWindow] open_room called with: {usernames}")
+        log_event(log, logging.DEBUG, "open_room", usernames=usernames)
+        if self.waiting_notice is not None:
+            self.waiting_notice.close()
+            self.waiting_notice = None
         if len(usernames) == 2:
+            self.close_invite_prompts()
             opponent = [u for u in usernames if u != self.username][0]
             from game_window import GameClient
 
             self.game_window = GameClient(
-                self.ws.loop, self.ws, self.username, opponent, parent_lobby=self
+                asyncio.get_running_loop(),
+                self.outbox,
+                self.username,
+                opponent,
+                parent_lobby=self,
+                recorder=start_recording(self.username, opponent),
             )
             self.game_window.show()
             self.hide()
-            import asyncio, json
-
-            asyncio.create_task(self.ws.send(json.dumps({"type": "enter_room"})))
+            # The lobby is hidden during the match; stop lobby traffic until we return
+            self.outbox.send({"type": "lobby_unsubscribe"})
+            self.outbox.send({"type": "enter_room"})
         else:
-            QMessageBox.information(
-                None, "Room Created", "Waiting for another player to join..."
-            )
+            box = show_notice("Room Created", "Waiting for another player to join...")
+            # Deleted on close: once the user dismisses it, forget it
+            box.finished.connect(lambda _result: self.forget_waiting_notice(box))
+            self.waiting_notice = box
+
+    def forget_waiting_notice(self, box):
+        if self.waiting_notice is box:
+            self.waiting_notice = None
 
     def show_lobby(self):
-        print("[LobbyWindow] show_lobby called")
+        log_event(log, logging.DEBUG, "show_lobby")
+        if self.game_window:
+            # Back in the lobby: resume updates, starting with a fresh snapshot
+            self.outbox.send({"type": "lobby_subscribe"})
         self.show()
         if self.game_window:
             self.game_window.close()
             self.game_window = None
 
     def create_open_room(self):
-        asyncio.create_task(self.ws.send(json.dumps({"type": "create_room"})))
+        self.outbox.send({"type": "create_room"})
+
+    def send_failed(self, error):
+        # Called by the outbox when a write to the server fails. Later sends are
+        # dropped, so the notice is kept until closed and, mid-match (lobby
+        # hidden), the game window's status line says so too.
+        text = f"Could not send to the server: {error}"
+        self.send_failed_notice = show_notice("Connection Problem", text)
+        if self.game_window:
+            self.game_window.status_label.setText(text)
@@ -0,0 +1,53 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import bisect  # Binary search over the sorted keys
+
+
+# =========================================
+#         SORTED LOBBY INDEX
+# =========================================
+class SortedIndex:
+    """
+    Sorted list of names supporting paged reads and prefix search.
+    add/discard keep the list sorted with a binary search, and page() slices
+    the matching range directly instead of scanning every entry.
+    Duplicate keys are allowed; discard removes one occurrence.
+    """
+
+    def __init__(self):
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def add(self, key):
+        bisect.insort(self.keys, key)
+
+    def discard(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def prefix_range(self, prefix):
+        # Index range [lo, hi) of the keys starting with prefix
+        if not prefix:
+            return 0, len(self.keys)
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def page(self, prefix="", offset=0, limit=50):
+        # Returns (keys on the page, total number of keys matching the prefix)
+        lo, hi = self.prefix_range(prefix)
+        start = min(lo + offset, hi)
+        return self.keys[start : min(start + limit, hi)], hi - lo
+
+    def after(self, cursor, limit):
+        # Up to limit keys sorted after cursor (cursor-based paging; None starts at the top)
+        start = 0 if cursor is None else bisect.bisect_right(self.keys, cursor)
+        return self.keys[start : start + limit]
@@ -0,0 +1,140 @@
+# =========================================
+#              IMPORTS
+# =========================================
+from collections import namedtuple  # Light, comparable row records
+from PyQt6 import QtCore
+from PyQt6.QtCore import Qt
+
+# =========================================
+#         LOBBY RECORDS
+# =========================================
+# One row of the user list. Flags are worked out once when the record is built,
+# so selection and permission checks never parse the label.
+UserRecord = namedtuple(
+    "UserRecord", ["key", "label", "in_room", "rating", "is_self", "invitable"]
+)
+# One row of the open-room list
+RoomRecord = namedtuple("RoomRecord", ["key", "label", "users", "own", "joinable"])
+
+
+def user_record(entry, username):
+    # Build a UserRecord from a lobby_update users entry
+    name = entry["name"]
+    in_room = bool(entry.get("in_room"))
+    rating = entry.get("rating")
+    is_self = name == username
+    label = name
+    if is_self:
+        label += " (you)"
+    if in_room:
+        label += " (in room)"
+    if rating is not None:
+        label += f"  [{rating}]"
+    invitable = not is_self and not in_room
+    return UserRecord(name, label, in_room, rating, is_self, invitable)
+
+
+def room_record(entry, username):
+    # Build a RoomRecord from a lobby_update open_rooms entry
+    users = tuple(entry.get("users", ()))
+    own = username in users
+    joinable = len(users) == 1 and not own
+    return RoomRecord(entry["id"], entry["id"], users, own, joinable)
+
+
+# =========================================
+#         LIST MODEL (DIFF-BASED UPDATES)
+# =========================================
+class RecordListModel(QtCore.QAbstractListModel):
+    """
+    List model over records with a unique, sorted `key`.
+    set_records() compares the new page with the current rows and only emits
+    the row removals, insertions and changes in between, so views keep their
+    selection and scroll position and only repaint what changed.
+    """
+
+    RecordRole = Qt.ItemDataRole.UserRole  # The record itself
+    KeyRole = Qt.ItemDataRole.UserRole + 1  # The record's key (used for filtering)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return record.label
+        if role == self.RecordRole:
+            return record
+        if role == self.KeyRole:
+            return record.key
+        return None
+
+    def set_records(self, records):
+        keep = {record.key for record in records}
+        # 1. Remove rows that are gone, bottom-up, one contiguous run at a time
+        row = len(self.records) - 1
+        while row >= 0:
+            if self.records[row].key in keep:
+                row -= 1
+                continue
+            end = row
+            while row >= 0 and self.records[row].key not in keep:
+                row -= 1
+            self.beginRemoveRows(QtCore.QModelIndex(), row + 1, end)
+            del self.records[row + 1 : end + 1]
+            self.endRemoveRows()
+        # 2. The rows left must appear in the same order in the new list
+        old_keys = {record.key for record in self.records}
+        still_there = [r.key for r in records if r.key in old_keys]
+        if [r.key for r in self.records] != still_there:
+            self.beginResetModel()
+            self.records = list(records)
+            self.endResetModel()
+            return
+        # 3. Walk both lists: insert runs of new rows, refresh changed ones
+        row = i = 0
+        while i < len(records):
+            if row < len(self.records) and self.records[row].key == records[i].key:
+                if self.records[row] != records[i]:
+                    self.records[row] = records[i]
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index)
+                row += 1
+                i += 1
+                continue
+            start = i
+            while i < len(records) and (
+                row >= len(self.records) or records[i].key != self.records[row].key
+            ):
+                i += 1
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + i - start - 1)
+            self.records[row:row] = records[start:i]
+            self.endInsertRows()
+            row += i - start
+
+
+def make_filter_proxy(model):
+    # Proxy that hides rows whose key does not start with the search text
+    proxy = QtCore.QSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setFilterRole(RecordListModel.KeyRole)
+    return proxy
+
+
+def set_prefix_filter(proxy, text):
+    pattern = "^" + QtCore.QRegularExpression.escape(text) if text else ""
+    proxy.setFilterRegularExpression(pattern)
+
+
+def selected_record(view):
+    # Record of the selected row in a view over a (proxied) RecordListModel, or None
+    indexes = view.selectionModel().selectedIndexes()
+    if not indexes:
+        return None
+    return indexes[0].data(RecordListModel.RecordRole)
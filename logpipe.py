@@ -0,0 +1,119 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import atexit  # Flush the log queue on exit
+import json  # JSON encoding of log records
+import logging  # Standard logging levels and loggers
+import logging.handlers  # QueueHandler / QueueListener
+import os  # Environment-based configuration
+import queue  # Bounded record queue
+import sys  # Default output stream
+
+# =========================================
+#         LOGGING CONFIGURATION
+# =========================================
+# Hot paths log at DEBUG, so the default WARNING level keeps them silent
+LOG_LEVEL = os.environ.get("PYBAT_LOG_LEVEL", "WARNING").upper()
+# Keep one in this many sampled (per-message) debug records
+LOG_SAMPLE_EVERY = int(os.environ.get("PYBAT_LOG_SAMPLE_EVERY", "100"))
+# Records waiting for the writer thread; beyond this they are dropped, not blocked on
+LOG_QUEUE_SIZE = int(os.environ.get("PYBAT_LOG_QUEUE_SIZE", "10000"))
+LOG_FILE = os.environ.get("PYBAT_LOG_FILE", "")  # Write to this file instead of stderr
+
+_listener = None  # Background writer, started on first get_logger()
+
+
+# =========================================
+#         RECORD FORMATTING / FILTERING
+# =========================================
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line: ts, level, logger, event and any structured fields
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    # Lets through one in every N records marked as sampled; others always pass
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self.count = 0
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False):
+            return True
+        self.count += 1
+        return self.count % self.every == 1 or self.every == 1
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the caller: when the writer falls behind, records are dropped
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the writer thread; only resolve the message here
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# =========================================
+#         PIPELINE SETUP
+# =========================================
+def _start_pipeline():
+    global _listener
+    record_queue = queue.Queue(LOG_QUEUE_SIZE)
+    if LOG_FILE:
+        output = logging.FileHandler(LOG_FILE)
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(record_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+    handler = DroppingQueueHandler(record_queue)
+    handler.addFilter(SampleFilter(LOG_SAMPLE_EVERY))
+    root = logging.getLogger("pybat")
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+def get_logger(name):
+    """
+    Logger whose records are queued and written as JSON lines by a background thread.
+    Use log_event() for structured fields and sampling.
+    """
+    if _listener is None:
+        _start_pipeline()
+    return logging.getLogger(f"pybat.{name}")
+
+
+def log_event(logger, level, event, sampled=False, **fields):
+    """
+    Log a structured event. Returns immediately when the level is disabled,
+    so hot paths pay only for the level check. sampled=True marks per-message
+    records that are thinned out to one in PYBAT_LOG_SAMPLE_EVERY.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, event, extra={"fields": fields, "sampled": sampled})
@@ -1,12 +1,11 @@
 # =========================================
 #              IMPORTS
 # =========================================
-from qasync import run
-from main_async import main_async
+from main_async import main
 
 
 # =========================================
 #         MAIN ENTRY POINT
 # =========================================
 if __name__ == "__main__":
-    run(main_async())
+    main()
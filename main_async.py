@@ -1,51 +1,173 @@
+import os
 import sys
-import json
+import time
 import asyncio
+import logging
 from PyQt6 import QtWidgets
-from dialogs import NamePrompt
+from dialogs import NamePrompt, show_notice
 from lobby import LobbyWindow
 from handlers import handle_ws_messages
+from outbox import Outbox
 import websockets
-from qasync import QEventLoop, asyncSlot
+from qasync import QEventLoop
+from logpipe import get_logger, log_event
+from theme import apply_theme
+import latency
 
+log = get_logger("client.main")
 
-async def main_async():
-    print("[main_async] Starting QApplication")
-    app = QtWidgets.QApplication(sys.argv)
-    loop = QEventLoop(app)
-    asyncio.set_event_loop(loop)
+SERVER_URI = os.environ.get("PYBAT_SERVER_URI", "ws://localhost:8765")
+# The server drops a connection that sends no name within 10 s; a connection
+# opened while the name prompt is up is only used if it is younger than this
+PRECONNECT_MAX_AGE = 8
+# After a redirect the target may not be accepting yet: retry this many times,
+# waiting RECONNECT_BACKOFF seconds first and twice as long each time after
+RECONNECT_ATTEMPTS = 6
+RECONNECT_BACKOFF = 0.5
+RECONNECT_BACKOFF_MAX = 8
+
+
+async def preconnect(uri):
+    # Open the connection while the user is still typing their name
+    try:
+        ws = await websockets.connect(uri)
+    except Exception as e:
+        log_event(log, logging.INFO, "preconnect_failed", error=str(e))
+        return None
+    return ws, time.monotonic()
+
+
+async def take_connection(pending, uri):
+    # The connection opened during the prompt if it is still fresh, else a new one
+    if pending is not None:
+        opened = await pending
+        if opened is not None:
+            ws, opened_at = opened
+            if time.monotonic() - opened_at < PRECONNECT_MAX_AGE:
+                return ws
+            await ws.close()
+    return await websockets.connect(uri)
+
+
+async def drop_preconnect(pending):
+    # No name after all: close the connection opened meanwhile, or stop opening it
+    pending.cancel()  # Does nothing once the connect has finished
+    try:
+        opened = await pending
+    except asyncio.CancelledError:
+        return
+    if opened is not None:
+        ws, _ = opened
+        await ws.close()
+
+
+async def reconnect(uri):
+    # A new connection after a redirect, or None once every attempt failed
+    delay = RECONNECT_BACKOFF
+    for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+        try:
+            return await websockets.connect(uri)
+        except Exception as e:
+            log_event(
+                log,
+                logging.INFO,
+                "reconnect_failed",
+                attempt=attempt,
+                uri=uri,
+                error=str(e),
+            )
+        if attempt < RECONNECT_ATTEMPTS:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_BACKOFF_MAX)
+    return None
+
+
+async def wait_for_notice(title, text):
+    # Show a notice and return once the user closed it
+    closed = asyncio.get_running_loop().create_future()
+    box = show_notice(title, text)
+    box.finished.connect(lambda _: closed.done() or closed.set_result(None))
+    await closed
+
+
+async def ask_name():
+    # Non-blocking prompt: the event loop (and the connect) keeps running meanwhile
     prompt = NamePrompt()
-    print("[main_async] Showing NamePrompt dialog")
-    if prompt.exec() == QtWidgets.QDialog.DialogCode.Accepted:
-        username = prompt.get_name()
-        print(f"[main_async] Username entered: {username}")
-        if not username:
-            print("[main_async] No username entered, exiting.")
-            sys.exit()
-        print("[main_async] Connecting to websocket server...")
-        async with websockets.connect("ws://localhost:8765") as ws:
-            ws.loop = asyncio.get_event_loop()
-            print("[main_async] Connected to server, sending name...")
-            await ws.send(json.dumps({"name": username}))
-            print("[main_async] Name sent, creating LobbyWindow...")
-            lobby = LobbyWindow(ws, username)
-            lobby.show()
-            print("[main_async] LobbyWindow shown, entering handle_ws_messages loop...")
-            await handle_ws_messages(ws, lobby)
-            print(
-                "[main_async] handle_ws_messages returned (should not happen unless disconnect)"
+    answered = asyncio.get_running_loop().create_future()
+    prompt.accepted.connect(lambda: answered.done() or answered.set_result(True))
+    prompt.rejected.connect(lambda: answered.done() or answered.set_result(False))
+    log_event(log, logging.DEBUG, "showing_name_prompt")
+    prompt.open()
+    if not await answered:
+        log_event(log, logging.INFO, "name_prompt_cancelled")
+        return None
+    return prompt.get_name()
+
+
+async def main_async(username=None):
+    pending = asyncio.ensure_future(preconnect(SERVER_URI))
+    if username is None:
+        username = await ask_name()
+    log_event(log, logging.DEBUG, "username_entered", username=username)
+    if not username:
+        log_event(log, logging.INFO, "no_username_exiting")
+        await drop_preconnect(pending)
+        return
+    uri = SERVER_URI
+    lobby = None
+    log_event(log, logging.DEBUG, "connecting", uri=uri)
+    ws = await take_connection(pending, uri)
+    while True:
+        # Everything sent on this connection goes through its outbox, name first
+        outbox = Outbox(ws)
+        try:
+            log_event(log, logging.DEBUG, "connected")
+            outbox.send({"name": username})
+            if lobby is None:
+                lobby = LobbyWindow(outbox, username)
+                lobby.show()
+            else:
+                # Reconnected after a server drain: keep the same window and view
+                lobby.outbox = outbox
+                if lobby.view_prefix or lobby.view_offset:
+                    lobby.subscribe_view()
+            outbox.on_failed = lobby.send_failed
+            redirect = await handle_ws_messages(ws, lobby)
+        finally:
+            await outbox.close()
+            await ws.close()
+        if redirect is None:
+            log_event(log, logging.WARNING, "disconnected")
+            break
+        uri = redirect.get("url") or uri
+        await asyncio.sleep(redirect.get("retry_after", 1))
+        log_event(log, logging.DEBUG, "connecting", uri=uri)
+        ws = await reconnect(uri)
+        if ws is None:
+            log_event(log, logging.WARNING, "reconnect_gave_up", uri=uri)
+            await wait_for_notice(
+                "Connection Lost", "Could not reconnect to the server."
             )
-    else:
-        print("[main_async] NamePrompt dialog cancelled, exiting.")
-        sys.exit()
+            break
 
 
-if __name__ == "__main__":
-    print("[main_async] __main__ entry point")
+def main():
+    # The one QApplication and event loop of the client
+    log_event(log, logging.DEBUG, "starting_qapplication")
     app = QtWidgets.QApplication(sys.argv)
+    apply_theme(app)
     loop = QEventLoop(app)
     asyncio.set_event_loop(loop)
-    print("[main_async] Running main_async() in event loop")
-    loop.run_until_complete(main_async())
-    print("[main_async] Event loop finished, closing loop.")
-    loop.close()
+    if latency.tracker is not None:
+        latency.tracker.start(app)
+    with loop:
+        try:
+            loop.run_until_complete(main_async())
+        finally:
+            if latency.tracker is not None:
+                latency.tracker.stop()
+                latency.tracker.export()
+
+
+if __name__ == "__main__":
+    main()
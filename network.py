@@ -4,6 +4,10 @@
 import websockets  # WebSocket client
 import json  # JSON encoding/decoding
 import asyncio  # Asyncio event loop
+import logging  # Log levels
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("client.network")
 
 
 # =========================================
@@ -20,8 +24,8 @@ async def connect_to_server(uri, name="Player"):
         await websocket.send(json.dumps({"type": "name", "name": name}))
         return websocket
     except (websockets.ConnectionClosed, websockets.ConnectionClosedOK):
-        print("WebSocket connection closed cleanly during connect.")
+        log_event(log, logging.WARNING, "connect_closed")
         return None
     except Exception as e:
-        print(f"WebSocket connection error: {e}")
+        log_event(log, logging.WARNING, "connect_failed", error=str(e))
         return None
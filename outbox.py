@@ -0,0 +1,103 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Async event loop
+import json  # JSON encoding
+import logging  # Log levels
+import time  # Coalescing window
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("client.outbox")
+
+# Intents that mean the same thing when repeated back to back (a double click on
+# "Exit Room", a second reset...): an identical one right behind is dropped
+COALESCED_TYPES = (
+    "leave_room",
+    "enter_room",
+    "reset",
+    "resync",
+    "create_room",
+    "lobby_subscribe",
+    "lobby_unsubscribe",
+)
+COALESCE_SECONDS = 0.5  # How long an already written intent still absorbs repeats
+# Only the newest pending one matters (each replaces the view / answer before it)
+REPLACED_TYPES = ("lobby_view",)
+CLOSE_FLUSH_SECONDS = 1  # Time close() gives the writer to send what is pending
+
+
+# =========================================
+#         OUTBOUND QUEUE
+# =========================================
+class Outbox:
+    """
+    The one way the client sends to the server: messages are queued in order and
+    written by a single writer task, so sends never overtake each other and no
+    task is created per send. Each wake-up writes everything queued so far.
+    If a write fails the queue stops, drops what is pending and calls
+    on_failed(error) so the UI can say so; later sends are dropped (and logged).
+    """
+
+    def __init__(self, ws, on_failed=None):
+        self.ws = ws
+        self.on_failed = on_failed
+        self.pending = []  # Messages (dicts) not written yet
+        self.last_written = None  # (message, time) of the newest written message
+        self.failed = None
+        self.closing = False
+        self.wakeup = asyncio.Event()
+        self.writer = asyncio.ensure_future(self.write())
+
+    def send(self, data):
+        # Queue one message; returns False if it was dropped
+        msg_type = data.get("type")
+        if self.failed is not None or self.closing:
+            log_event(log, logging.INFO, "send_dropped", type=msg_type)
+            return False
+        if msg_type in COALESCED_TYPES and self.repeats_last(data):
+            log_event(log, logging.DEBUG, "send_coalesced", type=msg_type)
+            return True
+        if msg_type in REPLACED_TYPES:
+            self.pending = [p for p in self.pending if p.get("type") != msg_type]
+        self.pending.append(data)
+        self.wakeup.set()
+        return True
+
+    def repeats_last(self, data):
+        if self.pending:
+            return self.pending[-1] == data
+        if self.last_written is None:
+            return False
+        message, written_at = self.last_written
+        return message == data and time.monotonic() - written_at < COALESCE_SECONDS
+
+    async def write(self):
+        try:
+            while True:
+                if not self.pending:
+                    if self.closing:
+                        return
+                    await self.wakeup.wait()
+                    self.wakeup.clear()
+                    continue
+                batch, self.pending = self.pending, []
+                for data in batch:
+                    await self.ws.send(json.dumps(data))
+                    self.last_written = (data, time.monotonic())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed = e
+            self.pending = []
+            log_event(log, logging.WARNING, "send_failed", error=str(e))
+            if self.on_failed is not None and not self.closing:
+                self.on_failed(e)  # Not while the connection is being dropped anyway
+
+    async def close(self):
+        # Write what is still pending (briefly), then stop the writer
+        self.closing = True
+        self.wakeup.set()
+        try:
+            await asyncio.wait_for(self.writer, CLOSE_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            log_event(log, logging.INFO, "send_unflushed", pending=len(self.pending))
@@ -0,0 +1,241 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Async event loop
+import json  # JSON encoding of stats/settings columns
+import logging  # Log levels
+import sqlite3  # Embedded profile store
+import time  # Update timestamps
+from collections import OrderedDict  # LRU order
+from concurrent.futures import ThreadPoolExecutor  # Single disk thread
+from logpipe import get_logger, log_event  # Queued structured logging
+from ratings import INITIAL_RATING  # Rating of new players
+
+log = get_logger("profiles")
+
+
+def new_profile(name):
+    return {
+        "name": name,
+        "display_name": name,
+        "stats": {"matches": 0, "wins": 0, "losses": 0},
+        "settings": {},
+        "rating": INITIAL_RATING,
+    }
+
+
+# =========================================
+#         PROFILE STORE (LRU + WRITE-BEHIND)
+# =========================================
+class ProfileStore:
+    """
+    Persistent player profiles in SQLite with a bounded in-memory LRU in front.
+    - load() serves cached profiles without touching disk; misses that arrive
+      within load_window seconds are fetched together in one query on the disk thread.
+    - update() changes the cached copy and marks it dirty; dirty profiles (and
+      matches from log_match()) are written in one transaction every
+      flush_interval seconds (write-behind).
+    All SQLite work happens on a single background thread, never on the event loop.
+    """
+
+    def __init__(self, path, cache_size=10000, flush_interval=1.0, load_window=0.005):
+        self.path = path
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.load_window = load_window
+        self.cache = OrderedDict()  # Maps name to profile, least recently used first
+        self.dirty = {}  # Maps name to profile waiting to be written
+        self.match_log = []  # (a, b, winner, time) of finished matches waiting to be written
+        self.pending_loads = {}  # Maps name to the future its loaders are waiting on
+        self._load_handle = None
+        self._flush_task = None
+        self._updates = set()  # update() calls waiting for their profile to load
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._db = None
+
+    # --- Disk thread helpers ---
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "name TEXT PRIMARY KEY, display_name TEXT, stats TEXT, "
+                "settings TEXT, updated REAL, rating REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS matches ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, a TEXT, b TEXT, "
+                "winner TEXT, played REAL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(profiles)")}
+            if "rating" not in columns:  # Database from before ratings existed
+                self._db.execute("ALTER TABLE profiles ADD COLUMN rating REAL")
+        return self._db
+
+    def _read_many(self, names):
+        db = self._connect()
+        found = {}
+        for i in range(0, len(names), 500):  # Stay under SQLite's variable limit
+            chunk = names[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = db.execute(
+                "SELECT name, display_name, stats, settings, rating FROM profiles "
+                f"WHERE name IN ({marks})",
+                chunk,
+            )
+            for name, display_name, stats, settings, rating in rows:
+                found[name] = {
+                    "name": name,
+                    "display_name": display_name,
+                    "stats": json.loads(stats),
+                    "settings": json.loads(settings),
+                    "rating": INITIAL_RATING if rating is None else rating,
+                }
+        return found
+
+    def _write_many(self, profiles, matches):
+        db = self._connect()
+        now = time.time()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO profiles "
+                "(name, display_name, stats, settings, updated, rating) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        p["name"],
+                        p["display_name"],
+                        json.dumps(p["stats"]),
+                        json.dumps(p["settings"]),
+                        now,
+                        p["rating"],
+                    )
+                    for p in profiles
+                ],
+            )
+            db.executemany(
+                "INSERT INTO matches (a, b, winner, played) VALUES (?, ?, ?, ?)",
+                matches,
+            )
+
+    # --- Cache ---
+    def _remember(self, name, profile):
+        self.cache[name] = profile
+        self.cache.move_to_end(name)
+        while len(self.cache) > self.cache_size:
+            # Dirty profiles stay in self.dirty until flushed, so eviction loses nothing
+            self.cache.popitem(last=False)
+
+    def peek(self, name):
+        # Cached profile or None; never waits on disk (for per-round hot paths)
+        profile = self.cache.get(name)
+        if profile is None:
+            profile = self.dirty.get(name)
+        return profile
+
+    async def load(self, name):
+        profile = self.peek(name)
+        if profile is not None:
+            self._remember(name, profile)
+            return profile
+        future = self.pending_loads.get(name)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.pending_loads[name] = loop.create_future()
+            if self._load_handle is None:
+                self._load_handle = loop.call_later(
+                    self.load_window, lambda: asyncio.ensure_future(self._load_batch())
+                )
+        return await future
+
+    async def _load_batch(self):
+        self._load_handle = None
+        batch, self.pending_loads = self.pending_loads, {}
+        loop = asyncio.get_running_loop()
+        try:
+            found = await loop.run_in_executor(
+                self._executor, self._read_many, list(batch)
+            )
+        except Exception as e:
+            log_event(log, logging.ERROR, "profile_load_failed", error=str(e))
+            found = {}
+        for name, future in batch.items():
+            # A profile updated while its load was in flight wins over the disk copy
+            profile = self.peek(name) or found.get(name) or new_profile(name)
+            self._remember(name, profile)
+            if not future.done():
+                future.set_result(profile)
+        log_event(log, logging.DEBUG, "profiles_loaded", count=len(batch))
+
+    def update(self, name, stats=None, **fields):
+        """
+        Change a profile in memory and queue it for the next write-behind flush.
+        stats is a dict of counters to add, e.g. {"wins": 1}.
+        A profile that is not cached (evicted, or never loaded) is read from disk
+        first and changed once it is in: changing a blank one would overwrite the
+        stored row on the next flush. Returns the profile, or None in that case.
+        """
+        profile = self.peek(name)
+        if profile is None:
+            self._track(asyncio.ensure_future(self._update_loaded(name, stats, fields)))
+            return None
+        if stats:
+            for key, delta in stats.items():
+                profile["stats"][key] = profile["stats"].get(key, 0) + delta
+        profile.update(fields)
+        self._remember(name, profile)
+        self.dirty[name] = profile
+        self._schedule_flush()
+        return profile
+
+    async def _update_loaded(self, name, stats, fields):
+        await self.load(name)
+        self.update(name, stats, **fields)
+
+    def _track(self, task):
+        # Keep a reference until done; close() waits for these before its flush
+        self._updates.add(task)
+        task.add_done_callback(self._updates.discard)
+
+    def log_match(self, a, b, winner):
+        # Append a finished match to the history used by the offline rating recompute
+        self.match_log.append((a, b, winner, time.time()))
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        if not self.dirty and not self.match_log:
+            return
+        batch, self.dirty = list(self.dirty.values()), {}
+        matches, self.match_log = self.match_log, []
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write_many, batch, matches)
+        except Exception as e:
+            log_event(log, logging.ERROR, "profile_flush_failed", error=str(e))
+            for profile in batch:
+                # Keep them for the next attempt unless they changed again meanwhile
+                self.dirty.setdefault(profile["name"], profile)
+            self.match_log[:0] = matches
+            return
+        log_event(
+            log, logging.DEBUG, "profiles_flushed", count=len(batch), matches=len(matches)
+        )
+
+    async def close(self):
+        if self._updates:
+            await asyncio.gather(*self._updates, return_exceptions=True)
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.flush()
+        loop = asyncio.get_running_loop()
+        if self._db is not None:
+            await loop.run_in_executor(self._executor, self._db.close)
+        self._executor.shutdown(wait=True)
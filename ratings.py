@@ -0,0 +1,110 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import sqlite3  # Match history and profiles (offline recompute)
+import sys  # Command line arguments
+
+try:
+    import numpy as np  # Vectorized batch recompute (optional)
+except ImportError:
+    np = None
+
+# =========================================
+#         RATING CONFIGURATION
+# =========================================
+INITIAL_RATING = 1500.0  # Rating of a player with no matches
+K_FACTOR = 32.0  # Most rating points one match can move
+
+
+# =========================================
+#         INCREMENTAL (ONE MATCH)
+# =========================================
+def expected_score(rating, opponent_rating):
+    # Elo win probability of a player against an opponent
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def elo_update(rating_a, rating_b, score_a, k=K_FACTOR):
+    """
+    New ratings of both players after one match.
+    score_a is 1 if A won, 0 if A lost, 0.5 for a draw. O(1): only the two players change.
+    """
+    delta = k * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + delta, rating_b - delta
+
+
+# =========================================
+#         BATCH RECOMPUTE (MATCH HISTORY)
+# =========================================
+def recompute(matches, k=K_FACTOR, initial=INITIAL_RATING):
+    """
+    Replay a match history and return {name: rating}.
+    matches is a sequence of (a_name, b_name, score_a) in the order they were played.
+    Gives the same result as applying elo_update() to each match in turn.
+    """
+    matches = list(matches)
+    if np is None or not matches:
+        ratings = {}
+        for a, b, score_a in matches:
+            ratings[a], ratings[b] = elo_update(
+                ratings.get(a, initial), ratings.get(b, initial), score_a, k
+            )
+        return ratings
+    # Give each match a wave number after both players' previous matches.
+    # Matches in one wave share no player, so a wave is updated in one array step
+    # while every player still sees their own matches in order.
+    index = {}
+    a_idx = np.empty(len(matches), dtype=np.int64)
+    b_idx = np.empty(len(matches), dtype=np.int64)
+    score = np.empty(len(matches), dtype=np.float64)
+    wave = np.empty(len(matches), dtype=np.int64)
+    last_wave = []
+    for i, (a, b, score_a) in enumerate(matches):
+        for name in (a, b):
+            if name not in index:
+                index[name] = len(index)
+                last_wave.append(-1)
+        ai, bi = index[a], index[b]
+        w = max(last_wave[ai], last_wave[bi]) + 1
+        last_wave[ai] = last_wave[bi] = w
+        a_idx[i], b_idx[i], score[i], wave[i] = ai, bi, score_a, w
+    ratings = np.full(len(index), initial, dtype=np.float64)
+    order = np.argsort(wave, kind="stable")
+    bounds = np.searchsorted(wave[order], np.arange(wave.max() + 2))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        rows = order[start:end]
+        ai, bi = a_idx[rows], b_idx[rows]
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[bi] - ratings[ai]) / 400.0))
+        delta = k * (score[rows] - expected)
+        ratings[ai] += delta
+        ratings[bi] -= delta
+    return {name: float(ratings[i]) for name, i in index.items()}
+
+
+def recompute_store(path, k=K_FACTOR, initial=INITIAL_RATING):
+    """
+    Recompute every rating in a profile database from its match history.
+    Run it while the server is stopped: a running server would write its cached
+    ratings back over the recomputed ones.
+    """
+    db = sqlite3.connect(path)
+    rows = db.execute("SELECT a, b, winner FROM matches ORDER BY id")
+    history = [
+        (a, b, 1.0 if winner == a else 0.0 if winner == b else 0.5)
+        for a, b, winner in rows
+    ]
+    ratings = recompute(history, k, initial)
+    with db:
+        db.execute("UPDATE profiles SET rating = ?", (initial,))
+        db.executemany(
+            "UPDATE profiles SET rating = ? WHERE name = ?",
+            [(rating, name) for name, rating in ratings.items()],
+        )
+    db.close()
+    return len(history), len(ratings)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "profiles.db"
+    match_count, player_count = recompute_store(db_path)
+    print(f"Recomputed {player_count} ratings from {match_count} matches in {db_path}")
@@ -0,0 +1,159 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import asyncio  # Async event loop
+import json  # JSON decoding
+import logging  # Log levels
+import time  # Frame pacing
+from concurrent.futures import ThreadPoolExecutor  # Decoder thread
+from logpipe import get_logger, log_event  # Queued structured logging
+import latency  # Optional receive-to-paint timing
+
+log = get_logger("client.receive")
+
+UI_FRAME_SECONDS = 1 / 60  # Decoded messages are handed to the UI at most this often
+_decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+
+
+# =========================================
+#         DECODING / COALESCING
+# =========================================
+def decode_frames(raw_frames, received=None):
+    # Runs on the decoder thread; frames that are not JSON objects are dropped.
+    # With receive times (latency tracing), each message gets a "_trace" dict.
+    decoded = []
+    for i, raw in enumerate(raw_frames):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            if received is not None:
+                data["_trace"] = {
+                    "server": data.get("server_ts"),
+                    "received": received[i],
+                }
+            decoded.append(data)
+    return decoded
+
+
+def merge_updates(older, newer):
+    """
+    Combine two consecutive state updates into one, or return None if they can't be.
+    A full update replaces everything before it; a delta that directly follows
+    is folded in. merged_from keeps the first delta's seq so the game window can
+    still check that nothing was skipped.
+    """
+    if newer.get("full"):
+        return newer
+    if older.get("seq") is None or newer.get("seq") != older["seq"] + 1:
+        return None
+    merged = dict(older)
+    merged.update(newer)
+    if not older.get("full"):
+        merged["merged_from"] = older.get("merged_from", older["seq"])
+    return merged
+
+
+def coalesce(messages):
+    """
+    Drop messages a newer one in the same batch makes redundant.
+    Only the newest lobby_update is kept (each is a full snapshot of the view),
+    runs of consecutive updates are merged, and everything else (round results,
+    chat, invites...) is kept in order.
+    """
+    out = []
+    lobby_index = None
+    for data in messages:
+        msg_type = data.get("type")
+        if msg_type == "lobby_update":
+            if lobby_index is not None:
+                out[lobby_index] = None
+            lobby_index = len(out)
+        elif msg_type == "update" and out and out[-1] and out[-1]["type"] == "update":
+            merged = merge_updates(out[-1], data)
+            if merged is not None:
+                out[-1] = merged
+                continue
+        out.append(data)
+    return [data for data in out if data is not None]
+
+
+# =========================================
+#         RECEIVE PIPELINE
+# =========================================
+class ReceivePipeline:
+    """
+    Reads frames from the websocket as they arrive, decodes them off the GUI
+    thread and hands them to the UI in coalesced batches, once per UI frame.
+    However fast frames arrive, the UI does one batch of work per frame.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.raw = []  # Frames received since the last batch
+        self.received = [] if latency.tracker else None  # Their arrival times
+        self.closed = False
+        self.error = None
+        self.arrived = asyncio.Event()
+        self.reader = asyncio.ensure_future(self.read())
+        self.last_batch = 0.0
+
+    async def read(self):
+        try:
+            async for message in self.ws:
+                self.raw.append(message)
+                if self.received is not None:
+                    self.received.append(time.time())
+                self.arrived.set()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.closed = True
+            self.arrived.set()
+
+    async def batches(self):
+        # Yields lists of decoded, coalesced messages until the connection ends
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self.raw:
+                    if self.closed:
+                        if self.error is not None:
+                            log_event(
+                                log,
+                                logging.INFO,
+                                "receive_ended",
+                                error=str(self.error),
+                            )
+                        return
+                    await self.arrived.wait()
+                wait = self.last_batch + UI_FRAME_SECONDS - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)  # Let the rest of this frame's burst in
+                self.arrived.clear()
+                raw, self.raw = self.raw, []
+                received = self.received
+                if received is not None:
+                    self.received = []
+                if raw:
+                    decoded = await loop.run_in_executor(
+                        _decoder, decode_frames, raw, received
+                    )
+                    if received is not None:
+                        decoded_at = time.time()
+                        for data in decoded:
+                            data["_trace"]["decoded"] = decoded_at
+                    batch = coalesce(decoded)
+                    log_event(
+                        log,
+                        logging.DEBUG,
+                        "batch",
+                        sampled=True,
+                        frames=len(raw),
+                        messages=len(batch),
+                    )
+                    self.last_batch = time.monotonic()
+                    yield batch
+        finally:
+            self.reader.cancel()
@@ -0,0 +1,213 @@
+# =========================================
+#              IMPORTS
+# =========================================
+import json  # Frame encoding
+import logging  # Log levels
+import os  # Recordings directory
+import re  # File names
+import time  # Frame times
+from logpipe import get_logger, log_event  # Queued structured logging
+
+log = get_logger("client.recording")
+
+# =========================================
+#         RECORDING CONFIGURATION
+# =========================================
+# Every match is recorded unless PYBAT_RECORD=0
+RECORDING_ENABLED = os.environ.get("PYBAT_RECORD", "1") != "0"
+RECORDINGS_DIR = os.environ.get(
+    "PYBAT_RECORDINGS", os.path.join(os.path.expanduser("~"), ".pybat", "recordings")
+)
+RECORDING_SUFFIX = ".rec"
+RECORDING_VERSION = 1
+RECORDED_TYPES = ("update", "round_result", "chat", "game_over")
+UNRECORDED_FIELDS = ("type", "_trace", "server_ts")  # Type is kept outside the JSON
+CHECKPOINT_EVERY = 64  # Frames between the replay states a Recording keeps
+
+# File format: one JSON header line, then one line per frame,
+#   <ms since start> <type> <compact JSON of the other fields>
+# so the reader can index a file (times, types, offsets) without decoding it,
+# and a match cut short (crash, kill) is still readable up to its last line.
+
+
+# =========================================
+#         RECORDER
+# =========================================
+class MatchRecorder:
+    """
+    Streams the game frames of one match to a file as they are handled.
+    Each line is written and flushed at once; a write error stops the
+    recording (logged) without affecting the match.
+    """
+
+    def __init__(self, path, me, opponent):
+        self.path = path
+        self.started = time.monotonic()
+        self.file = open(path, "w", encoding="utf-8")
+        header = {
+            "version": RECORDING_VERSION,
+            "me": me,
+            "opponent": opponent,
+            "started": time.time(),
+        }
+        self.file.write(json.dumps(header) + "\n")
+        self.file.flush()
+
+    def record(self, data):
+        if self.file is None:
+            return
+        msg_type = data.get("type")
+        if msg_type not in RECORDED_TYPES:
+            return
+        fields = {k: v for k, v in data.items() if k not in UNRECORDED_FIELDS}
+        ms = int((time.monotonic() - self.started) * 1000)
+        try:
+            self.file.write(
+                f"{ms} {msg_type} {json.dumps(fields, separators=(',', ':'))}\n"
+            )
+            self.file.flush()
+        except OSError as e:
+            log_event(log, logging.WARNING, "recording_failed", error=str(e))
+            self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            log_event(log, logging.INFO, "recording_saved", path=self.path)
+
+
+def start_recording(me, opponent, directory=RECORDINGS_DIR):
+    # A recorder for a new match, or None if recording is off or not possible
+    if not RECORDING_ENABLED:
+        return None
+    name = "-".join(
+        (time.strftime("%Y%m%d-%H%M%S"), safe_name(me), "vs", safe_name(opponent))
+    )
+    try:
+        os.makedirs(directory, exist_ok=True)
+        return MatchRecorder(
+            os.path.join(directory, name + RECORDING_SUFFIX), me, opponent
+        )
+    except OSError as e:
+        log_event(log, logging.WARNING, "recording_unavailable", error=str(e))
+        return None
+
+
+def safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.]+", "_", name)[:32] or "player"
+
+
+# =========================================
+#         REPLAY STATE
+# =========================================
+def initial_state():
+    return {
+        "round": 0,
+        "hp": 3,
+        "opponent_hp": 3,
+        "loaded": False,
+        "opponent_loaded": False,
+        "block_points": 3,
+        "over": False,  # Game over (winner None and over True: a draw)
+        "winner": None,
+        "your_action": None,
+        "opponent_action": None,
+    }
+
+
+def apply_frame(state, data):
+    """
+    Match state after one recorded frame (a new dict; state is not changed).
+    Updates are applied field by field like in the game window; block points,
+    which the client keeps itself, follow from the recorded own actions.
+    """
+    state = dict(state)
+    msg_type = data.get("type")
+    if msg_type == "round_result":
+        apply_update(state, data.get("update", {}))
+        state["your_action"] = data.get("your_action")
+        state["opponent_action"] = data.get("opponent_action")
+        if state["your_action"] == "block":
+            state["block_points"] = max(0, state["block_points"] - 1)
+        else:
+            state["block_points"] = min(3, state["block_points"] + 1)
+        if "winner" in data:
+            state["winner"] = data["winner"]
+            state["over"] = True
+    elif msg_type == "update":
+        apply_update(state, data)
+        if data.get("round") == 1:
+            # A new game of the match (start or reset)
+            state.update(
+                over=False,
+                winner=None,
+                block_points=3,
+                your_action=None,
+                opponent_action=None,
+            )
+    elif msg_type == "game_over":
+        state["winner"] = data.get("winner")
+        state["over"] = True
+    return state
+
+
+def apply_update(state, update):
+    for key in ("round", "hp", "opponent_hp", "loaded", "opponent_loaded"):
+        if key in update:
+            state[key] = update[key]
+
+
+# =========================================
+#         RECORDING READER
+# =========================================
+class Recording:
+    """
+    A recording opened for replay. Opening only indexes the file (time, type
+    and offset of each frame); frames are decoded when asked for, and the
+    state at a position is folded from the nearest checkpoint before it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.header = json.loads(self.file.readline())
+        self.times = []  # ms since the start, per frame
+        self.types = []
+        self.offsets = []
+        offset = self.file.tell()
+        for line in iter(self.file.readline, b""):
+            if line.endswith(b"\n"):  # Else cut off mid-write
+                ms, msg_type, _ = line.split(b" ", 2)
+                self.times.append(int(ms))
+                self.types.append(msg_type.decode())
+                self.offsets.append(offset)
+            offset += len(line)
+        self.checkpoints = [initial_state()]  # State before frame i*CHECKPOINT_EVERY
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        self.file.close()
+
+    def frame(self, index):
+        self.file.seek(self.offsets[index])
+        _, msg_type, body = self.file.readline().split(b" ", 2)
+        data = json.loads(body)
+        data["type"] = msg_type.decode()
+        return data
+
+    def state_at(self, position):
+        # State once the first `position` frames are applied
+        index = min(position // CHECKPOINT_EVERY, len(self.checkpoints) - 1)
+        state = self.checkpoints[index]
+        for i in range(index * CHECKPOINT_EVERY, position):
+            state = apply_frame(state, self.frame(i))
+            if i + 1 == len(self.checkpoints) * CHECKPOINT_EVERY:
+                self.checkpoints.append(state)
+        return state
+
+    def round_starts(self):
+        # Positions just before each round_result: where "next round" stops
+        return [i for i, t in enumerate(self.types) if t == "round_result"]
@@ -0,0 +1,205 @@
+"""
+Replay viewer for recorded matches (see recording.py).
+
+    python replay.py                      # pick a recording
+    python replay.py path/to/match.rec
+"""
+
+# =========================================
+#              IMPORTS
+# =========================================
+import sys  # Command line
+import time  # Playback budget
+from PyQt6 import QtWidgets  # Widgets
+from PyQt6.QtCore import Qt, QTimer  # Playback timer
+from game_window import GameClient  # Shows the recorded states
+from recording import RECORDING_SUFFIX, RECORDINGS_DIR, Recording, apply_frame
+from theme import apply_theme  # Same look as the client
+
+SPEEDS = (1, 10, 100)  # Playback speed choices
+MAX_GAP_MS = 3000  # Idle time between two frames is shortened to this (at 1x)
+TICK_BUDGET_SECONDS = 0.008  # Frames applied per playback tick before showing
+REPLAY_CHAT_FRAMES = 200  # Recorded frames the chat is rebuilt from after a jump
+
+
+# =========================================
+#         REPLAY WINDOW
+# =========================================
+class ReplayWindow(QtWidgets.QWidget):
+    """
+    A read-only game window over a recording, with play / pause, speed, round
+    steps and a scrub slider. Positions are applied as whole states through
+    GameClient.show_replay_state: fast-forward and jumps never go through the
+    live update path, so no label flashes or timers are run per frame.
+    """
+
+    def __init__(self, recording):
+        super().__init__()
+        self.recording = recording
+        header = recording.header
+        self.setWindowTitle(f"Replay - {header['me']} vs {header['opponent']}")
+        self.game = GameClient(None, None, header["me"], header["opponent"])
+        for widget in (
+            self.game.submit_btn,
+            self.game.reset_btn,
+            self.game.send_btn,
+            self.game.message_input,
+        ):
+            widget.setEnabled(False)
+        self.game.exit_room_btn.hide()
+        self.game.disable_buttons()
+        self.position = 0  # Frames applied
+        self.state = recording.state_at(0)
+        self.speed = SPEEDS[-1]
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.play_tick)
+        self.play_button = QtWidgets.QPushButton("Play")
+        self.play_button.clicked.connect(self.toggle_play)
+        self.prev_button = QtWidgets.QPushButton("<< Round")
+        self.prev_button.clicked.connect(lambda: self.step_round(-1))
+        self.next_button = QtWidgets.QPushButton("Round >>")
+        self.next_button.clicked.connect(lambda: self.step_round(1))
+        self.speed_box = QtWidgets.QComboBox()
+        self.speed_box.addItems([f"{speed}x" for speed in SPEEDS])
+        self.speed_box.setCurrentIndex(len(SPEEDS) - 1)
+        self.speed_box.currentIndexChanged.connect(self.set_speed)
+        self.slider = QtWidgets.QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, len(recording))
+        self.slider.valueChanged.connect(self.seek)
+        self.position_label = QtWidgets.QLabel("")
+        controls = QtWidgets.QHBoxLayout()
+        for widget in (
+            self.prev_button,
+            self.play_button,
+            self.next_button,
+            self.speed_box,
+        ):
+            controls.addWidget(widget)
+        controls.addWidget(self.slider, stretch=1)
+        controls.addWidget(self.position_label)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.game)
+        layout.addLayout(controls)
+        self.rounds = recording.round_starts()
+        self.show_position()
+
+    def apply_next(self):
+        # One frame forward: state plus its chat lines
+        data = self.recording.frame(self.position)
+        self.state = apply_recorded(self.game, self.state, data)
+        self.position += 1
+
+    def show_position(self):
+        self.game.show_replay_state(self.state)
+        self.slider.blockSignals(True)
+        self.slider.setValue(self.position)
+        self.slider.blockSignals(False)
+        seconds = self.recording.times[self.position - 1] / 1000 if self.position else 0
+        self.position_label.setText(
+            f"{self.position}/{len(self.recording)}  {seconds:6.1f}s"
+        )
+
+    def seek(self, position):
+        # Jump: take the state from the recording, rebuild the recent chat
+        self.position = position
+        self.state = self.recording.state_at(position)
+        self.game.chat_log.clear()
+        state = self.recording.state_at(max(0, position - REPLAY_CHAT_FRAMES))
+        for i in range(max(0, position - REPLAY_CHAT_FRAMES), position):
+            state = apply_recorded(self.game, state, self.recording.frame(i))
+        self.show_position()
+
+    def step_round(self, step):
+        if step > 0:
+            later = [i + 1 for i in self.rounds if i + 1 > self.position]
+            target = later[0] if later else len(self.recording)
+        else:
+            earlier = [i + 1 for i in self.rounds if i + 1 < self.position]
+            target = earlier[-1] if earlier else 0
+        self.seek(target)
+
+    def set_speed(self, index):
+        self.speed = SPEEDS[index]
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.play_button.setText("Play")
+            return
+        if self.position >= len(self.recording):
+            self.seek(0)
+        self.play_button.setText("Pause")
+        self.timer.start(0)
+
+    def play_tick(self):
+        # Apply every frame that is due (within a time budget), then show once
+        started = time.perf_counter()
+        times = self.recording.times
+        delay = 0
+        while self.position < len(times):
+            self.apply_next()
+            if self.position == len(times):
+                break
+            gap = times[self.position] - times[self.position - 1]
+            delay = min(gap, MAX_GAP_MS) / self.speed
+            if delay >= 1 or time.perf_counter() - started > TICK_BUDGET_SECONDS:
+                break
+        self.show_position()
+        if self.position < len(self.recording):
+            self.timer.start(int(delay))
+        else:
+            self.play_button.setText("Play")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.recording.close()
+        super().closeEvent(event)
+
+
+def apply_recorded(game, state, data):
+    # Recorded frame -> new state; the chat lines it produced are appended
+    new_state = apply_frame(state, data)
+    msg_type = data["type"]
+    if msg_type == "round_result":
+        my_result, opp_result = game.get_action_results(
+            new_state["your_action"], new_state["opponent_action"]
+        )
+        game.append_chat_message(
+            "You",
+            my_result,
+            highlight="action",
+            round_sep=True,
+            round_number=new_state["round"],
+        )
+        game.append_chat_message("Enemy", opp_result, highlight="action")
+    elif msg_type == "chat":
+        sender = data.get("sender", "Enemy")
+        game.append_chat_message(
+            "Enemy" if sender == "Player" else sender, data.get("message", "")
+        )
+    if new_state["over"] and not state["over"]:
+        game.append_chat_message("", "", match_end_sep=True)
+    return new_state
+
+
+def choose_recording():
+    path, _ = QtWidgets.QFileDialog.getOpenFileName(
+        None, "Open recording", RECORDINGS_DIR, f"Recordings (*{RECORDING_SUFFIX})"
+    )
+    return path or None
+
+
+def main():
+    app = QtWidgets.QApplication(sys.argv)
+    apply_theme(app)
+    path = sys.argv[1] if len(sys.argv) > 1 else choose_recording()
+    if path is None:
+        return
+    window = ReplayWindow(Recording(path))
+    window.show()
+    app.exec()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The client and server modules live at the top of the repository
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # game-server.py is a script (hyphenated name), so it is loaded by path
+    pytest.importorskip("websockets")
+    monkeypatch.setenv("PYBAT_PROFILE_DB", str(tmp_path / "profiles.db"))
+    spec = importlib.util.spec_from_file_location(
+        "game_server", os.path.join(ROOT, "game-server.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
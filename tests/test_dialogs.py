@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from dialogs import show_notice  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def open_boxes():
+    return [
+        w.text()
+        for w in QtWidgets.QApplication.topLevelWidgets()
+        if isinstance(w, QtWidgets.QMessageBox) and w.isVisible()
+    ]
+
+
+def test_dropped_notice_stays_open_until_closed(app):
+    show_notice("Invite Accepted", "bob accepted your invitation!")  # Not kept
+    app.processEvents()
+    assert "bob accepted your invitation!" in open_boxes()
+    for w in QtWidgets.QApplication.topLevelWidgets():
+        if isinstance(w, QtWidgets.QMessageBox):
+            w.close()
+    app.processEvents()
+    assert open_boxes() == []
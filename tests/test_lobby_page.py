@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+
+def test_rooms_are_paged_apart_from_users(server):
+    for i in range(120):
+        server.USER_INDEX.add(f"user{i:03}")
+    for i in range(3):
+        server.add_open_room(f"user{i:03}'s room", [f"user{i:03}"])
+    # Second page of users, first page of rooms
+    page = server.lobby_page(("user", 50, 50, 0, 50), False)
+    assert len(page["users"]) == 50
+    assert page["more"] is True
+    assert [room["id"] for room in page["open_rooms"]] == [
+        "user000's room",
+        "user001's room",
+        "user002's room",
+    ]
+    assert page["more_rooms"] is False
+    page = server.lobby_page(("user", 100, 50, 2, 1), False)
+    assert len(page["users"]) == 20
+    assert page["more"] is False
+    assert [room["id"] for room in page["open_rooms"]] == ["user002's room"]
+
+
+class Socket:
+    def __init__(self, blocked=None):
+        self.blocked = blocked
+        self.sent = []
+
+    async def send(self, message):
+        if self.blocked is not None:
+            await self.blocked.wait()
+        self.sent.append(json.loads(message)["type"])
+
+
+def test_lobby_changes_are_coalesced_and_sent_concurrently(server):
+    server.LOBBY_UPDATE_SECONDS = 0.01
+
+    async def run():
+        blocked = asyncio.Event()
+        slow = Socket(blocked)
+        fast = [Socket() for _ in range(3)]
+        for i, ws in enumerate([slow, *fast]):
+            server.open_session(ws, f"user{i}")
+        for _ in range(5):
+            await server.notify_lobby()  # Returns without sending anything
+        assert not any(ws.sent for ws in fast)
+        await asyncio.sleep(0.05)
+        # One push for the five changes, not held up by the slow client
+        assert [ws.sent.count("lobby_update") for ws in fast] == [1, 1, 1]
+        assert slow.sent == []
+        blocked.set()
+        await server.lobby_task
+        return slow
+
+    slow = asyncio.run(run())
+    assert slow.sent.count("lobby_update") == 1
@@ -0,0 +1,38 @@
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from lobby import LobbyWindow  # noqa: E402
+from outbox import Outbox  # noqa: E402
+
+
+class BrokenConnection:
+    async def send(self, message):
+        raise ConnectionError("connection reset")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_send_failure_is_shown(app):
+    async def run():
+        outbox = Outbox(BrokenConnection())
+        lobby = LobbyWindow(outbox, "alice")
+        outbox.on_failed = lobby.send_failed
+        assert outbox.send({"type": "create_room"})
+        await outbox.writer
+        assert not outbox.send({"type": "create_room"})  # Dropped after the failure
+        return lobby
+
+    lobby = asyncio.run(run())
+    app.processEvents()
+    notice = lobby.send_failed_notice
+    assert notice.isVisible()
+    assert "connection reset" in notice.text()
+    notice.close()
@@ -0,0 +1,29 @@
+import asyncio
+import sqlite3
+
+from profiles import ProfileStore
+
+
+def stored_stats(path, name):
+    db = sqlite3.connect(path)
+    row = db.execute("SELECT stats FROM profiles WHERE name = ?", (name,)).fetchone()
+    db.close()
+    return row[0]
+
+
+def test_update_after_eviction_keeps_stored_profile(tmp_path):
+    path = str(tmp_path / "profiles.db")
+
+    async def run():
+        store = ProfileStore(path, cache_size=1, flush_interval=60)
+        await store.load("alice")
+        for _ in range(5):
+            store.update("alice", stats={"matches": 1, "wins": 1})
+        await store.flush()
+        await store.load("bob")  # Evicts alice from the one-entry cache
+        assert store.peek("alice") is None
+        store.update("alice", stats={"matches": 1, "losses": 1})
+        await store.close()
+
+    asyncio.run(run())
+    assert stored_stats(path, "alice") == '{"matches": 6, "wins": 5, "losses": 1}'
@@ -0,0 +1,33 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+qasync = pytest.importorskip("qasync")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "bench"))
+from prompt_latency import percentile, run  # noqa: E402
+
+RATE = 100  # Frames per second
+SECONDS = 1  # Per phase
+# A blocking prompt would hold every frame until answered (here: the whole phase)
+ALLOWED_EXTRA_MS = 50
+
+
+def test_receive_latency_stays_flat_while_prompt_is_open():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    try:
+        latencies, prompt_open = loop.run_until_complete(run(RATE, SECONDS))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    baseline, during = latencies["no prompt"], latencies["prompt open"]
+    assert prompt_open  # Still unanswered at the end, so it was open throughout
+    assert len(during) >= len(baseline) * 0.8  # Frames kept being handled
+    assert percentile(during, 50) <= percentile(baseline, 50) + ALLOWED_EXTRA_MS
+    assert percentile(during, 99) <= percentile(baseline, 99) + ALLOWED_EXTRA_MS
@@ -0,0 +1,43 @@
+import asyncio
+
+
+class Socket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def test_room_ended_by_its_own_handler_with_full_inbox(server):
+    async def run():
+        a, b = Socket(), Socket()
+        server.players[a] = server.new_player("a")
+        server.players[b] = server.new_player("b")
+        room_id = server.open_game_room(a, b)
+        actor = server.ROOM_ACTORS[room_id]
+        inbox_full = asyncio.Event()
+
+        async def end_room(ws, data):
+            # Like a peer's socket closing mid-send: the room ends from its own task
+            await inbox_full.wait()
+            await server.end_game_room(room_id, ws)
+
+        async def noop(ws, data):
+            pass
+
+        await actor.post(end_room, a, {"type": "submit"})
+        await asyncio.sleep(0)  # The actor is now inside end_room
+        for _ in range(server.ROOM_INBOX_SIZE):
+            await actor.post(noop, a, {"type": "submit"})
+        late = asyncio.ensure_future(actor.post(noop, b, {"type": "submit"}))
+        await asyncio.sleep(0)
+        assert not late.done()  # Waiting for space in the full inbox
+        inbox_full.set()
+        await asyncio.wait_for(actor.task, 1)
+        await asyncio.wait_for(late, 1)
+        return room_id
+
+    room_id = asyncio.run(run())
+    assert room_id not in server.rooms
+    assert room_id not in server.ROOM_ACTORS
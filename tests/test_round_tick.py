@@ -0,0 +1,37 @@
+import asyncio
+import json
+
+
+class SlowSocket:
+    # A client socket whose first send yields, so a flush is in flight meanwhile
+    def __init__(self, on_first_send=None):
+        self.on_first_send = on_first_send
+        self.sent = []
+
+    async def send(self, message):
+        if self.on_first_send is not None:
+            on_first_send, self.on_first_send = self.on_first_send, None
+            await on_first_send()
+        self.sent.append(json.loads(message))
+
+
+def test_frames_queued_during_flush_are_sent(server):
+    server.ROUND_TICK_SECONDS = 0.001
+    server.ROUND_BATCH_MIN_ROOMS = 0  # Always batch
+
+    async def run():
+        second = SlowSocket()
+
+        async def queue_second_room():
+            # Another room resolves while the first tick is still writing
+            await server.queue_frames([(second, {"type": "update", "room": 2})])
+
+        first = SlowSocket(on_first_send=queue_second_room)
+        await server.queue_frames([(first, {"type": "update", "room": 1})])
+        await asyncio.wait_for(server.round_tick_task, 1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.sent == [{"type": "update", "room": 1}]
+    assert second.sent == [{"type": "update", "room": 2}]
+    assert server.PENDING_FRAMES == []
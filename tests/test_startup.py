@@ -0,0 +1,42 @@
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt6.QtWidgets")
+pytest.importorskip("qasync")
+websockets = pytest.importorskip("websockets")
+
+import main_async  # noqa: E402
+
+
+@pytest.mark.parametrize("prompt_seconds", [0, 0.3])
+def test_cancelled_name_prompt_closes_the_preconnection(monkeypatch, prompt_seconds):
+    # 0: cancelled while connecting; 0.3: cancelled once the connection is open
+    async def run():
+        opened = 0
+        closed = asyncio.Event()
+
+        async def handler(ws):
+            nonlocal opened
+            opened += 1
+            await ws.wait_closed()
+            closed.set()
+
+        async def ask_name():
+            await asyncio.sleep(prompt_seconds)
+            return None
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setattr(main_async, "SERVER_URI", f"ws://127.0.0.1:{port}")
+            monkeypatch.setattr(main_async, "ask_name", ask_name)
+            await main_async.main_async()
+            if opened:
+                await asyncio.wait_for(closed.wait(), 1)
+        return opened
+
+    opened = asyncio.run(run())
+    if prompt_seconds:
+        assert opened == 1  # Open before the cancel, and closed by it
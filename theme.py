@@ -0,0 +1,169 @@
+# =========================================
+#              IMPORTS
+# =========================================
+from PyQt6.QtWidgets import QApplication  # The application the theme is set on
+
+# =========================================
+#         APPLICATION STYLESHEET
+# =========================================
+# Parsed once, when the application starts. Widgets are matched by object name
+# and by dynamic properties:
+#   role      fixed kind of button ("action", "danger", "go"), set at creation
+#   selected  action button picked for this round
+#   flash     label briefly highlighted (hp lost)
+#   result    game area border once a match is over ("victory", "defeat", ...)
+# State changes go through set_state(), which only re-polishes the one widget
+# instead of handing Qt a new stylesheet string to parse.
+# Game rules are scoped to #GameClient so the lobby and dialogs keep the default look.
+APP_STYLESHEET = """
+#GameClient {
+    border: none;
+}
+#GameClient, #GameClient QWidget {
+    background-color: #222;
+    color: #fff;
+}
+#GameClient QPushButton {
+    background-color: #333;
+    color: #fff;
+    border-radius: 6px;
+    padding: 8px 0;
+}
+#GameClient QPushButton:disabled {
+    background-color: #444;
+    color: #888;
+}
+#GameClient QLineEdit, #GameClient QTextEdit {
+    background-color: #181818;
+    color: #fff;
+    border: 1px solid #444;
+    border-radius: 4px;
+}
+#GameClient QFrame#GameArea, #GameClient QFrame#ChatArea {
+    background: #181818;
+    border-radius: 10px;
+    border: none;
+}
+#GameClient QFrame#GameArea[result="victory"] {
+    border: 4px solid #00ff00;
+}
+#GameClient QFrame#GameArea[result="defeat"] {
+    border: 4px solid #ff0000;
+}
+#GameClient QFrame#GameArea[result="draw"] {
+    border: 4px solid #FFD600;
+}
+#GameClient QFrame#GameArea[result="over"] {
+    border: 4px solid #888888;
+}
+#GameClient QFrame#StatusBox, #GameClient QFrame#StatusBox QLabel {
+    background: #181818;
+    border-radius: 2px;
+    margin-bottom: 2px;
+    padding: 0 12px;
+    min-height: 0;
+}
+#GameClient QFrame#StatusBox QLabel#StatusLabel {
+    padding: 0;
+    margin: 0;
+}
+#GameClient QFrame#GameAreaFrame {
+    background: #444;
+    border-radius: 8px;
+    padding: 4px;
+    border: 4px solid #000;
+}
+#GameClient QLabel#RoundLabel {
+    font-size: 16px;
+    color: #ffcc00;
+    margin: 8px 0;
+}
+#GameClient QLabel#BlockPoints {
+    font-size: 18px;
+    color: #00bcd4;
+    margin: 4px 0;
+}
+#GameClient QLabel[flash="true"] {
+    background-color: red;
+    color: white;
+}
+#GameClient QPushButton[role="action"] {
+    background-color: #222;
+    color: #fff;
+    font-size: 18px;
+    font-weight: bold;
+    border-radius: 8px;
+    padding: 12px 0;
+    margin: 0 4px;
+}
+#GameClient QPushButton[role="action"]:disabled {
+    background-color: #444;
+    color: #888;
+}
+#GameClient QPushButton[role="action"][selected="true"] {
+    background-color: #ffcc00;
+    color: #222;
+    border: 2px solid #fff;
+}
+#GameClient QTextEdit#ChatDisplay {
+    margin-bottom: 12px;
+    margin-top: 12px;
+}
+#GameClient QPushButton#HideGameToggle {
+    background: transparent;
+    border: none;
+    color: transparent;
+    font-size: 14px;
+    padding: 2px 6px;
+    margin-top: 8px;
+}
+#GameClient QPushButton#HideGameToggle:hover {
+    background: #222;
+    border: 2px solid #ffcc00;
+    border-radius: 6px;
+    color: #ffcc00;
+}
+QPushButton[role="danger"], #GameClient QPushButton[role="danger"] {
+    background-color: #c62828;
+    color: white;
+    font-weight: bold;
+    border-radius: 6px;
+    padding: 8px 0;
+}
+QPushButton[role="danger"]:disabled, #GameClient QPushButton[role="danger"]:disabled {
+    background-color: #888;
+    color: #eee;
+}
+#GameClient QPushButton#ExitRoomButton {
+    margin-top: 16px;
+}
+QLabel#LatencyOverlay {
+    background-color: rgba(0, 0, 0, 200);
+    color: #0f0;
+    font-family: monospace;
+    font-size: 11px;
+    padding: 6px;
+}
+QPushButton[role="go"]:enabled {
+    background-color: #43a047;
+    color: white;
+    font-weight: bold;
+    border-radius: 6px;
+    padding: 8px 0;
+}
+"""
+
+
+def apply_theme(app=None):
+    # Set the stylesheet once for the whole application
+    (app or QApplication.instance()).setStyleSheet(APP_STYLESHEET)
+
+
+def set_state(widget, name, value):
+    # Change a dynamic property the stylesheet matches on; no-op if unchanged
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
@@ -26,9 +26,7 @@ def create_main_ui(self):
     status_box = QFrame()  # Frame for status label
     status_box.setFrameShape(QFrame.Shape.StyledPanel)
     status_box.setFrameShadow(QFrame.Shadow.Raised)
-    status_box.setStyleSheet(
-        "QFrame { background: #181818; border-radius: 2px; margin-bottom: 2px; padding: 0 12px; min-height: 0; }"
-    )
+    status_box.setObjectName("StatusBox")
     status_layout = QHBoxLayout(status_box)
     status_layout.setContentsMargins(0, 0, 0, 0)
     status_layout.setSpacing(0)
@@ -37,7 +35,7 @@ def create_main_ui(self):
     )
     self.status_label = QLabel("Connecting to server...")  # Status text
     self.status_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-    self.status_label.setStyleSheet("padding: 0; margin: 0;")
+    self.status_label.setObjectName("StatusLabel")
     status_layout.addWidget(self.status_label)
     status_row.addWidget(status_box, stretch=0)
     status_row.addStretch(1)  # Right column stretch for centering
@@ -92,9 +90,6 @@ def create_main_ui(self):
     # --- Game Area Frame (Main Game Board) ---
     self.game_area_frame = QFrame()
     self.game_area_frame.setObjectName("GameAreaFrame")
-    self.game_area_frame.setStyleSheet(
-        "QFrame#GameAreaFrame { background: #444; border-radius: 8px; padding: 4px; border: 4px solid #000; }"
-    )
     self.game_area_frame.setMinimumHeight(120)
     layout.addWidget(self.game_area_frame, stretch=1)
 
@@ -104,7 +99,7 @@ def create_main_ui(self):
     self.round_label.setAlignment(
         Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
     )
-    self.round_label.setStyleSheet("font-size: 16px; color: #ffcc00; margin: 8px 0;")
+    self.round_label.setObjectName("RoundLabel")
     round_row.addWidget(self.round_label)
     round_row.addStretch(1)
     layout.addLayout(round_row)
@@ -119,22 +114,7 @@ def create_main_ui(self):
     self.reset_btn = QPushButton("Reset")
     self.hide_game_btn = QPushButton(">")
     self.hide_game_btn.setCheckable(True)
-    # Restore original button styles
-    btn_style = (
-        "QPushButton {"
-        "  background-color: #222;"
-        "  color: #fff;"
-        "  font-size: 18px;"
-        "  font-weight: bold;"
-        "  border-radius: 8px;"
-        "  padding: 12px 0;"
-        "  margin: 0 4px;"
-        "}"
-        "QPushButton:disabled {"
-        "  background-color: #444;"
-        "  color: #888;"
-        "}"
-    )
+    # Styled by the application theme (theme.py) through their role
     for btn in [
         self.attack_btn,
         self.block_btn,
@@ -143,7 +123,7 @@ def create_main_ui(self):
         self.reset_btn,
         self.hide_game_btn,
     ]:
-        btn.setStyleSheet(btn_style)
+        btn.setProperty("role", "action")
     self.attack_btn.setMinimumWidth(90)
     self.block_btn.setMinimumWidth(90)
     self.load_btn.setMinimumWidth(90)
@@ -161,9 +141,7 @@ def create_main_ui(self):
     # --- Block Points Row (Shield Emojis) ---
     self.block_points_label = QLabel()
     self.block_points_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-    self.block_points_label.setStyleSheet(
-        "font-size: 18px; color: #00bcd4; margin: 4px 0;"
-    )
+    self.block_points_label.setObjectName("BlockPoints")
     layout.addWidget(self.block_points_label)
 
     # --- Block Points Display Helper Function ---
@@ -178,45 +156,3 @@ def create_main_ui(self):
     self.block_points_label.setText(block_points_to_emojis(3))
 
     return layout
-
-
-# =========================================
-#         DARK THEME STYLESHEET
-# =========================================
-def apply_dark_theme(self):
-    self.setStyleSheet(
-        self.styleSheet()
-        + "\n"
-        + """
-        QWidget {
-            background-color: #222;
-            color: #fff;
-        }
-        QPushButton {
-            background-color: #333;
-            color: #fff;
-            border-radius: 6px;
-            padding: 8px 0;
-        }
-        QPushButton:disabled {
-            background-color: #444;
-            color: #888;
-        }
-        QLineEdit, QTextEdit {
-            background-color: #181818;
-            color: #fff;
-            border: 1px solid #444;
-            border-radius: 4px;
-        }
-        QFrame#GameArea {
-            background: #181818;
-            border-radius: 10px;
-            border: none;
-        }
-        QFrame#ChatArea {
-            background: #181818;
-            border-radius: 10px;
-            border: none;
-        }
-        """
-    )